@@ -1,26 +1,35 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from pydantic import BaseModel, HttpUrl, Field, ConfigDict
+from pydantic import BaseModel, HttpUrl, Field, ConfigDict, TypeAdapter, ValidationError
 from typing import Optional, List
 from datetime import datetime
 from sqlalchemy.orm import Session
 from fastapi import Depends
+import json
 import logging
 import time
 from typing import Optional
 from datetime import datetime
-from app.database import get_db
-from app.models.url_document import URLDocument, IngestionStatus, QueryLog
+from app.database import get_db, get_async_db, AsyncSessionLocal
+from app.models.url_document import URLDocument, IngestionStatus, QueryLog, CrawlJob, CrawlStatus
 from app.config import settings
 import uuid
 from pydantic import BaseModel
-from app.services.celery_worker import process_url
+from app.services.celery_worker import (
+    ingest_pipeline, dispatch_jobs, refresh_url, refresh_documents, reprocess_archive, start_crawl
+)
+from app.services.crawler import CrawlFrontier
 from app.services.vector_store import vector_store_manager
-from app.utils.llm_client import LLMClient
+from app.services.corpus_state import corpus_state
+from app.services.query_cache import query_cache
+from app.services.context_builder import build_context
+from app.utils.llm_client import llm_clients
 from sqlalchemy import text
 from fastapi import Query
-from sqlalchemy import asc, desc
+from sqlalchemy import asc, desc, func, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -44,6 +53,80 @@ class IngestURLResponse(BaseModel):
     url: str
 
 
+class BulkIngestResponse(BaseModel):
+    batch_id: str
+    status: str
+    message: str
+    queued: int
+    skipped: int
+    invalid: List[str]
+
+
+class BatchStatusResponse(BaseModel):
+    batch_id: str
+    total: int
+    pending: int
+    processing: int
+    completed: int
+    failed: int
+    progress: float
+
+
+class CrawlRequest(BaseModel):
+    url: HttpUrl = Field(..., description="Seed page, or sitemap to start from")
+    sitemap: Optional[bool] = Field(
+        None, description="Treat url as a sitemap (default: when its path ends in .xml)"
+    )
+    max_depth: int = Field(
+        settings.crawl_max_depth, ge=0, description="Link distance from the seed to follow"
+    )
+    max_pages: int = Field(
+        settings.crawl_max_pages, ge=1, le=settings.crawl_max_pages_limit,
+        description="Pages to discover at most"
+    )
+    domains: Optional[List[str]] = Field(
+        None, description="Hosts to stay on, subdomains included (default: the seed's host)"
+    )
+    concurrency: int = Field(
+        settings.crawl_concurrency, ge=1, description="Pages fetched and indexed at once"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "url": "https://docs.example.com/",
+                "max_depth": 3,
+                "max_pages": 5000,
+            }
+        }
+
+
+class CrawlResponse(BaseModel):
+    crawl_id: str
+    status: str
+    message: str
+    seed_url: str
+
+
+class CrawlStatusResponse(BaseModel):
+    crawl_id: str
+    seed_url: str
+    status: CrawlStatus
+    domains: List[str]
+    max_depth: int
+    max_pages: int
+    pages_discovered: int
+    pages_queued: int
+    frontier: Optional[int]  # URLs waiting to be queued; None when unknown
+    pending: int
+    processing: int
+    completed: int
+    failed: int
+    created_at: datetime
+    completed_at: Optional[datetime]
+    error_message: Optional[str]
+
+
 class JobStatusResponse(BaseModel):
     job_id: str
     url: str
@@ -53,6 +136,9 @@ class JobStatusResponse(BaseModel):
     created_at: datetime
     completed_at: Optional[datetime]
     error_message: Optional[str]
+    fetch_time_ms: Optional[int] = None
+    extract_time_ms: Optional[int] = None
+    index_time_ms: Optional[int] = None
 
 
 class DocumentResponse(BaseModel):
@@ -86,6 +172,12 @@ class QueryRequest(BaseModel):
     llm_provider: Optional[str] = Field(
         None, description="LLM provider to use (gemini, openai, anthropic)"
     )
+    sources: Optional[List[str]] = Field(
+        None, description="Only retrieve from these source URLs"
+    )
+    job_ids: Optional[List[str]] = Field(
+        None, description="Only retrieve from documents ingested by these jobs"
+    )
 
 
 @router.post("/ingest-url", response_model=IngestURLResponse)
@@ -118,7 +210,7 @@ async def ingest_url(request: IngestURLRequest, db: Session = Depends(get_db)):
         db.add(doc)
         db.commit()
         # Added task to celery
-        process_url.delay(job_id, url_str)
+        ingest_pipeline([(job_id, url_str)]).apply_async()
         logger.info(f"Queued job: {job_id} for URL: {url_str}")
         return {
             "job_id": job_id,
@@ -132,6 +224,270 @@ async def ingest_url(request: IngestURLRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Error ingesting URL")
 
 
+_http_url = TypeAdapter(HttpUrl)
+
+
+def _parse_ndjson(body: bytes) -> List:
+    items = []
+    for line in body.decode("utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            # Tolerate bare, unquoted URLs in uploaded files
+            item = line
+        items.append(item.get("url") if isinstance(item, dict) else item)
+    return items
+
+
+async def _read_bulk_urls(request: Request) -> List:
+    """Read URLs from a JSON array, a {"urls": [...]} object or an NDJSON body/upload"""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Missing 'file' upload")
+        return _parse_ndjson(await upload.read())
+
+    body = await request.body()
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return _parse_ndjson(body)
+
+    try:
+        payload = json.loads(body)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if isinstance(payload, dict):
+        payload = payload.get("urls")
+    if not isinstance(payload, list):
+        raise HTTPException(
+            status_code=400, detail="Expected a JSON array of URLs or {\"urls\": [...]}"
+        )
+    return payload
+
+
+def _enqueue_urls(db: Session, urls: List[str], batch_id: str) -> int:
+    """Dedup against url_documents, bulk insert new rows and dispatch their jobs"""
+    # Anything already ingested or still in flight is skipped; failed URLs are
+    # retried on their existing row
+    existing, failed = set(), {}
+    for i in range(0, len(urls), 5000):
+        rows = db.query(URLDocument.job_id, URLDocument.url, URLDocument.status).filter(
+            URLDocument.url.in_(urls[i:i + 5000])
+        )
+        for job_id, url, status in rows:
+            if status == IngestionStatus.FAILED:
+                failed.setdefault(url, job_id)
+            else:
+                existing.add(url)
+
+    retried = [(failed[url], url) for url in urls if url in failed and url not in existing]
+    new = [
+        (str(uuid.uuid4()), url) for url in urls if url not in existing and url not in failed
+    ]
+    if not retried and not new:
+        return 0
+
+    for i in range(0, len(retried), 5000):
+        db.execute(
+            update(URLDocument)
+            .where(URLDocument.job_id.in_([job_id for job_id, _ in retried[i:i + 5000]]))
+            .values(
+                batch_id=batch_id,
+                status=IngestionStatus.PENDING,
+                retry_count=0,
+                error_message=None,
+            )
+        )
+    if new:
+        db.execute(
+            insert(URLDocument),
+            [
+                {
+                    "job_id": job_id,
+                    "batch_id": batch_id,
+                    "url": url,
+                    "status": IngestionStatus.PENDING,
+                    "retry_count": 0,
+                    "num_chunks": 0,
+                }
+                for job_id, url in new
+            ],
+        )
+    db.commit()
+    jobs = retried + new
+    dispatch_jobs(jobs)
+    return len(jobs)
+
+
+@router.post("/ingest-urls", response_model=BulkIngestResponse)
+async def ingest_urls(request: Request, db: Session = Depends(get_db)):
+    """
+    Queue many URLs in one request
+
+    Accepts a JSON array (or {"urls": [...]}), an application/x-ndjson body,
+    or a multipart NDJSON upload in the "file" field. Returns a batch id whose
+    aggregate progress is available from /batches/{batch_id}.
+    """
+    items = await _read_bulk_urls(request)
+    if len(items) > settings.bulk_ingest_max_urls:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many URLs (max {settings.bulk_ingest_max_urls})",
+        )
+
+    urls = []
+    seen = set()
+    invalid = []
+    for item in items:
+        try:
+            url_str = str(_http_url.validate_python(item))
+        except ValidationError:
+            invalid.append(str(item))
+            continue
+        if url_str not in seen:
+            seen.add(url_str)
+            urls.append(url_str)
+
+    batch_id = str(uuid.uuid4())
+    try:
+        queued = await run_in_threadpool(_enqueue_urls, db, urls, batch_id)
+    except Exception as e:
+        logger.error(f"Error ingesting URL batch: {e}")
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Error ingesting URLs")
+
+    logger.info(f"Queued batch {batch_id}: {queued} URLs")
+    return {
+        "batch_id": batch_id,
+        "status": IngestionStatus.PENDING,
+        "message": f"{queued} URLs queued for processing",
+        "queued": queued,
+        "skipped": len(items) - len(invalid) - queued,
+        "invalid": invalid,
+    }
+
+
+@router.get("/batches/{batch_id}", response_model=BatchStatusResponse)
+async def get_batch_status(batch_id: str, db: Session = Depends(get_db)):
+    counts = dict(
+        db.query(URLDocument.status, func.count(URLDocument.id))
+        .filter(URLDocument.batch_id == batch_id)
+        .group_by(URLDocument.status)
+        .all()
+    )
+    total = sum(counts.values())
+    if not total:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    completed = counts.get(IngestionStatus.COMPLETED, 0)
+    failed = counts.get(IngestionStatus.FAILED, 0)
+    return BatchStatusResponse(
+        batch_id=batch_id,
+        total=total,
+        pending=counts.get(IngestionStatus.PENDING, 0),
+        processing=counts.get(IngestionStatus.PROCESSING, 0),
+        completed=completed,
+        failed=failed,
+        progress=(completed + failed) / total,
+    )
+
+
+@router.post("/crawl", response_model=CrawlResponse)
+async def crawl_site(request: CrawlRequest, db: Session = Depends(get_db)):
+    """
+    Crawl a site breadth first from a seed page or a sitemap
+
+    Discovered pages go through the regular ingestion pipeline, at most
+    `concurrency` at a time. Pages are url_documents rows whose batch_id is
+    the crawl_id, so /batches/{crawl_id} reports their progress as well.
+    """
+    seed_url = str(request.url)
+    is_sitemap = request.sitemap
+    if is_sitemap is None:
+        is_sitemap = request.url.path is not None and request.url.path.lower().endswith(".xml")
+    domains = [domain.strip().lower() for domain in request.domains or [] if domain.strip()]
+    crawl = CrawlJob(
+        crawl_id=str(uuid.uuid4()),
+        seed_url=seed_url,
+        is_sitemap=is_sitemap,
+        status=CrawlStatus.RUNNING,
+        domains=",".join(domains or [request.url.host.lower()]),
+        max_depth=request.max_depth,
+        max_pages=request.max_pages,
+        concurrency=request.concurrency,
+    )
+    try:
+        db.add(crawl)
+        db.commit()
+        start_crawl.delay(crawl.crawl_id)
+    except Exception as e:
+        logger.error(f"Error starting crawl: {e}")
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Error starting crawl")
+
+    logger.info(f"Queued crawl {crawl.crawl_id} of {seed_url}")
+    return {
+        "crawl_id": crawl.crawl_id,
+        "status": CrawlStatus.RUNNING,
+        "message": f"Crawl of {'sitemap' if is_sitemap else 'site'} queued",
+        "seed_url": seed_url,
+    }
+
+
+@router.get("/crawls/{crawl_id}", response_model=CrawlStatusResponse)
+async def get_crawl_status(crawl_id: str, db: Session = Depends(get_db)):
+    crawl = db.query(CrawlJob).filter(CrawlJob.crawl_id == crawl_id).first()
+    if not crawl:
+        raise HTTPException(status_code=404, detail="Crawl not found")
+    counts = dict(
+        db.query(URLDocument.status, func.count(URLDocument.id))
+        .filter(URLDocument.batch_id == crawl_id)
+        .group_by(URLDocument.status)
+        .all()
+    )
+    frontier = None
+    if crawl.status == CrawlStatus.RUNNING:
+        try:
+            frontier = await run_in_threadpool(CrawlFrontier(crawl_id).pending)
+        except Exception as e:
+            logger.warning(f"Could not read frontier of crawl {crawl_id}: {e}")
+    return CrawlStatusResponse(
+        crawl_id=crawl.crawl_id,
+        seed_url=crawl.seed_url,
+        status=crawl.status,
+        domains=crawl.domains.split(","),
+        max_depth=crawl.max_depth,
+        max_pages=crawl.max_pages,
+        pages_discovered=crawl.pages_discovered or 0,
+        pages_queued=crawl.pages_queued or 0,
+        frontier=frontier,
+        pending=counts.get(IngestionStatus.PENDING, 0),
+        processing=counts.get(IngestionStatus.PROCESSING, 0),
+        completed=counts.get(IngestionStatus.COMPLETED, 0),
+        failed=counts.get(IngestionStatus.FAILED, 0),
+        created_at=crawl.created_at,
+        completed_at=crawl.completed_at,
+        error_message=crawl.error_message,
+    )
+
+
+@router.post("/crawls/{crawl_id}/cancel")
+async def cancel_crawl(crawl_id: str, db: Session = Depends(get_db)):
+    """Stop queueing pages for a crawl; pages already queued are still ingested"""
+    crawl = db.query(CrawlJob).filter(CrawlJob.crawl_id == crawl_id).first()
+    if not crawl:
+        raise HTTPException(status_code=404, detail="Crawl not found")
+    if crawl.status != CrawlStatus.RUNNING:
+        raise HTTPException(status_code=409, detail=f"Crawl is already {crawl.status.value}")
+    crawl.status = CrawlStatus.CANCELLED
+    crawl.completed_at = func.now()
+    db.commit()
+    return {"message": "Crawl cancelled", "crawl_id": crawl_id}
+
+
 @router.get("/status/{job_id}", response_model=JobStatusResponse)
 async def get_job_status(job_id: str, db: Session = Depends(get_db)):
     doc = db.query(URLDocument).filter(URLDocument.job_id == job_id).first()
@@ -146,57 +502,129 @@ async def get_job_status(job_id: str, db: Session = Depends(get_db)):
         created_at=doc.created_at,
         completed_at=doc.completed_at,
         error_message=doc.error_message,
+        fetch_time_ms=doc.fetch_time_ms,
+        extract_time_ms=doc.extract_time_ms,
+        index_time_ms=doc.index_time_ms,
+    )
+
+
+async def _retrieve(request: QueryRequest, embedding: Optional[List[float]] = None):
+    """Fetch candidates with vectors and reduce them to the prompt context"""
+    if embedding is None:
+        embedding = await vector_store_manager.aembed_query(request.query)
+    candidates = await vector_store_manager.asearch(
+        request.query,
+        k=max(settings.context_candidates, settings.top_k_results),
+        query_embedding=embedding,
+        sources=request.sources,
+        job_ids=request.job_ids,
+        with_vectors=settings.context_mmr_enabled,
     )
+    return build_context(candidates, embedding)
+
+
+async def _cached_retrieval(request: QueryRequest):
+    """Retrieve chunks through the query cache; returns (cache status, entry)"""
+    query = request.query
+    # Scoped searches are not cached: entries are keyed by query text only
+    if not settings.query_cache_enabled or request.sources or request.job_ids:
+        results = await _retrieve(request)
+        return "bypass", ({"results": results, "answers": {}} if results else None)
+
+    entry = query_cache.get(query)
+    if entry is not None:
+        return "hit-exact", entry
+
+    embedding = None
+    if settings.query_cache_semantic_enabled:
+        embedding = await vector_store_manager.aembed_query(query)
+        entry = query_cache.get_similar(embedding)
+        if entry is not None:
+            return "hit-semantic", entry
+
+    query_cache.record_miss()
+    results = await _retrieve(request, embedding)
+    if not results:
+        return "miss", None
+    return "miss", query_cache.put(query, results, embedding)
+
+
+async def _replay(answer: str, piece_size: int = 64):
+    """Stream a cached answer in small pieces, like a live generation"""
+    for i in range(0, len(answer), piece_size):
+        yield answer[i:i + piece_size]
 
 
 @router.post("/query")
-async def query_documents(request: QueryRequest, db: Session = Depends(get_db)):
+async def query_documents(request: QueryRequest, db: AsyncSession = Depends(get_async_db)):
     query_id = str(uuid.uuid4())
     start_time = time.time()
     try:
-        stats = vector_store_manager.get_stats()
+        stats = await corpus_state.get()
         if stats["total_documents"] == 0:
             raise HTTPException(
                 status_code=400, detail="No documents found in vector store"
             )
         retrieval_start = time.time()
-        results = vector_store_manager.search(request.query, k=settings.top_k_results)
+        cache_status, cache_entry = await _cached_retrieval(request)
+        results = cache_entry["results"] if cache_entry else []
         retrieval_time = int((time.time() - retrieval_start) * 1000)
         if not results:
             raise HTTPException(
                 status_code=404, detail="No relevant documents found for your query"
             )
         context_chunks = [doc["page_content"] for doc, _ in results]
+        llm_client = llm_clients.get(request.llm_provider)
+        cached_answer = cache_entry["answers"].get(llm_client.model_name)
         query_log = QueryLog(
             query_id=query_id,
             query_text=request.query,
             num_results_retrieved=len(results),
             retrieval_time_ms=retrieval_time,
             llm_provider=request.llm_provider or settings.default_llm_provider,
+            llm_model=llm_client.model_name,
         )
         db.add(query_log)
-        db.commit()
-        llm_client = LLMClient(request.llm_provider)
-        query_log.llm_model = llm_client.model_name
-        db.commit()
+        await db.commit()
 
         async def generate_stream():
             generation_start = time.time()
+            first_token_time = None
             full_response = ""
             try:
-                async for chunk in llm_client.generate_streaming(
-                    prompt=request.query, context_chunks=context_chunks
-                ):
+                if cached_answer is not None:
+                    stream = _replay(cached_answer)
+                else:
+                    stream = llm_client.generate_streaming(
+                        prompt=request.query, context_chunks=context_chunks
+                    )
+                async for chunk in stream:
+                    if first_token_time is None:
+                        first_token_time = int((time.time() - start_time) * 1000)
                     yield chunk
                     full_response += chunk
 
+                if cached_answer is None and not full_response.startswith(
+                    "Error generating response"
+                ):
+                    query_cache.put_answer(cache_entry, llm_client.model_name, full_response)
+
                 generation_time = int((time.time() - generation_start) * 1000)
                 total_time = int((time.time() - start_time) * 1000)
 
-                query_log.response_generated = full_response
-                query_log.generation_time_ms = generation_time
-                query_log.total_time_ms = total_time
-                db.commit()
+                # The request session may already be closed once streaming starts
+                async with AsyncSessionLocal() as log_db:
+                    await log_db.execute(
+                        update(QueryLog)
+                        .where(QueryLog.query_id == query_id)
+                        .values(
+                            response_generated=full_response,
+                            generation_time_ms=generation_time,
+                            time_to_first_token_ms=first_token_time,
+                            total_time_ms=total_time,
+                        )
+                    )
+                    await log_db.commit()
             except Exception as e:
                 logger.error(f"Error generating response: {e}")
                 yield f"\n\n[Error: {str(e)}]"
@@ -204,7 +632,11 @@ async def query_documents(request: QueryRequest, db: Session = Depends(get_db)):
         return StreamingResponse(
             generate_stream(),
             media_type="text/plain",
-            headers={"X-Query-ID": query_id, "X-Results-Count": str(len(results))},
+            headers={
+                "X-Query-ID": query_id,
+                "X-Results-Count": str(len(results)),
+                "X-Cache": cache_status,
+            },
         )
     except HTTPException:
         raise
@@ -294,6 +726,47 @@ async def get_document(document_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/documents/{document_id}/refresh")
+async def refresh_document(document_id: int, db: Session = Depends(get_db)):
+    """
+    Re-crawl a completed document, re-embedding only changed chunks
+
+    - **document_id**: Document ID to refresh
+    """
+    document = db.query(URLDocument).filter(URLDocument.id == document_id).first()
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if document.status != IngestionStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail="Only completed documents can be refreshed")
+
+    refresh_url.delay(document.job_id)
+    return {
+        "message": "Refresh queued",
+        "document_id": document_id,
+        "job_id": document.job_id,
+        "url": document.url,
+    }
+
+
+@router.post("/refresh")
+async def refresh_all_documents():
+    """Queue a conditional re-crawl of every completed document"""
+    refresh_documents.delay()
+    return {"message": "Refresh of all completed documents queued"}
+
+
+@router.post("/reprocess")
+async def reprocess_all_documents(reextract: bool = False):
+    """
+    Re-chunk and re-embed every completed document from the page archive,
+    without refetching
+
+    - **reextract**: Run the archived raw pages through extraction again
+    """
+    reprocess_archive.delay(reextract)
+    return {"message": "Reprocessing from the archive queued", "reextract": reextract}
+
+
 @router.delete("/documents/{document_id}")
 async def delete_document(document_id: int, db: Session = Depends(get_db)):
     """
@@ -301,8 +774,8 @@ async def delete_document(document_id: int, db: Session = Depends(get_db)):
 
     - **document_id**: Document ID to delete
 
-    Note: This only deletes the metadata from the database.
-    Vector embeddings in Qdrant are not automatically deleted.
+    Its vectors are removed from Qdrant too; chunks shared with other
+    documents are kept for them.
     """
     try:
         document = db.query(URLDocument).filter(URLDocument.id == document_id).first()
@@ -314,6 +787,9 @@ async def delete_document(document_id: int, db: Session = Depends(get_db)):
         job_id = document.job_id
         url = document.url
 
+        # Delete vectors first so a failure leaves the row to retry with
+        await run_in_threadpool(vector_store_manager.delete_document, job_id)
+
         # Delete from database
         db.delete(document)
         db.commit()
@@ -341,10 +817,17 @@ async def health_check(db: Session = Depends(get_db)):
     try:
         # Check database
         db.execute(text("SELECT 1"))
-        # Check vector store
-        stats = vector_store_manager.get_stats()
+        # Check vector store (cached, refreshed in the background)
+        stats = await corpus_state.get()
+        cache = vector_store_manager.embedding_client.cache
 
-        return {"status": "healthy", "database": "connected", "vector_store": stats}
+        return {
+            "status": "healthy",
+            "database": "connected",
+            "vector_store": stats,
+            "embedding_cache": cache.stats() if cache else None,
+            "query_cache": query_cache.stats(),
+        }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=503, detail="Service unhealthy")
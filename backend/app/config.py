@@ -24,10 +24,45 @@ class Settings(BaseSettings):
     gemini_embedding_model: str = "text-embedding-004"
     openai_embedding_model: str = "text-embedding-3-small"
     embedding_provider: str = "gemini"  # gemini or openai
+    embedding_dimension: Optional[int] = None  # overrides the built-in registry
+
+    embedding_cache_enabled: bool = True
+    embedding_cache_memory_size: int = 10000
+    embedding_cache_redis_max_entries: int = 1000000
+    embedding_cache_ttl_seconds: int = 30 * 24 * 3600
+
+    embedding_batch_max_items: Optional[int] = None  # defaults to provider limit
+    embedding_batch_max_tokens: Optional[int] = None  # defaults to provider limit
+    embedding_max_concurrency: int = 8
+    embedding_target_latency_ms: int = 5000
+    embedding_max_retries: int = 4
 
     chunk_size: int = 1000
     chunk_overlap: int = 200
+    chunk_size_unit: str = "characters"  # or "tokens" (words and punctuation marks)
     top_k_results: int = 5
+    ingest_batch_size: int = 256  # chunks per embed -> upsert step during indexing
+    ingest_queue_depth: int = 2  # embedded batches buffered ahead of the upsert
+    chunk_lock_ttl: float = 30.0  # expiry of a per-chunk payload update lock
+    chunk_lock_timeout: float = 60.0  # longest wait for chunk locks before the task fails
+
+    hybrid_search_enabled: bool = False  # dense + BM25 sparse vectors fused with RRF
+    hybrid_prefetch_limit: int = 50  # candidates per retriever before fusion
+    bm25_k1: float = 1.2
+    bm25_b: float = 0.75
+    bm25_avg_doc_tokens: float = 150.0
+
+    context_mmr_enabled: bool = True
+    context_candidates: int = 20  # chunks fetched with vectors before MMR
+    context_mmr_lambda: float = 0.7  # 1.0 = pure relevance, 0.0 = pure diversity
+    context_max_tokens: int = 3000  # estimated prompt tokens spent on context
+
+    query_cache_enabled: bool = True
+    query_cache_semantic_enabled: bool = True
+    query_cache_similarity_threshold: float = 0.95
+    query_cache_max_entries: int = 1000
+    query_cache_ttl_seconds: int = 3600
+    query_cache_store_answers: bool = True
 
     default_llm_provider: str = "gemini"
     gemini_model: str = "gemini-1.5-flash"
@@ -35,6 +70,10 @@ class Settings(BaseSettings):
     anthropic_model: str = "claude-3-sonnet-20240229"
     max_tokens: int = 2000
     temperature: float = 0.7
+    llm_http2: bool = True
+    llm_timeout: float = 120.0
+    llm_max_connections: int = 50
+    llm_keepalive_expiry: float = 300.0
 
     debug: bool = True
     log_level: str = "INFO"
@@ -42,6 +81,64 @@ class Settings(BaseSettings):
     qdrant_url: str = "http://localhost:6333"
     qdrant_api_key: Optional[str] = None
     qdrant_collection_name: str = "rag_documents"
+    qdrant_quantization: Optional[str] = None  # scalar, binary or unset
+    qdrant_quantization_always_ram: bool = True  # keep quantized vectors in RAM
+    qdrant_on_disk_vectors: bool = False  # original float32 vectors on disk (mmap)
+    qdrant_on_disk_payload: bool = False
+    qdrant_hnsw_m: int = 16
+    qdrant_hnsw_ef_construct: int = 100
+    qdrant_hnsw_ef: Optional[int] = None  # search-time; Qdrant default when unset
+    qdrant_search_oversampling: float = 2.0  # quantized candidates per result
+    qdrant_search_rescore: bool = True  # re-rank candidates with original vectors
+    migration_batch_size: int = 1000  # chunks re-embedded per step when the embedding model changes
+    migration_max_passes: int = 5  # catch-up passes before the final, write-frozen pass
+    migration_freeze_timeout: float = 300.0  # longest write freeze for the final pass before the switch
+    corpus_state_refresh_interval: float = 30.0
+    corpus_state_max_staleness: float = 120.0
+    corpus_state_reconcile_interval: float = 3600.0
+
+    fetch_connect_timeout: float = 10.0
+    fetch_read_timeout: float = 30.0
+    fetch_max_connections: int = 100
+    fetch_max_connections_per_host: int = 4
+    fetch_keepalive_expiry: float = 30.0
+    fetch_max_bytes: int = 10 * 1024 * 1024  # decompressed body size at which a download is aborted
+    fetch_allowed_content_types: str = "text/html,application/xhtml+xml,text/plain"
+    extraction_fast: bool = False  # skip trafilatura's readability/jusText fallback pass
+
+    # Raw pages and extracted text, kept for re-chunking without refetching
+    archive_enabled: bool = True
+    archive_dir: str = str(ROOT_DIR / "data" / "archive")
+    archive_zstd_level: int = 6
+    reprocess_batch_size: int = 64  # documents re-chunked and embedded together
+
+    bulk_ingest_max_urls: int = 50000
+    bulk_dispatch_chunk_size: int = 500
+    bulk_task_size: int = 10  # URLs fetched and embedded together per task
+
+    crawl_max_depth: int = 3  # default link distance from the seed
+    crawl_max_pages: int = 10000  # default pages per crawl
+    crawl_max_pages_limit: int = 5_000_000
+    crawl_concurrency: int = 50  # default pages in flight per crawl
+    crawl_poll_interval: float = 5.0  # seconds between frontier top-ups
+    crawl_max_sitemaps: int = 100  # sitemap files read per crawl, including index children
+    crawl_seen_error_rate: float = 0.001  # false positive rate of the seen-set
+    crawl_state_ttl_seconds: int = 7 * 24 * 3600
+
+    # Per-host limits shared by every worker through Redis
+    politeness_enabled: bool = True
+    politeness_requests_per_second: float = 2.0  # per host, across all workers
+    politeness_burst: int = 4  # requests a quiet host may receive at once
+    politeness_max_wait: float = 30.0  # longer waits requeue the page instead of blocking
+    robots_enabled: bool = True
+    robots_user_agent: str = "RAGEngine"  # agent matched against robots.txt groups
+    robots_cache_ttl_seconds: int = 24 * 3600
+    robots_max_crawl_delay: float = 60.0  # larger Crawl-delay values are capped
+    circuit_failure_threshold: int = 5  # consecutive host failures that open the circuit
+    circuit_failure_window_seconds: int = 60
+    circuit_cooldown_seconds: int = 300  # time an open circuit holds requests back
+    ingest_retry_base_delay: float = 60.0  # first retry delay, doubled per attempt
+    ingest_retry_max_delay: float = 3600.0
 
     def get_available_llm_provider(self) -> str:
         """Get the first available LLM provider based on API keys"""
@@ -56,6 +153,16 @@ class Settings(BaseSettings):
                 "No LLM API key configured. Please set at least one API key."
             )
 
+    def get_embedding_model(self, provider: Optional[str] = None) -> str:
+        """Get the configured embedding model for a provider"""
+        provider = provider or self.embedding_provider
+        if provider == "gemini":
+            return self.gemini_embedding_model
+        elif provider == "openai":
+            return self.openai_embedding_model
+        else:
+            raise ValueError(f"Unknown embedding provider: {provider}")
+
     def get_llm_model(self, provider: Optional[str] = None) -> str:
         """Get the model name for the specified provider"""
         provider = provider or self.default_llm_provider
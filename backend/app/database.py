@@ -1,4 +1,6 @@
-from sqlalchemy import create_engine
+from sqlalchemy import Enum, create_engine, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 from contextlib import contextmanager
@@ -20,11 +22,90 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def get_async_database_url(url: str) -> str:
+    """Swap the sync driver in a database URL for its asyncio counterpart"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+# Async engine for request paths that must not block the event loop
+async_engine = create_async_engine(
+    get_async_database_url(settings.database_url),
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    echo=settings.debug
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+def _upgrade_schema():
+    """
+    Bring tables created by an earlier release up to the current models
+
+    create_all only creates missing tables, so columns, indexes and enum
+    values added since are applied here. Changes are additive only: new
+    columns must be nullable or carry a server default.
+    """
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    raise RuntimeError(f"Cannot add required column {table.name}.{column.name}")
+                ddl = (
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {preparer.format_column(column)} "
+                    f"{column.type.compile(dialect=engine.dialect)}"
+                )
+                if column.server_default is not None:
+                    default = column.server_default.arg
+                    if hasattr(default, "compile"):
+                        default = default.compile(dialect=engine.dialect)
+                    else:
+                        default = f"'{default}'"
+                    ddl += f" DEFAULT {default}"
+                logger.info(f"Adding column {table.name}.{column.name}")
+                conn.execute(text(ddl))
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    logger.info(f"Creating index {index.name}")
+                    index.create(bind=conn)
+
+    if engine.dialect.name == "postgresql":
+        # Native enum types keep the labels they were created with; ADD VALUE
+        # cannot run inside a transaction block before PostgreSQL 12
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for table in Base.metadata.sorted_tables:
+                for column in table.columns:
+                    if isinstance(column.type, Enum) and column.type.name:
+                        for label in column.type.enums:
+                            conn.execute(text(
+                                f"ALTER TYPE {preparer.quote(column.type.name)} "
+                                f"ADD VALUE IF NOT EXISTS '{label}'"
+                            ))
+
 
 def init_db():
-    """Initialize database tables"""
+    """Create missing tables and upgrade existing ones in place"""
     try:
         Base.metadata.create_all(bind=engine)
+        _upgrade_schema()
         logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Error creating database tables: {e}")
@@ -40,6 +121,12 @@ def get_db() -> Session:
         db.close()
 
 
+async def get_async_db() -> AsyncSession:
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 @contextmanager
 def get_db_context():
     """Context manager for database session"""
@@ -4,8 +4,10 @@ from contextlib import asynccontextmanager
 import logging
 
 from app.api.routes import router
-from app.database import init_db
+from app.database import init_db, async_engine
 from app.config import settings
+from app.utils.llm_client import llm_clients
+from app.services.corpus_state import corpus_state
 
 # Configure logging
 logging.basicConfig(
@@ -40,11 +42,20 @@ async def lifespan(app: FastAPI):
     
     logger.info(f"Available LLM providers: {', '.join(providers)}")
     logger.info(f"Default provider: {settings.default_llm_provider}")
+
+    # Shared provider clients keep warm connections across requests
+    llm_clients.startup()
+
+    # Corpus size is read from memory by /query and /health
+    await corpus_state.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down RAG Engine API...")
+    await corpus_state.stop()
+    await llm_clients.aclose()
+    await async_engine.dispose()
 
 
 # Create FastAPI app
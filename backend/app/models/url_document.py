@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Integer, Text, Enum as SQLEnum
+from sqlalchemy import Boolean, Column, String, DateTime, Integer, Text, Index, Enum as SQLEnum
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -16,16 +16,29 @@ class IngestionStatus(str, enum.Enum):
 
 class URLDocument(Base):
     __tablename__ = "url_documents"
+    __table_args__ = (
+        # Hash index: URLs can exceed the btree row limit and are only matched by equality
+        Index("ix_url_documents_url", "url", postgresql_using="hash"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     job_id = Column(String(36), unique=True, index=True, nullable=False)
+    batch_id = Column(String(36), index=True, nullable=True)
     url = Column(Text, nullable=False)
     status = Column(SQLEnum(IngestionStatus), default=IngestionStatus.PENDING, nullable=False)
     
     title = Column(Text, nullable=True)
     content_hash = Column(String(64), nullable=True)
+    # Archive keys: the raw page is stored under raw_hash, the extracted
+    # text under content_hash
+    raw_hash = Column(String(64), nullable=True)
     num_chunks = Column(Integer, default=0)
     
+    # HTTP validators for conditional refetches
+    etag = Column(Text, nullable=True)
+    last_modified = Column(Text, nullable=True)
+    last_fetched_at = Column(DateTime(timezone=True), nullable=True)
+    
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
@@ -33,6 +46,15 @@ class URLDocument(Base):
     error_message = Column(Text, nullable=True)
     retry_count = Column(Integer, default=0)
     
+    # Link distance from the crawl seed, for pages found by a crawl (batch_id
+    # is then the crawl_id)
+    crawl_depth = Column(Integer, nullable=True)
+    
+    # Duration of each ingestion stage on its worker, from the last attempt
+    fetch_time_ms = Column(Integer, nullable=True)
+    extract_time_ms = Column(Integer, nullable=True)
+    index_time_ms = Column(Integer, nullable=True)
+    
     def __repr__(self):
         return f"<URLDocument(job_id={self.job_id}, url={self.url}, status={self.status})>"
 
@@ -48,6 +70,7 @@ class QueryLog(Base):
     response_generated = Column(Text, nullable=True)
     
     retrieval_time_ms = Column(Integer, nullable=True)
+    time_to_first_token_ms = Column(Integer, nullable=True)
     generation_time_ms = Column(Integer, nullable=True)
     total_time_ms = Column(Integer, nullable=True)
     
@@ -57,4 +80,70 @@ class QueryLog(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     def __repr__(self):
-        return f"<QueryLog(query_id={self.query_id}, query_text={self.query_text[:50]})>"
\ No newline at end of file
+        return f"<QueryLog(query_id={self.query_id}, query_text={self.query_text[:50]})>"
+
+
+class VectorCollectionStatus(str, enum.Enum):
+    BUILDING = "building"
+    ACTIVE = "active"
+    RETIRED = "retired"
+    FAILED = "failed"
+
+
+class VectorCollection(Base):
+    """Embedding model behind each physical Qdrant collection"""
+    __tablename__ = "vector_collections"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), unique=True, index=True, nullable=False)
+    status = Column(SQLEnum(VectorCollectionStatus), default=VectorCollectionStatus.BUILDING, nullable=False)
+    
+    embedding_provider = Column(String(50), nullable=False)
+    embedding_model = Column(String(100), nullable=False)
+    dimension = Column(Integer, nullable=False)
+    
+    # Migration progress
+    points_total = Column(Integer, default=0)
+    points_migrated = Column(Integer, default=0)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    activated_at = Column(DateTime(timezone=True), nullable=True)
+    error_message = Column(Text, nullable=True)
+    
+    def __repr__(self):
+        return f"<VectorCollection(name={self.name}, model={self.embedding_model}, status={self.status})>"
+
+
+class CrawlStatus(str, enum.Enum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+
+class CrawlJob(Base):
+    """A site crawl; its pages are url_documents rows with batch_id = crawl_id"""
+    __tablename__ = "crawl_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    crawl_id = Column(String(36), unique=True, index=True, nullable=False)
+    seed_url = Column(Text, nullable=False)
+    is_sitemap = Column(Boolean, default=False, nullable=False)
+    status = Column(SQLEnum(CrawlStatus), default=CrawlStatus.RUNNING, nullable=False)
+    
+    # Scope
+    domains = Column(Text, nullable=False)  # comma separated, subdomains included
+    max_depth = Column(Integer, nullable=False)
+    max_pages = Column(Integer, nullable=False)
+    concurrency = Column(Integer, nullable=False)  # pages in flight at once
+    
+    # Progress
+    pages_discovered = Column(Integer, default=0)
+    pages_queued = Column(Integer, default=0)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    error_message = Column(Text, nullable=True)
+    
+    def __repr__(self):
+        return f"<CrawlJob(crawl_id={self.crawl_id}, seed_url={self.seed_url}, status={self.status})>"
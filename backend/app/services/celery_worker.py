@@ -1,18 +1,43 @@
-from celery import Celery
+from celery import Celery, chain, group
+from celery.signals import worker_init, worker_process_shutdown
 from app.config import settings
-from app.models.url_document import URLDocument, IngestionStatus
+from app.models.url_document import URLDocument, IngestionStatus, CrawlJob, CrawlStatus
 from app.database import get_db_context
 import logging
 import hashlib
+import importlib
+import random
+import time
+import uuid
+import redis
 from app.services.vector_store import vector_store_manager
-from app.utils.web_scraper import scraper
-from sqlalchemy import func
+from app.utils.web_scraper import InsufficientContent, scraper
+from app.utils.fetcher import fetcher
+from app.utils.politeness import DEFERRED, PERMANENT, TRANSIENT, classify_error
+from app.utils.archive import page_archive
+from app.utils.pipeline import batched, prefetch
+from app.services.crawler import CrawlFrontier, read_sitemaps
+from sqlalchemy import func, insert, update
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 celery_app = Celery("rag_worker", broker=settings.redis_url, backend=settings.redis_url)
 
+# Ingestion stages run on their own queues so each gets a worker pool sized
+# for its bottleneck: network (fetch), CPU (extract), embedding API and
+# Qdrant (index). Every other task stays on the default "celery" queue.
+INGEST_QUEUES = {
+    "fetch_pages": "fetch",
+    "extract_pages": "extract",
+    "index_pages": "index",
+}
+
+# Failed jobs are re-run from the fetch stage, with exponential backoff
+MAX_INGEST_RETRIES = 3
+
 celery_app.conf.update(
     task_serializer='json',
     accept_content=['json'],
@@ -24,58 +49,713 @@ celery_app.conf.update(
     task_soft_time_limit=540,  # 9 minutes
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=50,
+    task_routes={task: {"queue": queue} for task, queue in INGEST_QUEUES.items()},
 )
 
 
+@worker_init.connect
+def preload_libraries(**kwargs):
+    """
+    Import heavy libraries once in the parent process
+
+    Application modules import them lazily to keep startup cheap, but pool
+    children are recycled every worker_max_tasks_per_child tasks; importing
+    here means each new child inherits them through fork instead.
+    """
+    sdk = {"gemini": "google.genai", "openai": "openai"}.get(settings.embedding_provider)
+    for module in ("trafilatura", sdk):
+        if module:
+            try:
+                importlib.import_module(module)
+            except ImportError as e:
+                logger.warning(f"Could not preload {module}: {e}")
+
+
+@worker_process_shutdown.connect
+def close_fetcher(**kwargs):
+    fetcher.close()
+
+
+def ingest_pipeline(jobs: List[Tuple[str, str]]):
+    """Chained fetch -> extract -> index signature for (job_id, url) pairs"""
+    return chain(fetch_pages.s(jobs), extract_pages.s(), index_pages.s())
+
+
+def _load_docs(db, job_ids: List[str]) -> Dict[str, URLDocument]:
+    docs = {
+        doc.job_id: doc
+        for doc in db.query(URLDocument).filter(URLDocument.job_id.in_(job_ids))
+    }
+    for job_id in job_ids:
+        if job_id not in docs:
+            logger.error(f"Job {job_id} not found in database")
+    return docs
+
+
+def _retry_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Exponential backoff for a retry attempt, never sooner than retry_after
+
+    Up to a quarter of the delay is added as jitter, so jobs that failed
+    together do not all come back at the same moment.
+    """
+    delay = min(
+        settings.ingest_retry_base_delay * 2 ** (attempt - 1), settings.ingest_retry_max_delay
+    )
+    delay = max(delay, retry_after or 0)
+    return delay + random.uniform(0, delay / 4)
+
+
+def _record_failures(
+    db,
+    docs: Dict[str, URLDocument],
+    failures: List[Tuple[str, str, str]],
+    retry: bool = True,
+    retry_after: Optional[Dict[str, float]] = None
+):
+    """
+    Record (job_id, url, error) failures and queue another attempt
+
+    Each job is retried MAX_INGEST_RETRIES times through the whole pipeline;
+    retry_count on the row is the attempt counter. A job waiting for its
+    retry stays PENDING with the error recorded, so it is neither dispatched
+    again nor counted as finished; it is FAILED once no attempt is left.
+    retry=False records failures that would repeat on every attempt.
+    retry_after maps job ids to the least delay the host asked for.
+    """
+    retry_after = retry_after or {}
+    retries = []
+    for job_id, url, error in failures:
+        doc = docs.get(job_id)
+        if doc is None:
+            continue
+        logger.error(f"Error processing job {job_id}: {error}")
+        doc.error_message = error
+        doc.retry_count = (doc.retry_count or 0) + 1
+        if retry and doc.retry_count <= MAX_INGEST_RETRIES:
+            doc.status = IngestionStatus.PENDING
+            retries.append((job_id, url, doc.retry_count))
+            continue
+        doc.status = IngestionStatus.FAILED
+        if retry:
+            logger.error(f"Max retries reached for job {job_id}")
+    db.commit()
+    for job_id, url, attempt in retries:
+        ingest_pipeline([(job_id, url)]).apply_async(
+            countdown=_retry_delay(attempt, retry_after.get(job_id))
+        )
+
+
+def _defer_jobs(
+    db,
+    docs: Dict[str, URLDocument],
+    deferred: List[Tuple[str, str, str, float]]
+):
+    """
+    Requeue (job_id, url, reason, retry_after) jobs whose host is throttled
+
+    A deferral does not use up an attempt. Jobs go back to PENDING and are
+    requeued one pipeline per host, spread over up to twice the wait so a
+    throttled backlog trickles back instead of returning all at once.
+    """
+    hosts: Dict[str, List[Tuple[str, str]]] = {}
+    waits: Dict[str, float] = {}
+    for job_id, url, reason, retry_after in deferred:
+        doc = docs.get(job_id)
+        if doc is None:
+            continue
+        doc.status = IngestionStatus.PENDING
+        doc.error_message = reason
+        host = urlsplit(url).netloc.lower()
+        hosts.setdefault(host, []).append((job_id, url))
+        waits[host] = max(waits.get(host, 0), retry_after or 0)
+    db.commit()
+    for host, jobs in hosts.items():
+        wait = max(1.0, waits[host])
+        logger.info(f"Deferred {len(jobs)} jobs for {host} by {wait:.0f}s or more")
+        ingest_pipeline(jobs).apply_async(countdown=wait + random.uniform(0, wait))
+
+
+def _archive_blob(data: str) -> Optional[str]:
+    """Archive key of data, or None when the archive is disabled or failing"""
+    if not settings.archive_enabled:
+        return None
+    try:
+        return page_archive.put(data)
+    except OSError as e:
+        logger.warning(f"Could not archive page: {e}")
+        return None
+
+
+def _archive_page(html: str, content: str) -> Optional[str]:
+    """
+    Archive a fetched page and its extracted text
+
+    The text is stored under its sha256, which index_pages records as
+    content_hash. A failing archive does not fail ingestion.
+
+    Returns:
+        Archive key of the raw page, or None when it was not archived
+    """
+    _archive_blob(content)
+    return _archive_blob(html)
+
+
+def _unarchived(item: Dict, key: str) -> Dict:
+    """
+    Stage payload with its content loaded back from the archive
+
+    Stages hand pages and extracted text to each other by archive key;
+    payloads that could not be archived carry their content inline.
+    """
+    if "content" in item:
+        return item
+    content = page_archive.get_text(item[key])
+    if content is None:
+        raise FileNotFoundError(f"{key} {item[key]} is not in the page archive")
+    return {**item, "content": content}
+
 
-@celery_app.task(name="process_url", bind=True, max_retries=3, retry_backoff=True)
-def process_url(self, job_id: str, url: str):
-    logger.info(f"Starting processing for job {job_id} : {url}")
+def _follow_links(crawl_id: str, depth: int, links: List[str]):
+    """Add a crawled page's links to its crawl frontier, one level deeper"""
+    try:
+        added = CrawlFrontier(crawl_id).push(links, depth + 1)
+        logger.info(f"Crawl {crawl_id}: {added} of {len(links)} links queued at depth {depth + 1}")
+    except redis.RedisError as e:
+        logger.warning(f"Could not update frontier of crawl {crawl_id}: {e}")
+
+
+# Stage results travel to the next stage through the chain. Pages and text
+# go through the shared page archive and only their keys through the broker;
+# storing results in the result backend as well would only waste Redis memory
+@celery_app.task(name="fetch_pages", ignore_result=True)
+def fetch_pages(jobs: List[Tuple[str, str]]) -> List[Dict]:
+    """
+    Download pages for (job_id, url) pairs concurrently and archive them
+
+    Returns:
+        Fetcher responses of the successful jobs, tagged with their job_id
+        and, for crawled pages, [crawl_id, depth] under "crawl". The page
+        body is replaced by its archive key, raw_hash, unless archiving is
+        disabled or failed.
+    """
     with get_db_context() as db:
+        docs = _load_docs(db, [job_id for job_id, _ in jobs])
+        for doc in docs.values():
+            doc.status = IngestionStatus.PROCESSING
+        db.commit()
+
+        pages, failures, permanent, deferred, delays = [], [], [], [], {}
+        responses = scraper.fetch_urls([url for _, url in jobs])
+        for (job_id, url), response in zip(jobs, responses):
+            if job_id not in docs:
+                continue
+            docs[job_id].fetch_time_ms = response.get("elapsed_ms")
+            if "error" in response:
+                kind, retry_after = response.get("kind", TRANSIENT), response.get("retry_after")
+                if kind == PERMANENT:
+                    permanent.append((job_id, url, response["error"]))
+                elif kind == DEFERRED:
+                    deferred.append((job_id, url, response["error"], retry_after))
+                else:
+                    failures.append((job_id, url, response["error"]))
+                    if retry_after:
+                        delays[job_id] = retry_after
+            else:
+                page = {**response, "job_id": job_id}
+                raw_hash = _archive_blob(response["content"])
+                if raw_hash:
+                    del page["content"]
+                    page["raw_hash"] = raw_hash
+                if docs[job_id].crawl_depth is not None:
+                    page["crawl"] = [docs[job_id].batch_id, docs[job_id].crawl_depth]
+                pages.append(page)
+        # Client errors, aborted downloads and robots.txt refusals would
+        # repeat on every retry
+        _record_failures(db, docs, permanent, retry=False)
+        _record_failures(db, docs, failures, retry_after=delays)
+        _defer_jobs(db, docs, deferred)
+    logger.info(f"Fetched {len(pages)} of {len(jobs)} pages")
+    return pages
+
+
+@celery_app.task(name="extract_pages", ignore_result=True)
+def extract_pages(pages: List[Dict]) -> List[Dict]:
+    """
+    Extract text and title from fetched pages
+
+    Returns:
+        Extracted documents (title, url, validators) with their job_id, the
+        archive key of the raw page and that of the extracted text,
+        content_hash, which stands in for the text unless archiving is
+        disabled or failed
+    """
+    documents, failures, permanent, timings = [], [], [], {}
+    for page in pages:
+        start = time.perf_counter()
+        crawl = page.get("crawl")
+        links = []
         try:
-            doc = db.query(URLDocument).filter(URLDocument.job_id == job_id).first()
-            if not doc:
-                logger.error(f"Job {job_id} not found in database")
-                return
+            page = _unarchived(page, "raw_hash")
+            document = scraper.extract_page(page, links=crawl is not None)
+            links = document.pop("links", [])
+            document["raw_hash"] = page.get("raw_hash") or _archive_blob(page["content"])
+            content_hash = _archive_blob(document["content"])
+            if content_hash:
+                del document["content"]
+                document["content_hash"] = content_hash
+            documents.append({**document, "job_id": page["job_id"]})
+        except InsufficientContent as e:
+            # Link hubs are not worth indexing but still lead somewhere
+            links = e.links
+            permanent.append((page["job_id"], page["url"], str(e)))
+        except ValueError as e:
+            # Unparseable page; refetching returns the same bytes
+            permanent.append((page["job_id"], page["url"], str(e)))
+        except Exception as e:
+            failures.append((page["job_id"], page["url"], str(e)))
+        timings[page["job_id"]] = int((time.perf_counter() - start) * 1000)
+        if links:
+            _follow_links(*crawl, links)
+
+    with get_db_context() as db:
+        docs = _load_docs(db, list(timings))
+        for job_id, elapsed_ms in timings.items():
+            if job_id in docs:
+                docs[job_id].extract_time_ms = elapsed_ms
+        _record_failures(db, docs, permanent, retry=False)
+        _record_failures(db, docs, failures)
+    return documents
+
+
+@celery_app.task(name="index_pages")
+def index_pages(documents: List[Dict]):
+    """
+    Embed and upsert extracted documents, then mark their jobs completed
+
+    The documents share embedding requests, so each row records the time of
+    the whole batch as its index time.
+    """
+    if not documents:
+        return
+    with get_db_context() as db:
+        docs = _load_docs(db, [document["job_id"] for document in documents])
+        loaded, missing = [], []
+        for document in documents:
+            try:
+                loaded.append(_unarchived(document, "content_hash"))
+            except Exception as e:
+                missing.append((document["job_id"], document["url"], str(e)))
+        # Re-extracted on retry
+        _record_failures(db, docs, missing)
+        documents = loaded
+        if not documents:
+            return
+        start = time.perf_counter()
+        try:
+            counts = vector_store_manager.add_documents([
+                {
+                    "content": document["content"],
+                    "job_id": document["job_id"],
+                    "url": document["url"],
+                    "title": document["title"],
+                }
+                for document in documents
+            ])
+        except Exception as e:
+            logger.error(f"Error adding batch to vector store: {e}")
+            _record_failures(db, docs, [
+                (document["job_id"], document["url"], str(e)) for document in documents
+            ])
+            return
+        elapsed_ms = int((time.perf_counter() - start) * 1000)
+
+        for document, num_chunks in zip(documents, counts):
+            doc = docs.get(document["job_id"])
+            if doc is None:
+                continue
+            doc.status = IngestionStatus.COMPLETED
+            doc.title = document["title"]
+            doc.content_hash = hashlib.sha256(document["content"].encode("utf-8")).hexdigest()
+            doc.num_chunks = num_chunks
+            doc.raw_hash = document.get("raw_hash")
+            doc.etag = document.get("etag")
+            doc.last_modified = document.get("last_modified")
+            doc.last_fetched_at = func.now()
+            doc.completed_at = func.now()
+            doc.error_message = None
+            doc.index_time_ms = elapsed_ms
+        db.commit()
+    logger.info(f"Indexed {len(documents)} documents in {elapsed_ms} ms")
+
+
+# Entry points queued before ingestion was split into stages
+@celery_app.task(name="process_url")
+def process_url(job_id: str, url: str):
+    ingest_pipeline([(job_id, url)]).apply_async()
 
-            doc.status = IngestionStatus.PROCESSING
-            db.commit()
 
-            logger.info(f"Scraping URL: {url}")
-            scraped_data = scraper.scrape_url(url)
+@celery_app.task(name="process_urls")
+def process_urls(jobs: List[Tuple[str, str]]):
+    ingest_pipeline(jobs).apply_async()
+
+
+@celery_app.task(name="refresh_url", bind=True, max_retries=3)
+def refresh_url(self, job_id: str):
+    """
+    Re-crawl an ingested URL, paying only for what changed
+
+    The fetch is conditional on the stored ETag/Last-Modified; an unchanged
+    page (304 or identical content hash) costs one request. Otherwise only
+    new chunks are embedded and vanished chunks are removed.
+    """
+    with get_db_context() as db:
+        doc = db.query(URLDocument).filter(URLDocument.job_id == job_id).first()
+        if not doc:
+            logger.error(f"Job {job_id} not found in database")
+            return
+        try:
+            scraped_data = scraper.scrape_url(
+                doc.url, etag=doc.etag, last_modified=doc.last_modified
+            )
+            doc.last_fetched_at = func.now()
+            if scraped_data.get("not_modified"):
+                db.commit()
+                return
+
             content = scraped_data["content"]
-            title = scraped_data["title"]
             content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
-            logger.info(f"Adding to vector store: {url}")
-            num_chunks = vector_store_manager.add_document(
+            doc.raw_hash = _archive_page(scraped_data["html"], content) or doc.raw_hash
+            doc.etag = scraped_data.get("etag")
+            doc.last_modified = scraped_data.get("last_modified")
+            if content_hash == doc.content_hash:
+                logger.info(f"Content unchanged: {doc.url}")
+                db.commit()
+                return
+
+            doc.num_chunks = vector_store_manager.refresh_document(
                 content=content,
                 job_id=job_id,
-                url=url,
-                title=title,
+                url=doc.url,
+                title=scraped_data["title"],
             )
-
-            doc.status = IngestionStatus.COMPLETED
-            doc.title = title
+            doc.title = scraped_data["title"]
             doc.content_hash = content_hash
-            doc.num_chunks = num_chunks
             doc.completed_at = func.now()
             doc.error_message = None
             db.commit()
-            logger.info(f"Job {job_id} completed successfully")
+            logger.info(f"Refreshed job {job_id}")
 
         except Exception as e:
-            logger.error(f"Error processing job {job_id}: {e}")
-            doc = db.query(URLDocument).filter(URLDocument.job_id == job_id).first()
-            if doc:
-                doc.status = IngestionStatus.FAILED
-                doc.error_message = str(e)
-                doc.retry_count += 1
-                db.commit()
+            # Extraction errors (too little text, unparseable page) repeat too
+            kind, retry_after = (PERMANENT, None) if isinstance(e, ValueError) else classify_error(e)
+            if kind == DEFERRED:
+                logger.info(f"Refresh of job {job_id} deferred: {e}")
+                wait = max(1.0, retry_after or 0)
+                refresh_url.apply_async(
+                    (job_id,),
+                    countdown=wait + random.uniform(0, wait),
+                    retries=self.request.retries,
+                )
+                return
+            logger.error(f"Error refreshing job {job_id}: {e}")
+            # refresh_document stores the new version before unlinking the
+            # old one, so the previous version is still indexed and the row
+            # keeps its status
+            doc.error_message = f"Refresh failed: {e}"
+            db.commit()
+            if kind == TRANSIENT and self.request.retries < self.max_retries:
+                self.retry(
+                    exc=e, countdown=_retry_delay(self.request.retries + 1, retry_after)
+                )
+
+
+@celery_app.task(name="refresh_documents")
+def refresh_documents():
+    """Queue refresh_url for every completed document (nightly recrawl)"""
+    with get_db_context() as db:
+        job_ids = [
+            job_id for (job_id,) in db.query(URLDocument.job_id).filter(
+                URLDocument.status == IngestionStatus.COMPLETED
+            )
+        ]
+    chunk_size = settings.bulk_dispatch_chunk_size
+    for i in range(0, len(job_ids), chunk_size):
+        group(refresh_url.s(job_id) for job_id in job_ids[i:i + chunk_size]).apply_async()
+    logger.info(f"Queued refresh for {len(job_ids)} documents")
+    return len(job_ids)
+
+
+def dispatch_jobs(jobs: List[Tuple[str, str]]):
+    """
+    Queue processing for many (job_id, url) pairs
+
+    Jobs are packed bulk_task_size per ingestion pipeline and published as
+    Celery groups of bulk_dispatch_chunk_size jobs, so a large batch costs a
+    handful of broker round trips instead of one per URL.
+    """
+    tasks = [
+        ingest_pipeline(jobs[i:i + settings.bulk_task_size])
+        for i in range(0, len(jobs), settings.bulk_task_size)
+    ]
+    tasks_per_group = max(1, settings.bulk_dispatch_chunk_size // settings.bulk_task_size)
+    for i in range(0, len(tasks), tasks_per_group):
+        group(tasks[i:i + tasks_per_group]).apply_async()
+    logger.info(f"Dispatched {len(jobs)} jobs in {len(tasks)} tasks")
 
-            if self.request.retries < self.max_retries:
-                self.retry(exc=e, countdown=60 * (self.request.retries + 1))
+
+@celery_app.task(name="start_crawl")
+def start_crawl(crawl_id: str):
+    """Seed a crawl's frontier from its start page or sitemap, then start dispatching"""
+    with get_db_context() as db:
+        crawl = db.query(CrawlJob).filter(CrawlJob.crawl_id == crawl_id).first()
+        if crawl is None:
+            logger.error(f"Crawl {crawl_id} not found in database")
+            return
+        frontier = CrawlFrontier(crawl_id)
+        try:
+            frontier.configure(crawl.domains.split(","), crawl.max_depth, crawl.max_pages)
+            if crawl.is_sitemap:
+                seeded = read_sitemaps(frontier, crawl.seed_url)
             else:
-                logger.error(f"Max retries reached for job {job_id}")
+                seeded = frontier.push([crawl.seed_url], 0)
+            if not seeded:
+                raise ValueError("No crawlable URLs in scope")
+        except Exception as e:
+            logger.error(f"Error starting crawl {crawl_id}: {e}")
+            crawl.status = CrawlStatus.FAILED
+            crawl.error_message = str(e)
+            crawl.completed_at = func.now()
+            db.commit()
+            frontier.delete()
+            return
+        crawl.pages_discovered = seeded
+        db.commit()
+    logger.info(f"Crawl {crawl_id} seeded with {seeded} URLs")
+    crawl_step.delay(crawl_id)
+
+
+def _enqueue_crawl_pages(
+    db,
+    crawl_id: str,
+    pages: List[Tuple[str, int]],
+    frontier: CrawlFrontier
+) -> int:
+    """
+    Create url_documents rows for (url, depth) pairs popped from the frontier
+    and dispatch them
+
+    URLs already ingested or in flight elsewhere are not fetched again, but the
+    links of completed ones are followed from their archived page. Failed
+    URLs are retried on their existing row, which joins this crawl.
+    """
+    existing, failed = {}, {}
+    for row_id, url, status, raw_hash in db.query(
+        URLDocument.id, URLDocument.url, URLDocument.status, URLDocument.raw_hash
+    ).filter(URLDocument.url.in_([url for url, _ in pages])):
+        if status == IngestionStatus.FAILED:
+            failed.setdefault(url, row_id)
+        else:
+            existing[url] = (status, raw_hash)
+    rows, retried, jobs = [], [], []
+    for url, depth in pages:
+        if url in failed and url not in existing:
+            retried.append({
+                "id": failed[url],
+                "batch_id": crawl_id,
+                "status": IngestionStatus.PENDING,
+                "retry_count": 0,
+                "error_message": None,
+                "crawl_depth": depth,
+            })
+            continue
+        if url not in existing:
+            job_id = str(uuid.uuid4())
+            rows.append({
+                "job_id": job_id,
+                "batch_id": crawl_id,
+                "url": url,
+                "status": IngestionStatus.PENDING,
+                "retry_count": 0,
+                "num_chunks": 0,
+                "crawl_depth": depth,
+            })
+            jobs.append((job_id, url))
+            continue
+        status, raw_hash = existing[url]
+        if status != IngestionStatus.COMPLETED or not raw_hash:
+            continue
+        html = page_archive.get_text(raw_hash)
+        if html is not None:
+            frontier.push(scraper.extract_links(url, html), depth + 1)
+    if retried:
+        db.execute(update(URLDocument), retried)
+        jobs.extend(
+            db.query(URLDocument.job_id, URLDocument.url).filter(
+                URLDocument.id.in_([row["id"] for row in retried])
+            )
+        )
+    if rows:
+        db.execute(insert(URLDocument), rows)
+    if jobs:
+        db.commit()
+        dispatch_jobs([tuple(job) for job in jobs])
+    return len(jobs)
+
+
+@celery_app.task(name="crawl_step", ignore_result=True)
+def crawl_step(crawl_id: str):
+    """
+    Top a crawl's in-flight pages up to its concurrency from the frontier
+
+    Runs again every crawl_poll_interval seconds, until the frontier is empty
+    and no page of the crawl is pending or processing, or the crawl is
+    cancelled. Counting in-flight pages in url_documents, rather than
+    tracking completions, keeps the bound right when workers die mid-task.
+    """
+    frontier = CrawlFrontier(crawl_id)
+    with get_db_context() as db:
+        crawl = db.query(CrawlJob).filter(CrawlJob.crawl_id == crawl_id).first()
+        if crawl is None or crawl.status != CrawlStatus.RUNNING:
+            frontier.delete()
+            return
+        in_flight = db.query(func.count(URLDocument.id)).filter(
+            URLDocument.batch_id == crawl_id,
+            URLDocument.status.in_([IngestionStatus.PENDING, IngestionStatus.PROCESSING]),
+        ).scalar()
+        pages = frontier.pop(crawl.concurrency - in_flight)
+        if pages:
+            crawl.pages_queued = (crawl.pages_queued or 0) + _enqueue_crawl_pages(
+                db, crawl_id, pages, frontier
+            )
+        crawl.pages_discovered = frontier.discovered()
+        if not pages and not in_flight and not frontier.pending():
+            crawl.status = CrawlStatus.COMPLETED
+            crawl.completed_at = func.now()
+            db.commit()
+            frontier.delete()
+            logger.info(f"Crawl {crawl_id} completed: {crawl.pages_queued} pages queued")
+            return
+        db.commit()
+    crawl_step.apply_async((crawl_id,), countdown=settings.crawl_poll_interval)
+
+
+# Long-running by design; an interrupted run resumes where it stopped
+@celery_app.task(name="migrate_collection", time_limit=24 * 3600, soft_time_limit=24 * 3600 - 60)
+def migrate_collection(name: str = None):
+    """
+    Build the collection registered for the configured embedding model and
+    switch the alias to it. Without a name, a new build is registered first
+    (also retrying a failed one).
+    """
+    if name is None:
+        # start_migration queues this task again with the new name
+        vector_store_manager.start_migration(force=True)
+        return
+    vector_store_manager.migrate_collection(name)
+
+
+def _from_archive(row: Tuple[str, str, str, str, str], reextract: bool) -> Dict:
+    """Document rebuilt from the archive; "error" is set when that is not possible"""
+    job_id, url, title, content_hash, raw_hash = row
+    document = {"job_id": job_id, "url": url, "title": title}
+    if not reextract:
+        content = page_archive.get_text(content_hash) if content_hash else None
+        if content is None:
+            return {**document, "error": "extracted text is not archived"}
+        return {**document, "content": content}
+
+    html = page_archive.get_text(raw_hash) if raw_hash else None
+    if html is None:
+        return {**document, "error": "raw page is not archived"}
+    try:
+        extracted = scraper.extract_html(url, html)
+    except ValueError as e:
+        return {**document, "error": str(e)}
+    if settings.archive_enabled:
+        page_archive.put(extracted["content"])
+    return {**document, "content": extracted["content"], "title": extracted["title"]}
+
+
+@celery_app.task(name="reprocess_archive", time_limit=24 * 3600, soft_time_limit=24 * 3600 - 60)
+def reprocess_archive(reextract: bool = False) -> Dict[str, int]:
+    """
+    Re-chunk and re-embed every completed document from the page archive
+
+    Picks up chunking and embedding settings without refetching anything;
+    with reextract the archived raw pages are run through extraction again
+    as well. Archive reads and extraction run ahead of embedding in a
+    background thread. Only new chunks are embedded, so an interrupted run
+    can simply be started again. Documents without archived pages are
+    skipped and keep their current vectors. So do documents that fail to
+    reindex, which are retried one at a time and get the error recorded on
+    their row.
+    """
+    with get_db_context() as db:
+        rows = db.query(
+            URLDocument.job_id,
+            URLDocument.url,
+            URLDocument.title,
+            URLDocument.content_hash,
+            URLDocument.raw_hash,
+        ).filter(
+            URLDocument.status == IngestionStatus.COMPLETED
+        ).order_by(URLDocument.id).all()
+    logger.info(f"Reprocessing {len(rows)} documents from the archive")
+
+    documents = prefetch(
+        (_from_archive(row, reextract) for row in rows),
+        settings.reprocess_batch_size
+    )
+    summary = {"reprocessed": 0, "skipped": 0, "failed": 0}
+    for batch in batched(documents, settings.reprocess_batch_size):
+        ready = []
+        for document in batch:
+            if "error" in document:
+                logger.warning(f"Skipping {document['url']}: {document['error']}")
+                summary["skipped"] += 1
+            else:
+                ready.append(document)
+        if not ready:
+            continue
+        errors = {}
+        try:
+            counts = vector_store_manager.reindex_documents(ready)
+        except Exception as e:
+            # Find the documents that fail on their own, so one bad page
+            # does not hold back the rest of its batch
+            logger.error(f"Error reprocessing batch, retrying one at a time: {e}")
+            counts = []
+            for document in ready:
+                try:
+                    counts.extend(vector_store_manager.reindex_documents([document]))
+                except Exception as e:
+                    logger.error(f"Error reprocessing {document['url']}: {e}")
+                    errors[document["job_id"]] = str(e)
+                    counts.append(None)
+
+        with get_db_context() as db:
+            docs = _load_docs(db, [document["job_id"] for document in ready])
+            for document, num_chunks in zip(ready, counts):
+                doc = docs.get(document["job_id"])
+                if doc is None:
+                    continue
+                if num_chunks is None:
+                    # The previous version stays indexed, so the row keeps its status
+                    doc.error_message = f"Reprocess failed: {errors[document['job_id']]}"
+                    continue
+                doc.num_chunks = num_chunks
+                doc.title = document["title"]
+                doc.error_message = None
+                if reextract:
+                    doc.content_hash = hashlib.sha256(
+                        document["content"].encode("utf-8")
+                    ).hexdigest()
+            db.commit()
+        summary["failed"] += len(errors)
+        summary["reprocessed"] += len(ready) - len(errors)
+        logger.info(f"Reprocessed {summary['reprocessed']} of {len(rows)} documents")
+    return summary
 
 
 @celery_app.task(name="cleanup_failed_jobs")
@@ -0,0 +1,163 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.utils.embedding_batcher import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Shorter prefix/suffix matches are treated as coincidence, not chunk overlap
+MIN_OVERLAP_CHARS = 20
+
+
+def mmr_select(
+    query_vector: List[float],
+    candidate_vectors: List[List[float]],
+    k: int,
+    lambda_mult: float
+) -> List[int]:
+    """
+    Maximal marginal relevance over cosine similarity
+
+    Returns candidate positions in selection order. Each step scores every
+    remaining candidate at once against the running maximum similarity to
+    the already selected set.
+    """
+    if not candidate_vectors:
+        return []
+    candidates = np.asarray(candidate_vectors, dtype=np.float32)
+    candidates /= np.linalg.norm(candidates, axis=1, keepdims=True) + 1e-12
+    query = np.asarray(query_vector, dtype=np.float32)
+    query /= np.linalg.norm(query) + 1e-12
+
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+    redundancy = np.full(len(candidates), -np.inf, dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+
+    selected = []
+    for _ in range(min(k, len(candidates))):
+        if selected:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        else:
+            scores = relevance.copy()
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+    return selected
+
+
+def _join(previous: Dict, following: Dict) -> Dict:
+    """Concatenate neighbouring chunks, dropping the splitter's overlap"""
+    text, extra = previous["page_content"], following["page_content"]
+    end, start = previous["metadata"].get("char_end"), following["metadata"].get("char_start")
+    if end is not None and start is not None:
+        # Character offsets give the exact overlap (or gap) between the two
+        overlap = end - start
+        if overlap > 0:
+            joined = text + extra[overlap:]
+        else:
+            joined = f"{text} {extra}"
+    else:
+        # Points indexed before offsets were stored: find the overlap by text
+        longest = min(len(text), len(extra), settings.chunk_overlap)
+        for size in range(longest, MIN_OVERLAP_CHARS - 1, -1):
+            if text.endswith(extra[:size]):
+                joined = text + extra[size:]
+                break
+        else:
+            joined = f"{text} {extra}"
+    return {
+        "page_content": joined,
+        "metadata": {**previous["metadata"], "char_end": following["metadata"].get("char_end")},
+    }
+
+
+def merge_adjacent(results: List[Tuple[Dict, float]]) -> List[Tuple[Dict, float]]:
+    """
+    Merge consecutive chunk_index hits from the same document version into one passage
+
+    Chunk indexes and offsets are only comparable within one version of a
+    page, so hits are grouped by source and content_hash; hits without a
+    content_hash are never merged. Passages keep the rank of their best
+    chunk and list the merged indexes under metadata["chunk_indexes"].
+    """
+    by_version: Dict[Tuple, List[Tuple[int, Dict, float]]] = {}
+    for rank, (doc, score) in enumerate(results):
+        metadata = doc["metadata"]
+        content_hash = metadata.get("content_hash")
+        key = (metadata["source"], content_hash) if content_hash else (metadata["source"], rank)
+        by_version.setdefault(key, []).append((rank, doc, score))
+
+    passages = []
+    for hits in by_version.values():
+        hits.sort(key=lambda hit: hit[1]["metadata"]["chunk_index"])
+        run = [hits[0]]
+        for hit in hits[1:]:
+            if hit[1]["metadata"]["chunk_index"] == run[-1][1]["metadata"]["chunk_index"] + 1:
+                run.append(hit)
+            else:
+                passages.append(run)
+                run = [hit]
+        passages.append(run)
+
+    merged = []
+    for run in passages:
+        passage = run[0][1]
+        for _, neighbour, _ in run[1:]:
+            passage = _join(passage, neighbour)
+        passage = {
+            "page_content": passage["page_content"],
+            "metadata": {
+                **passage["metadata"],
+                "chunk_indexes": [hit[1]["metadata"]["chunk_index"] for hit in run],
+            },
+        }
+        best_rank = min(hit[0] for hit in run)
+        merged.append((best_rank, passage, max(hit[2] for hit in run)))
+    merged.sort(key=lambda passage: passage[0])
+    return [(doc, score) for _, doc, score in merged]
+
+
+def build_context(
+    results: List[Tuple[Dict, float]],
+    query_vector: Optional[List[float]],
+    k: int = None,
+    max_tokens: int = None
+) -> List[Tuple[Dict, float]]:
+    """
+    Turn retrieval candidates into the passages sent to the LLM
+
+    Candidates are diversified with MMR when they carry vectors, then taken
+    in selection order until the token budget is spent, and finally merged
+    with their neighbours. Vectors are dropped from the returned documents.
+    """
+    k = k or settings.top_k_results
+    max_tokens = max_tokens or settings.context_max_tokens
+
+    vectors = [doc.get("vector") for doc, _ in results]
+    if settings.context_mmr_enabled and query_vector is not None and all(vectors):
+        order = mmr_select(query_vector, vectors, k, settings.context_mmr_lambda)
+    else:
+        order = range(min(k, len(results)))
+
+    selected = []
+    used_tokens = 0
+    for position in order:
+        doc, score = results[position]
+        tokens = estimate_tokens(doc["page_content"])
+        if selected and used_tokens + tokens > max_tokens:
+            continue
+        used_tokens += tokens
+        selected.append(({key: value for key, value in doc.items() if key != "vector"}, score))
+
+    passages = merge_adjacent(selected)
+    logger.info(
+        f"Context: {len(results)} candidates -> {len(selected)} chunks -> "
+        f"{len(passages)} passages (~{used_tokens} tokens)"
+    )
+    return passages
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CORPUS_EVENTS_CHANNEL = "corpus:events"
+
+_publisher: Optional[redis.Redis] = None
+
+
+def _publish(event: Dict):
+    global _publisher
+    try:
+        if _publisher is None:
+            _publisher = redis.Redis.from_url(settings.redis_url)
+        _publisher.publish(CORPUS_EVENTS_CHANNEL, json.dumps(event))
+    except redis.RedisError as e:
+        # The periodic refresh will catch up
+        logger.warning(f"Failed to publish corpus event: {e}")
+
+
+def publish_corpus_change(delta: int):
+    """Tell every API process that points were added (+) or removed (-)"""
+    if delta:
+        _publish({"delta": delta})
+
+
+def publish_collection_switch(collection_name: str):
+    """Tell every API process that the alias now points to another collection"""
+    _publish({"delta": 0, "collection": collection_name})
+
+
+class CorpusState:
+    """
+    In-process view of the vector store size.
+
+    Reads never touch the network: the count is refreshed from the
+    collection's points_count in the background and adjusted incrementally
+    from ingest/delete events published over Redis. An exact count only runs
+    every corpus_state_reconcile_interval. If the background refresh stalls
+    for longer than corpus_state_max_staleness, the next read refreshes
+    synchronously.
+    """
+
+    def __init__(self):
+        self.total_documents: Optional[int] = None
+        self.refreshed_at = 0.0
+        self.reconciled_at: Optional[float] = None
+        # Bumped on every observed change so dependent caches can invalidate
+        self.version = 0
+        self._tasks = []
+
+    def snapshot(self) -> Dict:
+        return {
+            "total_documents": self.total_documents or 0,
+            "collection_name": settings.qdrant_collection_name,
+            "qdrant_url": settings.qdrant_url,
+            "age_seconds": round(time.monotonic() - self.refreshed_at, 1),
+        }
+
+    def is_fresh(self) -> bool:
+        return (
+            self.total_documents is not None
+            and time.monotonic() - self.refreshed_at <= settings.corpus_state_max_staleness
+        )
+
+    def apply_delta(self, delta: int):
+        self.version += 1
+        if self.total_documents is not None:
+            self.total_documents = max(0, self.total_documents + delta)
+
+    def handle_event(self, event: Dict):
+        if event.get("collection"):
+            from app.services.vector_store import vector_store_manager
+
+            # Re-resolve the embedding model before the next query
+            vector_store_manager.invalidate()
+            self.total_documents = None
+            self.reconciled_at = None
+        self.apply_delta(event["delta"])
+
+    async def refresh(self):
+        from app.services.vector_store import vector_store_manager
+
+        now = time.monotonic()
+        exact = (
+            self.reconciled_at is None
+            or now - self.reconciled_at >= settings.corpus_state_reconcile_interval
+        )
+        try:
+            total = await vector_store_manager.acount(exact=exact)
+            if total != self.total_documents:
+                self.version += 1
+            self.total_documents = total
+            self.refreshed_at = now
+            if exact:
+                self.reconciled_at = now
+        except Exception as e:
+            logger.error(f"Error refreshing corpus state: {e}")
+
+    async def get(self) -> Dict:
+        """Current corpus stats; only does I/O when the snapshot is too old"""
+        if not self.is_fresh():
+            await self.refresh()
+        return self.snapshot()
+
+    async def _refresh_loop(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(settings.corpus_state_refresh_interval)
+
+    async def _listen(self):
+        while True:
+            client = pubsub = None
+            try:
+                client = aioredis.Redis.from_url(settings.redis_url)
+                pubsub = client.pubsub()
+                await pubsub.subscribe(CORPUS_EVENTS_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.handle_event(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Corpus event listener error: {e}")
+            finally:
+                # Each attempt opens its own connections; release them
+                # before reconnecting so retries do not leak them
+                await self._close(client, pubsub)
+            await asyncio.sleep(5)
+
+    @staticmethod
+    async def _close(client, pubsub):
+        try:
+            if pubsub is not None:
+                await pubsub.aclose()
+            if client is not None:
+                await client.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close corpus event connection: {e}")
+
+    async def start(self):
+        self._tasks = [
+            asyncio.create_task(self._refresh_loop()),
+            asyncio.create_task(self._listen()),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+corpus_state = CorpusState()
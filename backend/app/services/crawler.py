@@ -0,0 +1,236 @@
+import html
+import logging
+import posixpath
+import re
+from collections import deque
+from typing import Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import redis
+
+from app.config import settings
+from app.utils.bloom import BloomFilter
+from app.utils.fetcher import fetcher
+from app.utils.pipeline import batched
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Links that never lead to an HTML page worth indexing
+SKIPPED_EXTENSIONS = frozenset((
+    ".7z", ".avi", ".css", ".csv", ".dmg", ".doc", ".docx", ".exe", ".gif", ".gz",
+    ".ico", ".iso", ".jpeg", ".jpg", ".js", ".json", ".mov", ".mp3", ".mp4", ".pdf",
+    ".png", ".ppt", ".pptx", ".rar", ".svg", ".tar", ".tgz", ".wav", ".webm", ".webp",
+    ".woff", ".woff2", ".xls", ".xlsx", ".xml", ".zip",
+))
+
+SITEMAP_CONTENT_TYPES = frozenset((
+    "application/xml", "text/xml", "application/rss+xml", "application/atom+xml", "text/plain",
+))
+# The sitemap protocol caps a single file at 50 MB uncompressed
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+SITEMAP_LOC = re.compile(r"<loc>\s*(.*?)\s*</loc>", re.IGNORECASE | re.DOTALL)
+
+_redis: Optional[redis.Redis] = None
+
+
+def _get_redis() -> redis.Redis:
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(settings.redis_url)
+    return _redis
+
+
+def normalize_url(url: str) -> Optional[str]:
+    """
+    Canonical form used for deduplication, or None for non-HTTP URLs
+
+    Lowercases scheme and host, drops default ports, fragments and dot
+    segments, and sorts query parameters, so equivalent spellings of a page
+    map to one seen-set entry.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+    netloc = parts.hostname.lower()
+    if ":" in netloc:
+        netloc = f"[{netloc}]"
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+    path = parts.path or "/"
+    if "/." in path:
+        trailing = path.endswith(("/", "/.", "/.."))
+        # normpath keeps a leading "//"
+        path = "/" + posixpath.normpath(path).lstrip("/")
+        if trailing and path != "/":
+            path += "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def in_scope(url: str, domains: Sequence[str]) -> bool:
+    """Whether the URL's host is one of domains or a subdomain of one"""
+    host = urlsplit(url).hostname or ""
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+def parse_sitemap(body: str) -> Tuple[List[str], bool]:
+    """
+    URLs listed in a sitemap, and whether it is a sitemap index
+
+    Handles <urlset> and <sitemapindex> documents as well as plain-text
+    sitemaps with one URL per line. <loc> values are matched directly
+    instead of parsing the XML, so malformed files still yield their URLs.
+    """
+    if "<" not in body:
+        return [line.strip() for line in body.splitlines() if line.strip()], False
+    urls = [html.unescape(loc) for loc in SITEMAP_LOC.findall(body)]
+    return urls, "<sitemapindex" in body[:4096].lower()
+
+
+class CrawlFrontier:
+    """
+    BFS frontier and seen-set of one crawl, shared through Redis
+
+    Keys under crawl:{crawl_id}: "config" holds the scope, "queue" is a FIFO
+    list of "depth url" entries (so pages are crawled level by level),
+    "seen" is a Bloom filter sized for max_pages and "discovered" counts
+    URLs admitted to the queue. Once max_pages URLs have been admitted,
+    further links are dropped, which bounds both the queue and the filter.
+    Every key expires crawl_state_ttl_seconds after the last write.
+    """
+
+    def __init__(self, crawl_id: str, client: Optional[redis.Redis] = None):
+        self.crawl_id = crawl_id
+        self.client = client or _get_redis()
+        self.prefix = f"crawl:{crawl_id}"
+        self._config: Optional[dict] = None
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}:{name}"
+
+    def configure(self, domains: Sequence[str], max_depth: int, max_pages: int):
+        self._config = {
+            "domains": ",".join(domain.lower() for domain in domains),
+            "max_depth": str(max_depth),
+            "max_pages": str(max_pages),
+        }
+        self.client.hset(self._key("config"), mapping=self._config)
+        self.client.expire(self._key("config"), settings.crawl_state_ttl_seconds)
+
+    @property
+    def config(self) -> Optional[dict]:
+        if self._config is None:
+            raw = self.client.hgetall(self._key("config"))
+            if raw:
+                self._config = {key.decode(): value.decode() for key, value in raw.items()}
+        return self._config
+
+    def push(self, urls: Iterable[str], depth: int) -> int:
+        """
+        Queue in-scope, unseen URLs discovered at depth
+
+        Returns:
+            Number of URLs added to the queue
+        """
+        config = self.config
+        if config is None:
+            # Finished, cancelled or expired crawl
+            return 0
+        max_pages = int(config["max_pages"])
+        if depth > int(config["max_depth"]) or self.discovered() >= max_pages:
+            return 0
+        domains = config["domains"].split(",")
+
+        candidates = []
+        for url in urls:
+            url = normalize_url(url)
+            if url is None or not in_scope(url, domains):
+                continue
+            extension = posixpath.splitext(urlsplit(url).path)[1].lower()
+            if extension not in SKIPPED_EXTENSIONS:
+                candidates.append(url)
+        if not candidates:
+            return 0
+
+        seen = BloomFilter(
+            self.client, self._key("seen"), max_pages, settings.crawl_seen_error_rate
+        )
+        new = [url for url, added in zip(candidates, seen.add_many(candidates)) if added]
+        if not new:
+            return 0
+        discovered = self.client.incrby(self._key("discovered"), len(new))
+        room = len(new) - max(0, discovered - max_pages)
+        if room <= 0:
+            return 0
+        pipe = self.client.pipeline(transaction=False)
+        pipe.rpush(self._key("queue"), *(f"{depth} {url}" for url in new[:room]))
+        for name in ("seen", "discovered", "queue", "config"):
+            pipe.expire(self._key(name), settings.crawl_state_ttl_seconds)
+        pipe.execute()
+        return room
+
+    def pop(self, count: int) -> List[Tuple[str, int]]:
+        """Up to count (url, depth) pairs from the front of the queue"""
+        if count <= 0:
+            return []
+        entries = self.client.lpop(self._key("queue"), count) or []
+        popped = []
+        for entry in entries:
+            depth, url = entry.decode().split(" ", 1)
+            popped.append((url, int(depth)))
+        return popped
+
+    def pending(self) -> int:
+        return self.client.llen(self._key("queue"))
+
+    def discovered(self) -> int:
+        return int(self.client.get(self._key("discovered")) or 0)
+
+    def delete(self):
+        self.client.delete(*(self._key(name) for name in ("config", "queue", "seen", "discovered")))
+        self._config = None
+
+
+def read_sitemaps(frontier: CrawlFrontier, url: str) -> int:
+    """
+    Seed a frontier at depth 0 with the pages listed in a sitemap
+
+    Sitemap indexes are followed breadth first, up to crawl_max_sitemaps
+    files, stopping early once the crawl's page budget is used up. Child
+    sitemaps that cannot be fetched are skipped; the seed sitemap failing
+    raises.
+
+    Returns:
+        Number of URLs added to the frontier
+    """
+    sitemaps = deque([url])
+    read = added = 0
+    while sitemaps and read < settings.crawl_max_sitemaps:
+        sitemap = sitemaps.popleft()
+        read += 1
+        try:
+            response = fetcher.fetch(
+                sitemap, content_types=SITEMAP_CONTENT_TYPES, max_bytes=SITEMAP_MAX_BYTES
+            )
+        except Exception as e:
+            if sitemap == url:
+                raise
+            logger.warning(f"Skipping sitemap {sitemap}: {e}")
+            continue
+        urls, is_index = parse_sitemap(response["content"])
+        if is_index:
+            sitemaps.extend(urls)
+            continue
+        for batch in batched(urls, 5000):
+            added += frontier.push(batch, 0)
+        if frontier.discovered() >= int(frontier.config["max_pages"]):
+            break
+    logger.info(f"Read {read} sitemaps from {url}: {added} URLs")
+    return added
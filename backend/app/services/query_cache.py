@@ -0,0 +1,153 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.corpus_state import corpus_state
+
+logger = logging.getLogger(__name__)
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation"""
+    return _whitespace.sub(" ", query.strip().lower()).rstrip("?!. ")
+
+
+class QueryCache:
+    """
+    Per-process cache of retrieval results (and optionally generated answers).
+
+    Exact lookups use the normalized query text. The optional semantic tier
+    keeps each entry's query embedding in a fixed-size matrix and matches a
+    new query by cosine similarity above query_cache_similarity_threshold.
+    Entries are tagged with the corpus version from CorpusState, so any
+    ingestion or deletion invalidates them.
+    """
+
+    def __init__(self):
+        self.max_entries = settings.query_cache_max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Semantic tier: one unit-length row per slot, zero rows are free
+        self._vectors: Optional[np.ndarray] = None
+        self._slot_keys: List[Optional[str]] = [None] * self.max_entries
+        self._free_slots = list(range(self.max_entries - 1, -1, -1))
+        self.counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+    def _valid(self, entry: Dict) -> bool:
+        return (
+            entry["version"] == corpus_state.version
+            and time.monotonic() - entry["created_at"] <= settings.query_cache_ttl_seconds
+        )
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry["slot"] is not None:
+            self._vectors[entry["slot"]] = 0.0
+            self._slot_keys[entry["slot"]] = None
+            self._free_slots.append(entry["slot"])
+
+    def _clear(self):
+        self._entries.clear()
+        self._vectors = None
+        self._slot_keys = [None] * self.max_entries
+        self._free_slots = list(range(self.max_entries - 1, -1, -1))
+
+    def get(self, query: str) -> Optional[Dict]:
+        """Exact lookup by normalized query text"""
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not self._valid(entry):
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            self.counters["exact_hits"] += 1
+            return entry
+
+    def get_similar(self, embedding: List[float]) -> Optional[Dict]:
+        """Semantic lookup against cached query embeddings"""
+        with self._lock:
+            if self._vectors is None or not self._entries:
+                return None
+            if len(embedding) != self._vectors.shape[1]:
+                # Embedding model changed; entries are invalid by corpus version anyway
+                return None
+            query = np.asarray(embedding, dtype=np.float32)
+            query /= np.linalg.norm(query) or 1.0
+            scores = self._vectors @ query
+            slot = int(np.argmax(scores))
+            if scores[slot] < settings.query_cache_similarity_threshold:
+                return None
+            key = self._slot_keys[slot]
+            entry = self._entries[key]
+            if not self._valid(entry):
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            self.counters["semantic_hits"] += 1
+            return entry
+
+    def record_miss(self):
+        self.counters["misses"] += 1
+
+    def put(
+        self,
+        query: str,
+        results: List[Tuple[Dict, float]],
+        embedding: Optional[List[float]] = None
+    ) -> Dict:
+        """Cache retrieval results for a query"""
+        key = normalize_query(query)
+        with self._lock:
+            self._drop(key)
+            while len(self._entries) >= self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+            slot = None
+            if embedding is not None:
+                vector = np.asarray(embedding, dtype=np.float32)
+                if self._vectors is not None and self._vectors.shape[1] != len(vector):
+                    self._clear()
+                if self._vectors is None:
+                    self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+                slot = self._free_slots.pop()
+                self._vectors[slot] = vector / (np.linalg.norm(vector) or 1.0)
+                self._slot_keys[slot] = key
+
+            entry = {
+                "results": results,
+                "answers": {},
+                "version": corpus_state.version,
+                "created_at": time.monotonic(),
+                "slot": slot,
+            }
+            self._entries[key] = entry
+            return entry
+
+    def put_answer(self, entry: Dict, llm_model: str, answer: str):
+        """Attach a generated answer so identical questions can replay it"""
+        # Uncached (bypass) results carry no version
+        if settings.query_cache_store_answers and entry.get("version") == corpus_state.version:
+            entry["answers"][llm_model] = answer
+
+    def stats(self) -> Dict:
+        lookups = sum(self.counters.values())
+        hits = self.counters["exact_hits"] + self.counters["semantic_hits"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+query_cache = QueryCache()
@@ -1,84 +1,845 @@
-from typing import List, Tuple, Dict
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from typing import List, Optional, Tuple, Dict
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue,
+    SetPayload, SetPayloadOperation, MatchAny, PayloadSchemaType,
+    SparseVectorParams, SparseVector, Modifier, Prefetch, FusionQuery, Fusion,
+    HnswConfigDiff, VectorParamsDiff, CollectionParamsDiff, ScalarQuantization,
+    ScalarQuantizationConfig, ScalarType, BinaryQuantization, BinaryQuantizationConfig,
+    Disabled, SearchParams, QuantizationSearchParams, CreateAlias,
+    CreateAliasOperation, DeleteAlias, DeleteAliasOperation
+)
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from app.utils.chunk_locks import chunk_locks
+from app.utils.write_gate import write_gate
 from app.utils.embedding_client import EmbeddingClient
+from app.utils.pipeline import batched, prefetch
+from app.utils.text_chunker import Chunk, TextChunker
+from app.utils.sparse_encoder import encode_document, encode_query
+from app.services.corpus_state import publish_corpus_change, publish_collection_switch
+from app.database import get_db_context, AsyncSessionLocal
+from app.models.url_document import VectorCollection, VectorCollectionStatus
 from app.config import settings
+from contextlib import contextmanager
 import logging
 import hashlib
+import threading
+import time
 import uuid
 
 logger = logging.getLogger(__name__)
 
+# Point ids are UUIDv5 over the chunk text hash, so the same chunk always maps
+# to the same point no matter which document or retry produced it
+CHUNK_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "web-aware-rag-engine/chunk")
+
+# Keyword payload indexes used by dedup, deletion and scoped search. The list
+# fields hold every document that shares a chunk; the scalar ones the first.
+KEYWORD_INDEXES = [
+    "content_hash", "job_id", "source",
+    "content_hashes", "job_ids", "sources",
+]
+
+# Per-document fields of a chunk's payload: each list holds the value for
+# every document sharing the chunk, in link order, and the scalar mirrors the
+# first entry so a chunk always cites a document that still contains it
+LINK_FIELDS = {
+    "source": "sources",
+    "job_id": "job_ids",
+    "content_hash": "content_hashes",
+    "title": "titles",
+    "chunk_index": "chunk_indexes",
+    "char_start": "char_starts",
+    "char_end": "char_ends",
+}
+LINK_PAYLOAD = [*LINK_FIELDS, *LINK_FIELDS.values()]
+
+# Named sparse vector holding BM25 term weights; the dense vector stays unnamed
+SPARSE_VECTOR_NAME = "text"
+
+# Manifest entry for a pre-manifest collection whose model cannot be inferred
+UNKNOWN_MODEL = "unknown"
+
+# Wait before a migration that could not switch yet tries again
+MIGRATION_RETRY_DELAY = 60
+
+
+class CollectionChanged(RuntimeError):
+    """The live collection moved to another embedding model; the write must be redone"""
+
+
+def chunk_point_id(chunk_hash: str) -> str:
+    return str(uuid.uuid5(CHUNK_NAMESPACE, chunk_hash))
+
 
 class VectorStoreManager:
     """Manages Qdrant vector store for document embeddings"""
     
     def __init__(self):
+        # Clients and the collection are set up on first use, so importing
+        # this module costs no network calls
+        # Reads and writes go through this alias; see _ensure_collection
         self.collection_name = settings.qdrant_collection_name
-        self.embedding_client = EmbeddingClient()
-        
-        # Initialize Qdrant client
+        self._embedding_client = None
+        self._client = None
+        self._async_client = None
+        self._text_splitter = None
+        # Physical collection behind the alias and whether it carries sparse
+        # vectors; re-resolved every corpus_state_refresh_interval
+        self._live_collection: Optional[str] = None
+        self._live_checked_at = 0.0
+        self._hybrid: Optional[bool] = None
+        self._lock = threading.Lock()
+        self._resolver: Optional[int] = None
+
+    def _qdrant_kwargs(self) -> Dict:
         if settings.qdrant_api_key:
-            self.client = QdrantClient(
-                url=settings.qdrant_url,
-                api_key=settings.qdrant_api_key
-            )
-        else:
-            self.client = QdrantClient(url=settings.qdrant_url)
-        
-        self._ensure_collection()
-        
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.chunk_size,
-            chunk_overlap=settings.chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""]
+            return {"url": settings.qdrant_url, "api_key": settings.qdrant_api_key}
+        return {"url": settings.qdrant_url}
+
+    @property
+    def embedding_client(self) -> EmbeddingClient:
+        if self._embedding_client is None:
+            self._embedding_client = EmbeddingClient()
+        return self._embedding_client
+
+    def _live_is_stale(self) -> bool:
+        return (
+            self._live_collection is None
+            or time.monotonic() - self._live_checked_at > settings.corpus_state_refresh_interval
         )
-        
-        logger.info(f"Initialized Qdrant vector store: {settings.qdrant_url}")
-    
+
+    @property
+    def client(self) -> QdrantClient:
+        """
+        Sync Qdrant client
+
+        The live collection is resolved on first use and again periodically,
+        so long-lived workers follow an alias switch.
+        """
+        # _ensure_collection itself goes through this property
+        resolving = self._resolver == threading.get_ident()
+        if self._client is None or (self._live_is_stale() and not resolving):
+            with self._lock:
+                if self._client is None:
+                    self._client = QdrantClient(**self._qdrant_kwargs())
+                    logger.info(f"Initialized Qdrant vector store: {settings.qdrant_url}")
+                if self._live_is_stale():
+                    self._resolver = threading.get_ident()
+                    try:
+                        self._ensure_collection()
+                    except Exception:
+                        self._live_collection = None
+                        raise
+                    finally:
+                        self._resolver = None
+        return self._client
+
+    @property
+    def async_client(self) -> AsyncQdrantClient:
+        """Async Qdrant client for the query path"""
+        if self._async_client is None:
+            self._async_client = AsyncQdrantClient(**self._qdrant_kwargs())
+        return self._async_client
+
+    @property
+    def text_splitter(self) -> TextChunker:
+        if self._text_splitter is None:
+            self._text_splitter = TextChunker.from_settings()
+        return self._text_splitter
+
+    @staticmethod
+    def _quantization_config():
+        always_ram = settings.qdrant_quantization_always_ram
+        if settings.qdrant_quantization == "scalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8, quantile=0.99, always_ram=always_ram
+                )
+            )
+        if settings.qdrant_quantization == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=always_ram))
+        if settings.qdrant_quantization:
+            raise ValueError(f"Unknown quantization: {settings.qdrant_quantization}")
+        return None
+
+    @classmethod
+    def _collection_config(cls, embedding_dim: int) -> Dict:
+        config = {
+            "vectors_config": VectorParams(
+                size=embedding_dim,
+                distance=Distance.COSINE,
+                on_disk=settings.qdrant_on_disk_vectors
+            ),
+            "hnsw_config": HnswConfigDiff(
+                m=settings.qdrant_hnsw_m,
+                ef_construct=settings.qdrant_hnsw_ef_construct
+            ),
+            "quantization_config": cls._quantization_config(),
+            "on_disk_payload": settings.qdrant_on_disk_payload,
+        }
+        if settings.hybrid_search_enabled:
+            # Qdrant computes IDF from the collection at query time
+            config["sparse_vectors_config"] = {
+                SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)
+            }
+        return config
+
+    def _apply_collection_tuning(self, info, collection_name: str):
+        """Push changed storage, HNSW and quantization settings to an existing collection"""
+        config = info.config
+        changes = {}
+        if bool(config.params.vectors.on_disk) != settings.qdrant_on_disk_vectors:
+            changes["vectors_config"] = {
+                "": VectorParamsDiff(on_disk=settings.qdrant_on_disk_vectors)
+            }
+        if bool(config.params.on_disk_payload) != settings.qdrant_on_disk_payload:
+            changes["collection_params"] = CollectionParamsDiff(
+                on_disk_payload=settings.qdrant_on_disk_payload
+            )
+        hnsw = config.hnsw_config
+        if (hnsw.m, hnsw.ef_construct) != (settings.qdrant_hnsw_m, settings.qdrant_hnsw_ef_construct):
+            changes["hnsw_config"] = HnswConfigDiff(
+                m=settings.qdrant_hnsw_m,
+                ef_construct=settings.qdrant_hnsw_ef_construct
+            )
+        quantization = self._quantization_config()
+        if config.quantization_config != quantization:
+            changes["quantization_config"] = quantization or Disabled.DISABLED
+
+        if changes:
+            # Qdrant rebuilds the affected segments in the background
+            logger.info(f"Updating collection {collection_name}: {', '.join(changes)}")
+            self.client.update_collection(collection_name=collection_name, **changes)
+
+    @staticmethod
+    def _search_params() -> Optional[SearchParams]:
+        """Search-time HNSW ef and quantization oversampling/rescore"""
+        quantization = None
+        if settings.qdrant_quantization:
+            quantization = QuantizationSearchParams(
+                oversampling=settings.qdrant_search_oversampling,
+                rescore=settings.qdrant_search_rescore
+            )
+        if quantization is None and settings.qdrant_hnsw_ef is None:
+            return None
+        return SearchParams(hnsw_ef=settings.qdrant_hnsw_ef, quantization=quantization)
+
+    def _set_hybrid(self, info):
+        has_sparse = SPARSE_VECTOR_NAME in (info.config.params.sparse_vectors or {})
+        if settings.hybrid_search_enabled and not has_sparse and self._hybrid is None:
+            logger.warning(
+                f"Hybrid search is enabled but collection {self.collection_name} has no "
+                f"'{SPARSE_VECTOR_NAME}' sparse vector; falling back to dense search"
+            )
+        self._hybrid = settings.hybrid_search_enabled and has_sparse
+
+    def _use_embedding_model(self, provider: str, model: str):
+        client = self._embedding_client
+        if client is None or (client.provider, client.model_name) != (provider, model):
+            self._embedding_client = EmbeddingClient(provider, model)
+
+    def invalidate(self):
+        """Forget the resolved live collection, e.g. after an alias switch"""
+        self._live_collection = None
+        self._hybrid = None
+
+    def _alias_target(self) -> Optional[str]:
+        """Physical collection behind the alias; the alias name itself for pre-alias collections"""
+        for alias in self.client.get_aliases().aliases:
+            if alias.alias_name == self.collection_name:
+                return alias.collection_name
+        if self.client.collection_exists(self.collection_name):
+            return self.collection_name
+        return None
+
+    def _create_collection(self, name: str, dimension: int):
+        logger.info(f"Creating Qdrant collection: {name} (dimension {dimension})")
+        self.client.create_collection(collection_name=name, **self._collection_config(dimension))
+
+    def _switch_alias(self, live: Optional[str], target: str):
+        """Point the alias at target in one atomic Qdrant operation"""
+        operations = [
+            CreateAliasOperation(
+                create_alias=CreateAlias(collection_name=target, alias_name=self.collection_name)
+            )
+        ]
+        if live == self.collection_name:
+            # A collection created before aliases occupies the alias name and
+            # has to be dropped first, so this one switch leaves a short gap
+            logger.warning(f"Dropping pre-alias collection {live} before switching")
+            self.client.delete_collection(live)
+        elif live is not None:
+            operations.insert(
+                0, DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=self.collection_name))
+            )
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+        logger.info(f"Alias {self.collection_name} now points to {target}")
+
+    def _live_model(self, live: str) -> Tuple[str, str]:
+        """(provider, model) that built the live collection, recorded on first sight"""
+        with get_db_context() as db:
+            record = db.query(VectorCollection).filter(VectorCollection.name == live).first()
+            if record is None:
+                # Pre-manifest collection: built by the configured model if the sizes agree
+                dimension = self.client.get_collection(live).config.params.vectors.size
+                provider, model = settings.embedding_provider, settings.get_embedding_model()
+                if dimension != EmbeddingClient(provider, model).dimension:
+                    provider = model = UNKNOWN_MODEL
+                record = VectorCollection(
+                    name=live,
+                    status=VectorCollectionStatus.ACTIVE,
+                    embedding_provider=provider,
+                    embedding_model=model,
+                    dimension=dimension,
+                    activated_at=func.now()
+                )
+                db.add(record)
+            return record.embedding_provider, record.embedding_model
+
     def _ensure_collection(self):
-        """Ensure collection exists and has correct vector size"""
+        """
+        Resolve the live collection behind the alias, creating it on first run
+
+        The live collection is always queried with the embedding model that
+        built it. When the configured model differs, a replacement collection
+        is built in the background (migrate_collection) and the alias is
+        switched once it is complete; nothing is recreated in place.
+        """
         try:
-            # Get embedding dimension by creating a test embedding
-            test_embedding = self.embedding_client.embed_text("test")
-            embedding_dim = len(test_embedding)
-
-            # Check if collection exists
-            if self.client.collection_exists(self.collection_name):
-                info = self.client.get_collection(self.collection_name)
-                current_dim = info.config.params.vectors.size
-
-                if current_dim != embedding_dim:
-                    logger.warning(
-                        f"Collection {self.collection_name} has wrong dimension {current_dim}, expected {embedding_dim}. Recreating..."
-                    )
-                    self.client.recreate_collection(
-                        collection_name=self.collection_name,
-                        vectors_config=VectorParams(
-                            size=embedding_dim,
-                            distance=Distance.COSINE
-                        )
-                    )
-                    logger.info(f"✅ Recreated collection {self.collection_name} with correct dimension {embedding_dim}")
-                else:
-                    logger.info(f"Collection {self.collection_name} exists with correct dimension {embedding_dim}")
+            live = self._alias_target()
+            if live is None:
+                live = f"{self.collection_name}_v1"
+                configured = EmbeddingClient()
+                self._create_collection(live, configured.dimension)
+                self._switch_alias(None, live)
+                with get_db_context() as db:
+                    db.add(VectorCollection(
+                        name=live,
+                        status=VectorCollectionStatus.ACTIVE,
+                        embedding_provider=configured.provider,
+                        embedding_model=configured.model_name,
+                        dimension=configured.dimension,
+                        activated_at=func.now()
+                    ))
+
+            provider, model = self._live_model(live)
+            if provider == UNKNOWN_MODEL:
+                logger.error(
+                    f"Collection {live} was built with an unknown embedding model; "
+                    "searches fail until the migration to the configured model completes"
+                )
+                self._use_embedding_model(settings.embedding_provider, settings.get_embedding_model())
             else:
-                logger.info(f"Creating Qdrant collection: {self.collection_name}")
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(
-                        size=embedding_dim,
-                        distance=Distance.COSINE
-                    )
+                self._use_embedding_model(provider, model)
+
+            if (provider, model) != (settings.embedding_provider, settings.get_embedding_model()):
+                logger.warning(
+                    f"Collection {live} uses {provider}/{model}; serving it while migrating "
+                    f"to {settings.embedding_provider}/{settings.get_embedding_model()}"
                 )
-                logger.info(f"✅ Created new collection with dimension {embedding_dim}")
+                self.start_migration()
+            else:
+                self._apply_collection_tuning(self.client.get_collection(live), live)
+
+            self._ensure_payload_indexes(live)
+            self._set_hybrid(self.client.get_collection(live))
+            self._live_collection = live
+            self._live_checked_at = time.monotonic()
 
         except Exception as e:
             logger.error(f"Error ensuring collection: {e}")
             raise
 
+    def _ensure_payload_indexes(self, collection_name: str):
+        """Create any missing keyword payload indexes"""
+        schema = self.client.get_collection(collection_name).payload_schema or {}
+        for field in KEYWORD_INDEXES:
+            if field not in schema:
+                logger.info(f"Creating payload index on {collection_name}.{field}")
+                self.client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field,
+                    field_schema=PayloadSchemaType.KEYWORD,
+                    wait=True
+                )
+
+    def start_migration(self, force: bool = False) -> Optional[str]:
+        """
+        Register a collection for the configured model and queue its build
+
+        Does nothing while a build for that model is running. A failed build
+        is only retried with force, so a persistent error does not loop.
+
+        Returns:
+            Name of the queued collection, if any
+        """
+        provider, model = settings.embedding_provider, settings.get_embedding_model()
+        try:
+            with get_db_context() as db:
+                previous = db.query(VectorCollection).filter(
+                    VectorCollection.embedding_provider == provider,
+                    VectorCollection.embedding_model == model,
+                    VectorCollection.status.in_([
+                        VectorCollectionStatus.BUILDING, VectorCollectionStatus.FAILED
+                    ])
+                ).order_by(VectorCollection.id.desc()).first()
+                if previous is not None and (
+                    previous.status == VectorCollectionStatus.BUILDING or not force
+                ):
+                    return None
+                version = db.query(func.count(VectorCollection.id)).scalar() + 1
+                name = f"{self.collection_name}_v{version}"
+                db.add(VectorCollection(
+                    name=name,
+                    status=VectorCollectionStatus.BUILDING,
+                    embedding_provider=provider,
+                    embedding_model=model,
+                    dimension=EmbeddingClient(provider, model).dimension
+                ))
+        except IntegrityError:
+            # Another process registered the same version first
+            return None
+
+        from app.services.celery_worker import migrate_collection
+
+        migrate_collection.delay(name)
+        logger.info(f"Queued migration to {name} ({provider}/{model})")
+        return name
+
+    def _update_manifest(self, name: str, **values):
+        with get_db_context() as db:
+            db.query(VectorCollection).filter(VectorCollection.name == name).update(values)
+
+    def _fingerprints(self, collection_name: str) -> Dict[str, int]:
+        """Point id -> hash of its document links, for diffing two collections"""
+        fingerprints = {}
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=collection_name,
+                with_payload=LINK_PAYLOAD,
+                with_vectors=False,
+                limit=1000,
+                offset=offset
+            )
+            for record in records:
+                payload = record.payload or {}
+                fingerprints[str(record.id)] = hash(repr([payload.get(key) for key in LINK_PAYLOAD]))
+            if offset is None:
+                return fingerprints
+
+    def _sync_collection(
+        self,
+        source: str,
+        target: str,
+        embedder: EmbeddingClient,
+        hybrid: bool
+    ) -> int:
+        """
+        One migration pass: copy missing points, re-link changed ones, drop removed ones
+
+        Returns:
+            Number of points that needed work
+        """
+        source_prints = self._fingerprints(source)
+        target_prints = self._fingerprints(target)
+        missing = [point_id for point_id in source_prints if point_id not in target_prints]
+        removed = [point_id for point_id in target_prints if point_id not in source_prints]
+        relinked = [
+            point_id for point_id, fingerprint in source_prints.items()
+            if point_id in target_prints and target_prints[point_id] != fingerprint
+        ]
+        migrated = len(source_prints) - len(missing)
+        self._update_manifest(target, points_total=len(source_prints), points_migrated=migrated)
+
+        client = self.client
+
+        def embedded():
+            for ids in batched(missing, settings.migration_batch_size):
+                records = client.retrieve(
+                    collection_name=source,
+                    ids=ids,
+                    with_payload=True,
+                    with_vectors=False
+                )
+                # Chunk text is stored in the payload, so nothing is re-fetched
+                texts = [record.payload.get("content", "") for record in records]
+                yield records, texts, embedder.embed_batch(texts)
+
+        # Retrieval and embedding of the next batch overlap this batch's upsert
+        for records, texts, embeddings in prefetch(embedded(), settings.ingest_queue_depth):
+            self._upsert_points([
+                PointStruct(
+                    id=record.id,
+                    vector=self._point_vector(embedding, text, hybrid),
+                    payload=record.payload
+                )
+                for record, text, embedding in zip(records, texts, embeddings)
+            ], collection_name=target)
+            migrated += len(records)
+            self._update_manifest(target, points_migrated=migrated)
+            logger.info(f"Migrated {migrated}/{len(source_prints)} points to {target}")
+
+        if relinked:
+            self._set_payloads(self._existing_payloads(relinked, source), collection_name=target)
+        if removed:
+            self.client.delete(collection_name=target, points_selector=removed)
+        logger.info(
+            f"Migration pass {source} -> {target}: {len(missing)} copied, "
+            f"{len(relinked)} re-linked, {len(removed)} removed"
+        )
+        return len(missing) + len(relinked) + len(removed)
+
+    def _retry_migration(self, name: str, reason: str):
+        from app.services.celery_worker import migrate_collection
+
+        logger.warning(f"Not switching to {name} yet: {reason}")
+        migrate_collection.apply_async((name,), countdown=MIGRATION_RETRY_DELAY)
+
+    def migrate_collection(self, name: str):
+        """
+        Build a registered collection from the live one and switch the alias to it
+
+        Chunks are re-embedded from their stored text with the collection's
+        model, migration_batch_size at a time. Catch-up passes pick up
+        documents ingested or deleted meanwhile and resume an interrupted
+        run; they repeat until one finds at most migration_batch_size points
+        to do. Writes are then frozen for a final pass, and the alias is only
+        switched once a pass finds the collections identical. A migration
+        that falls behind, or cannot freeze or converge in time, stays
+        BUILDING and is retried later. Queries keep using the live
+        collection until the switch.
+        """
+        with get_db_context() as db:
+            record = db.query(VectorCollection).filter(VectorCollection.name == name).first()
+            if record is None or record.status != VectorCollectionStatus.BUILDING:
+                logger.warning(f"No migration pending for {name}")
+                return
+            provider, model, dimension = (
+                record.embedding_provider, record.embedding_model, record.dimension
+            )
+
+        live = self._alias_target()
+        try:
+            if not self.client.collection_exists(name):
+                self._create_collection(name, dimension)
+            self._ensure_payload_indexes(name)
+            info = self.client.get_collection(name)
+            hybrid = SPARSE_VECTOR_NAME in (info.config.params.sparse_vectors or {})
+            embedder = EmbeddingClient(provider, model)
+
+            for _ in range(settings.migration_max_passes):
+                remaining = self._sync_collection(live, name, embedder, hybrid)
+                if remaining <= settings.migration_batch_size:
+                    break
+            else:
+                self._retry_migration(name, f"{remaining} points changed during the last pass")
+                return
+
+            token = write_gate.freeze()
+            if token is None:
+                self._retry_migration(name, "writes in progress did not finish")
+                return
+            try:
+                # Nothing changes the live collection now, so a pass that
+                # finds no work proves the two match
+                for _ in range(2):
+                    if not self._sync_collection(live, name, embedder, hybrid):
+                        break
+                else:
+                    self._retry_migration(name, "collections still differ with writes frozen")
+                    return
+                if not write_gate.holds(token):
+                    self._retry_migration(name, "the write freeze expired during the final pass")
+                    return
+                self._switch_alias(live, name)
+                # Writers check the manifest before they write again
+                with get_db_context() as db:
+                    db.query(VectorCollection).filter(VectorCollection.name == name).update(
+                        {"status": VectorCollectionStatus.ACTIVE, "activated_at": func.now()}
+                    )
+                    db.query(VectorCollection).filter(VectorCollection.name == live).update(
+                        {"status": VectorCollectionStatus.RETIRED}
+                    )
+            finally:
+                write_gate.thaw(token)
+        except Exception as e:
+            logger.error(f"Migration to {name} failed: {e}")
+            self._update_manifest(name, status=VectorCollectionStatus.FAILED, error_message=str(e))
+            raise
+
+        self.invalidate()
+        publish_collection_switch(name)
+        logger.info(f"Migration complete: {self.collection_name} -> {name} (retired {live})")
+
+    async def _alive(self):
+        """Resolve the live collection's model and sparse support for the query path"""
+        if not self._live_is_stale():
+            return
+        aliases = (await self.async_client.get_aliases()).aliases
+        live = next(
+            (alias.collection_name for alias in aliases if alias.alias_name == self.collection_name),
+            self.collection_name
+        )
+        async with AsyncSessionLocal() as db:
+            record = (await db.execute(
+                select(VectorCollection).where(VectorCollection.name == live)
+            )).scalar_one_or_none()
+        if record is not None and record.embedding_provider != UNKNOWN_MODEL:
+            self._use_embedding_model(record.embedding_provider, record.embedding_model)
+        self._set_hybrid(await self.async_client.get_collection(live))
+        self._live_collection = live
+        self._live_checked_at = time.monotonic()
+
+    async def aembed_query(self, query: str) -> List[float]:
+        """Embed a query with the model of the live collection"""
+        await self._alive()
+        return await self.embedding_client.aembed_text(query)
+
+    @staticmethod
+    def _scope_filter(
+        sources: Optional[List[str]] = None,
+        job_ids: Optional[List[str]] = None
+    ) -> Optional[Filter]:
+        """Filter restricting retrieval to chunks from the given sources or jobs"""
+        conditions = []
+        if sources:
+            conditions.append(FieldCondition(key="sources", match=MatchAny(any=sources)))
+        if job_ids:
+            conditions.append(FieldCondition(key="job_ids", match=MatchAny(any=job_ids)))
+        return Filter(must=conditions) if conditions else None
+
+    def _is_indexed(self, links: Dict[str, Dict]) -> bool:
+        """Whether each of these chunks is stored with exactly this entry among its links"""
+        stored = self._existing_payloads(list(links))
+        return len(stored) == len(links) and all(
+            links[point_id] in self._links(payload) for point_id, payload in stored.items()
+        )
+
+    @staticmethod
+    def _unique_chunks(chunks: List[Chunk]) -> List[Tuple[int, str, Chunk]]:
+        """(chunk_index, chunk_hash, chunk) for each distinct chunk, first occurrence wins"""
+        seen = set()
+        unique = []
+        for i, chunk in enumerate(chunks):
+            chunk_hash = hashlib.sha256(chunk.text.encode()).hexdigest()
+            if chunk_hash not in seen:
+                seen.add(chunk_hash)
+                unique.append((i, chunk_hash, chunk))
+        return unique
+
+    def _existing_payloads(
+        self,
+        point_ids: List[str],
+        collection_name: Optional[str] = None
+    ) -> Dict[str, Dict]:
+        """Document links of points that are already stored, keyed by point id"""
+        existing = {}
+        batch_size = 256
+        for i in range(0, len(point_ids), batch_size):
+            records = self.client.retrieve(
+                collection_name=collection_name or self.collection_name,
+                ids=point_ids[i:i + batch_size],
+                with_payload=LINK_PAYLOAD,
+                with_vectors=False
+            )
+            for record in records:
+                existing[str(record.id)] = record.payload or {}
+        return existing
+
+    @staticmethod
+    def _link(doc: Dict, content_hash: str, chunk_index: int, chunk: Chunk) -> Dict:
+        """A document's entry in the links of one of its chunks"""
+        return {
+            "source": doc["url"],
+            "job_id": doc["job_id"],
+            "content_hash": content_hash,
+            "title": doc["title"],
+            "chunk_index": chunk_index,
+            # Character span in the source document
+            "char_start": chunk.start,
+            "char_end": chunk.end,
+        }
+
+    @staticmethod
+    def _links(payload: Dict) -> List[Dict]:
+        """
+        Entries of every document linked to a chunk, in link order
+
+        Points stored before titles and positions were kept per document
+        only have them in the scalars, which belong to the first document.
+        """
+        links = []
+        for i, job_id in enumerate(payload.get("job_ids", [])):
+            link = {}
+            for field, key in LINK_FIELDS.items():
+                values = payload.get(key)
+                if values is not None:
+                    link[field] = values[i]
+                else:
+                    link[field] = payload.get(field) if job_id == payload.get("job_id") else None
+            links.append(link)
+        return links
+
+    @staticmethod
+    def _linked_payload(links: List[Dict]) -> Dict:
+        """Payload link fields for these entries, the scalars taken from the first"""
+        payload = {key: [link[field] for link in links] for field, key in LINK_FIELDS.items()}
+        if links:
+            payload.update(links[0])
+        return payload
+
+    @classmethod
+    def _relinked(cls, payload: Dict, job_id: str, link: Optional[Dict]) -> Dict:
+        """Payload links with this job's entry replaced in place (or removed when link is None)"""
+        links = cls._links(payload)
+        position = next((i for i, entry in enumerate(links) if entry["job_id"] == job_id), None)
+        if position is None:
+            if link is not None:
+                links.append(link)
+        elif link is None:
+            del links[position]
+        else:
+            links[position] = link
+        return cls._linked_payload(links)
+
+    def _set_payloads(self, updates: Dict[str, Dict], collection_name: Optional[str] = None):
+        """Apply per-point payload updates in batched requests"""
+        operations = [
+            SetPayloadOperation(set_payload=SetPayload(payload=payload, points=[point_id]))
+            for point_id, payload in updates.items()
+        ]
+        batch_size = 100
+        for i in range(0, len(operations), batch_size):
+            self.client.batch_update_points(
+                collection_name=collection_name or self.collection_name,
+                update_operations=operations[i:i + batch_size]
+            )
+
+    def _check_model(self, embedder: EmbeddingClient):
+        """Raise CollectionChanged unless the live collection still uses embedder's model"""
+        with get_db_context() as db:
+            live = db.query(VectorCollection).filter(
+                VectorCollection.status == VectorCollectionStatus.ACTIVE
+            ).order_by(VectorCollection.id.desc()).first()
+            model = (live.embedding_provider, live.embedding_model) if live else None
+        if model is None or model[0] == UNKNOWN_MODEL:
+            return
+        if (embedder.provider, embedder.model_name) != model:
+            self.invalidate()
+            raise CollectionChanged(
+                f"Live collection now uses {model[0]}/{model[1]}, "
+                f"not {embedder.provider}/{embedder.model_name}"
+            )
+
+    @contextmanager
+    def _writing(self, embedder: Optional[EmbeddingClient] = None):
+        """
+        Write access to the live collection
+
+        Waits while a migration's final pass has writes frozen. With an
+        embedder, the manifest is checked before writing: vectors from a
+        model the alias no longer serves must not reach the new collection.
+        """
+        with write_gate.writing():
+            if embedder is not None:
+                self._check_model(embedder)
+            yield
+
+    def _link_sources(self, links: Dict[str, Dict]) -> Dict[str, Dict]:
+        """
+        Add a document to the links of those of its chunks that are already stored
+
+        Args:
+            links: The document's entry for each of its chunks, keyed by point id
+
+        Returns:
+            Links of the stored chunks before linking, keyed by point id
+        """
+        point_ids = list(links)
+        existing = {}
+        batch_size = 256
+        for i in range(0, len(point_ids), batch_size):
+            ids = point_ids[i:i + batch_size]
+            # Read and write under the chunks' locks so concurrent links and
+            # unlinks of a shared chunk are not lost
+            with self._writing(), chunk_locks.hold(ids):
+                stored = self._existing_payloads(ids)
+                updates = {}
+                for point_id, payload in stored.items():
+                    # A chunk kept across versions of a page gets the new
+                    # version's position and content hash
+                    link = links[point_id]
+                    if link not in self._links(payload):
+                        updates[point_id] = self._relinked(payload, link["job_id"], link)
+                self._set_payloads(updates)
+            existing.update(stored)
+        return existing
+
+    @staticmethod
+    def _point_vector(embedding: List[float], chunk: str, hybrid: bool):
+        """Dense vector, plus the BM25 sparse vector for hybrid collections"""
+        if not hybrid:
+            return embedding
+        indices, values = encode_document(chunk)
+        return {
+            "": embedding,
+            SPARSE_VECTOR_NAME: SparseVector(indices=indices, values=values)
+        }
+
+    def _build_point(
+        self,
+        chunk_index: int,
+        chunk_hash: str,
+        chunk: Chunk,
+        embedding: List[float],
+        doc: Dict,
+        content_hash: str
+    ) -> PointStruct:
+        return PointStruct(
+            id=chunk_point_id(chunk_hash),
+            vector=self._point_vector(embedding, chunk.text, self._hybrid),
+            payload={
+                "content": chunk.text,
+                "chunk_hash": chunk_hash,
+                **self._linked_payload([self._link(doc, content_hash, chunk_index, chunk)])
+            }
+        )
+
+    def _store_new_points(self, points: List[PointStruct], embedder: EmbeddingClient) -> int:
+        """
+        Upsert points embedded by embedder, merging into any stored meanwhile
+
+        Another worker may have stored the same chunk since it was found
+        missing; its links are kept and this batch's added.
+
+        Returns:
+            Number of points that did not exist yet
+        """
+        point_ids = [point.id for point in points]
+        with self._writing(embedder), chunk_locks.hold(point_ids):
+            stored = self._existing_payloads(point_ids)
+            for point in points:
+                if point.id in stored:
+                    merged = stored[point.id]
+                    for link in self._links(point.payload):
+                        merged = self._relinked(merged, link["job_id"], link)
+                    point.payload.update(merged)
+            self._upsert_points(points)
+        return len(points) - len(stored)
+
+    def _upsert_points(self, points: List[PointStruct], collection_name: Optional[str] = None):
+        """Upload points to Qdrant in batches"""
+        batch_size = 100
+        for i in range(0, len(points), batch_size):
+            batch = points[i:i + batch_size]
+            self.client.upsert(
+                collection_name=collection_name or self.collection_name,
+                points=batch
+            )
+
     def add_document(
         self,
         content: str,
@@ -98,89 +859,235 @@ class VectorStoreManager:
         Returns:
             Number of chunks created
         """
-        try:
-            # Create content hash for deduplication
-            content_hash = hashlib.sha256(content.encode()).hexdigest()
-            
-            # Check if already indexed
-            existing = self.client.scroll(
-                collection_name=self.collection_name,
-                scroll_filter=Filter(
-                    must=[
-                        FieldCondition(
-                            key="content_hash",
-                            match=MatchValue(value=content_hash)
-                        )
-                    ]
-                ),
-                limit=1
-            )
-            
-            if existing[0]:
-                logger.info(f"Document already indexed: {url}")
-                # Count existing chunks
-                chunks_count = self.client.count(
-                    collection_name=self.collection_name,
-                    count_filter=Filter(
-                        must=[
-                            FieldCondition(
-                                key="content_hash",
-                                match=MatchValue(value=content_hash)
-                            )
-                        ]
-                    )
-                )
-                return chunks_count.count
-            
-            # Split into chunks
-            chunks = self.text_splitter.split_text(content)
-            
-            if not chunks:
-                raise ValueError("No chunks created from content")
-            
-            # Generate embeddings for all chunks
-            logger.info(f"Generating embeddings for {len(chunks)} chunks")
-            embeddings = self.embedding_client.embed_batch(chunks)
-            
-            # Prepare points for Qdrant
-            points = []
-            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                point_id = str(uuid.uuid4())
-                points.append(
-                    PointStruct(
-                        id=point_id,
-                        vector=embedding,
-                        payload={
-                            "content": chunk,
-                            "source": url,
-                            "job_id": job_id,
-                            "title": title,
-                            "chunk_index": i,
-                            "content_hash": content_hash
-                        }
-                    )
-                )
+        return self.add_documents([
+            {"content": content, "job_id": job_id, "url": url, "title": title}
+        ])[0]
+
+    def add_documents(self, documents: List[Dict]) -> List[int]:
+        """
+        Add several documents, embedding their chunks in shared requests
+        
+        Args:
+            documents: Dicts with content, job_id, url and title keys
             
-            # Upload points to Qdrant in batches
-            batch_size = 100
-            for i in range(0, len(points), batch_size):
-                batch = points[i:i + batch_size]
-                self.client.upsert(
-                    collection_name=self.collection_name,
-                    points=batch
+        Returns:
+            Number of chunks for each document, in input order
+        """
+        try:
+            counts = [0] * len(documents)
+            pending = []
+            # New chunks already scheduled by an earlier document in this
+            # call, with the links of later documents that share them; each
+            # is embedded and stored once
+            claimed: Dict[str, List[Dict]] = {}
+            for i, doc in enumerate(documents):
+                # Create content hash for deduplication
+                content_hash = hashlib.sha256(doc["content"].encode()).hexdigest()
+
+                # Split into chunks
+                chunks = self.text_splitter.split(doc["content"])
+                if not chunks:
+                    raise ValueError("No chunks created from content")
+                unique = self._unique_chunks(chunks)
+                counts[i] = len(unique)
+                links = {
+                    chunk_point_id(chunk_hash): self._link(doc, content_hash, chunk_index, chunk)
+                    for chunk_index, chunk_hash, chunk in unique
+                }
+
+                # Fast path: exactly these chunks are stored and linked to
+                # this job at these positions. A different split of the same
+                # text (new chunk settings) or the same content under another
+                # job still goes through the linking below.
+                if self._is_indexed(links):
+                    logger.info(f"Document already indexed: {doc['url']}")
+                    continue
+
+                # Chunks stored by other documents (or an earlier partial
+                # attempt) only need their links updated
+                existing = self._link_sources(links)
+                new_chunks = []
+                for chunk in unique:
+                    point_id = chunk_point_id(chunk[1])
+                    if point_id in existing:
+                        continue
+                    if point_id in claimed:
+                        claimed[point_id].append(links[point_id])
+                    else:
+                        claimed[point_id] = []
+                        new_chunks.append(chunk)
+                if new_chunks:
+                    pending.append((doc, content_hash, new_chunks))
+                logger.info(
+                    f"{doc['url']}: {len(new_chunks)} new chunks, "
+                    f"{len(existing)} already stored, "
+                    f"{len(unique) - len(new_chunks) - len(existing)} shared within the batch"
                 )
-            
-            logger.info(f"Added document to vector store: {url} ({len(chunks)} chunks)")
-            return len(chunks)
+
+            if not pending:
+                return counts
+
+            # Stream fixed-size batches through embed -> upsert: the next
+            # batch is embedded in the background while this one is written,
+            # and only ingest_queue_depth embedded batches are held at once
+            items = (
+                (doc, content_hash, chunk)
+                for doc, content_hash, chunks in pending
+                for chunk in chunks
+            )
+            total_chunks = sum(len(chunks) for _, _, chunks in pending)
+            logger.info(f"Generating embeddings for {total_chunks} chunks")
+            # Pinned: a re-resolve after an alias switch must not mix models
+            embedder = self.embedding_client
+
+            def embedded():
+                for batch in batched(items, settings.ingest_batch_size):
+                    texts = [chunk.text for _, _, (_, _, chunk) in batch]
+                    yield batch, embedder.embed_batch(texts)
+
+            stored = {}
+            for batch, embeddings in prefetch(embedded(), settings.ingest_queue_depth):
+                points = []
+                for (doc, content_hash, chunk), embedding in zip(batch, embeddings):
+                    point = self._build_point(*chunk, embedding, doc, content_hash)
+                    for link in claimed[point.id]:
+                        point.payload.update(self._relinked(point.payload, link["job_id"], link))
+                    points.append(point)
+                publish_corpus_change(self._store_new_points(points, embedder))
+                for doc, _, _ in batch:
+                    stored[doc["url"]] = stored.get(doc["url"], 0) + 1
+
+            for url, count in stored.items():
+                logger.info(f"Added document to vector store: {url} ({count} new chunks)")
+
+            return counts
             
         except Exception as e:
             logger.error(f"Error adding document to vector store: {e}")
             raise
     
+    def _job_points(self, job_id: str) -> Dict[str, Dict]:
+        """Document links of every point linked to a job, keyed by point id"""
+        points = {}
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=Filter(
+                    must=[FieldCondition(key="job_ids", match=MatchValue(value=job_id))]
+                ),
+                with_payload=LINK_PAYLOAD,
+                with_vectors=False,
+                limit=256,
+                offset=offset
+            )
+            for record in records:
+                points[str(record.id)] = record.payload or {}
+            if offset is None:
+                return points
+
+    def _unlink_points(self, point_ids: List[str], job_id: str) -> int:
+        """
+        Detach a job from points; points no other document uses are deleted
+
+        Returns:
+            Number of deleted points
+        """
+        removed = 0
+        batch_size = 256
+        for i in range(0, len(point_ids), batch_size):
+            ids = point_ids[i:i + batch_size]
+            orphaned = []
+            updates = {}
+            with self._writing(), chunk_locks.hold(ids):
+                # Re-read under the locks: another job may have linked a
+                # point since it was listed
+                for point_id, payload in self._existing_payloads(ids).items():
+                    remaining = self._relinked(payload, job_id, None)
+                    if remaining["job_ids"]:
+                        updates[point_id] = remaining
+                    else:
+                        orphaned.append(point_id)
+                self._set_payloads(updates)
+                if orphaned:
+                    self.client.delete(
+                        collection_name=self.collection_name,
+                        points_selector=orphaned
+                    )
+            if orphaned:
+                publish_corpus_change(-len(orphaned))
+            removed += len(orphaned)
+        return removed
+
+    def delete_document(self, job_id: str) -> int:
+        """
+        Remove a job's vectors; chunks shared with other documents are kept
+        
+        Returns:
+            Number of deleted points
+        """
+        removed = self._unlink_points(list(self._job_points(job_id)), job_id)
+        logger.info(f"Deleted {removed} points for job {job_id}")
+        return removed
+
+    def refresh_document(
+        self,
+        content: str,
+        job_id: str,
+        url: str,
+        title: str
+    ) -> int:
+        """
+        Re-index a changed document, embedding only chunks that are new
+        
+        The new version is stored first; chunks that disappeared from the
+        page are then unlinked from the job and deleted once no other
+        document references them. If indexing fails, the previous version
+        stays searchable.
+        
+        Returns:
+            Number of chunks in the new version
+        """
+        return self.reindex_documents([
+            {"content": content, "job_id": job_id, "url": url, "title": title}
+        ])[0]
+
+    def reindex_documents(self, documents: List[Dict]) -> List[int]:
+        """
+        refresh_document for several documents, embedding their new chunks together
+
+        Args:
+            documents: Dicts with content, job_id, url and title keys
+
+        Returns:
+            Number of chunks for each document, in input order
+        """
+        counts = self.add_documents(documents)
+        for doc in documents:
+            content_hash = hashlib.sha256(doc["content"].encode()).hexdigest()
+            links = {
+                chunk_point_id(chunk_hash): self._link(doc, content_hash, chunk_index, chunk)
+                for chunk_index, chunk_hash, chunk
+                in self._unique_chunks(self.text_splitter.split(doc["content"]))
+            }
+            # Only drop the old version once every chunk of the new one is
+            # stored and linked to the job; otherwise it stays searchable
+            if not self._is_indexed(links):
+                raise RuntimeError(f"New version of {doc['url']} is not fully indexed")
+            stale = [
+                point_id for point_id in self._job_points(doc["job_id"])
+                if point_id not in links
+            ]
+            removed = self._unlink_points(stale, doc["job_id"])
+            logger.info(f"Refreshed {doc['url']}: {len(stale)} chunks gone ({removed} deleted)")
+        return counts
+
     def search(
         self,
         query: str,
-        k: int = None
+        k: int = None,
+        sources: Optional[List[str]] = None,
+        job_ids: Optional[List[str]] = None
     ) -> List[Tuple[Dict, float]]:
         """
         Search for similar documents
@@ -188,6 +1095,8 @@ class VectorStoreManager:
         Args:
             query: Search query
             k: Number of results to return
+            sources: Only return chunks from these URLs
+            job_ids: Only return chunks from these ingestion jobs
             
         Returns:
             List of (document_dict, score) tuples
@@ -195,30 +1104,28 @@ class VectorStoreManager:
         k = k or settings.top_k_results
         
         try:
+            # Resolves the live collection, its embedding model and hybrid support
+            client = self.client
+
             # Generate query embedding
             query_embedding = self.embedding_client.embed_text(query)
             
             # Search in Qdrant
-            results = self.client.search(
-                collection_name=self.collection_name,
-                query_vector=query_embedding,
-                limit=k
-            )
-            
-            # Convert to expected format
-            formatted_results = []
-            for result in results:
-                doc_dict = {
-                    "page_content": result.payload.get("content", ""),
-                    "metadata": {
-                        "source": result.payload.get("source", ""),
-                        "title": result.payload.get("title", ""),
-                        "job_id": result.payload.get("job_id", ""),
-                        "chunk_index": result.payload.get("chunk_index", 0)
-                    }
-                }
-                formatted_results.append((doc_dict, result.score))
+            query_filter = self._scope_filter(sources, job_ids)
+            if self._hybrid:
+                results = client.query_points(
+                    **self._hybrid_query(query, query_embedding, query_filter, k)
+                ).points
+            else:
+                results = client.search(
+                    collection_name=self.collection_name,
+                    query_vector=query_embedding,
+                    query_filter=query_filter,
+                    search_params=self._search_params(),
+                    limit=k
+                )
             
+            formatted_results = self._format_results(results)
             logger.info(f"Retrieved {len(formatted_results)} results for query")
             return formatted_results
             
@@ -226,6 +1133,109 @@ class VectorStoreManager:
             logger.error(f"Error searching vector store: {e}")
             return []
     
+    async def asearch(
+        self,
+        query: str,
+        k: int = None,
+        query_embedding: List[float] = None,
+        sources: Optional[List[str]] = None,
+        job_ids: Optional[List[str]] = None,
+        with_vectors: bool = False
+    ) -> List[Tuple[Dict, float]]:
+        """
+        Async variant of search for the API event loop
+
+        With with_vectors, each document dict also carries its dense
+        embedding under "vector" for post-retrieval reranking.
+        """
+        k = k or settings.top_k_results
+
+        try:
+            if query_embedding is None:
+                query_embedding = await self.aembed_query(query)
+            else:
+                await self._alive()
+
+            query_filter = self._scope_filter(sources, job_ids)
+            if self._hybrid:
+                response = await self.async_client.query_points(
+                    **self._hybrid_query(query, query_embedding, query_filter, k),
+                    with_vectors=with_vectors
+                )
+                results = response.points
+            else:
+                results = await self.async_client.search(
+                    collection_name=self.collection_name,
+                    query_vector=query_embedding,
+                    query_filter=query_filter,
+                    search_params=self._search_params(),
+                    limit=k,
+                    with_vectors=with_vectors
+                )
+
+            formatted_results = self._format_results(results, with_vectors)
+            logger.info(f"Retrieved {len(formatted_results)} results for query")
+            return formatted_results
+
+        except Exception as e:
+            logger.error(f"Error searching vector store: {e}")
+            return []
+
+    def _hybrid_query(
+        self,
+        query: str,
+        query_embedding: List[float],
+        query_filter: Optional[Filter],
+        k: int
+    ) -> Dict:
+        """query_points arguments fusing dense and sparse candidates with RRF"""
+        limit = max(k, settings.hybrid_prefetch_limit)
+        indices, values = encode_query(query)
+        return {
+            "collection_name": self.collection_name,
+            "prefetch": [
+                Prefetch(
+                    query=query_embedding,
+                    filter=query_filter,
+                    params=self._search_params(),
+                    limit=limit
+                ),
+                Prefetch(
+                    query=SparseVector(indices=indices, values=values),
+                    using=SPARSE_VECTOR_NAME,
+                    filter=query_filter,
+                    limit=limit
+                ),
+            ],
+            "query": FusionQuery(fusion=Fusion.RRF),
+            "limit": k,
+            "with_payload": True,
+        }
+
+    def _format_results(self, results, with_vectors: bool = False) -> List[Tuple[Dict, float]]:
+        """Convert Qdrant points to (document_dict, score) tuples"""
+        formatted_results = []
+        for result in results:
+            doc_dict = {
+                "page_content": result.payload.get("content", ""),
+                "metadata": {
+                    "source": result.payload.get("source", ""),
+                    "title": result.payload.get("title", ""),
+                    "job_id": result.payload.get("job_id", ""),
+                    "chunk_index": result.payload.get("chunk_index", 0),
+                    "char_start": result.payload.get("char_start"),
+                    "char_end": result.payload.get("char_end"),
+                    "content_hash": result.payload.get("content_hash"),
+                    "sources": result.payload.get("sources", [result.payload.get("source", "")])
+                }
+            }
+            if with_vectors:
+                vector = result.vector
+                # Collections with sparse vectors return them by name
+                doc_dict["vector"] = vector.get("") if isinstance(vector, dict) else vector
+            formatted_results.append((doc_dict, result.score))
+        return formatted_results
+
     def get_stats(self) -> Dict:
         """Get vector store statistics"""
         try:
@@ -243,6 +1253,39 @@ class VectorStoreManager:
                 "qdrant_url": settings.qdrant_url
             }
 
+    async def acount(self, exact: bool = False) -> int:
+        """
+        Number of points in the collection; raises on failure
+
+        The default reads the collection's points_count, which costs nothing
+        but can briefly lag recent writes. exact=True counts every point.
+        """
+        if not exact:
+            collection_info = await self.async_client.get_collection(self.collection_name)
+            return collection_info.points_count or 0
+        result = await self.async_client.count(
+            collection_name=self.collection_name,
+            exact=True
+        )
+        return result.count
+
+    async def aget_stats(self) -> Dict:
+        """Async variant of get_stats"""
+        try:
+            collection_info = await self.async_client.get_collection(self.collection_name)
+            return {
+                "total_documents": collection_info.points_count,
+                "collection_name": self.collection_name,
+                "qdrant_url": settings.qdrant_url
+            }
+        except Exception as e:
+            logger.error(f"Error getting stats: {e}")
+            return {
+                "total_documents": 0,
+                "collection_name": self.collection_name,
+                "qdrant_url": settings.qdrant_url
+            }
+
 
 # Singleton instance
 vector_store_manager = VectorStoreManager()
\ No newline at end of file
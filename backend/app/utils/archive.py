@@ -0,0 +1,90 @@
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def content_digest(data: Union[str, bytes]) -> str:
+    """sha256 of the UTF-8 bytes; equals URLDocument.content_hash for extracted text"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+class PageArchive:
+    """
+    Content-addressed store of fetched pages and extracted text
+
+    Each blob is a zstd frame in a file named by the sha256 of its
+    uncompressed bytes, fanned out over two directory levels. Identical
+    pages are stored once, and blobs are written to a temporary file and
+    renamed into place, so a crashed worker never leaves a truncated blob
+    under a valid name. Blobs are never deleted: other documents may share
+    them.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self._root = root
+
+    @property
+    def root(self) -> Path:
+        return Path(self._root or settings.archive_dir)
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / f"{digest}.zst"
+
+    def contains(self, digest: str) -> bool:
+        return self._path(digest).exists()
+
+    def put(self, data: Union[str, bytes]) -> str:
+        """
+        Store a blob unless it is already archived
+
+        Returns:
+            sha256 of the blob, its key in the archive
+        """
+        # zstandard is only needed by workers, not the API
+        import zstandard
+
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        digest = content_digest(data)
+        path = self._path(digest)
+        if path.exists():
+            return digest
+
+        compressed = zstandard.ZstdCompressor(level=settings.archive_zstd_level).compress(data)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(compressed)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return digest
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """Uncompressed blob, or None when it is not archived"""
+        import zstandard
+
+        try:
+            with open(self._path(digest), "rb") as f:
+                compressed = f.read()
+        except FileNotFoundError:
+            return None
+        return zstandard.ZstdDecompressor().decompress(compressed)
+
+    def get_text(self, digest: str) -> Optional[str]:
+        data = self.get(digest)
+        return data.decode("utf-8") if data is not None else None
+
+
+page_archive = PageArchive()
@@ -0,0 +1,90 @@
+import logging
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+
+import redis
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Take every lock or none, so two writers holding overlapping sets of chunks
+# can never deadlock. KEYS: lock keys   ARGV: owner token, ttl ms
+ACQUIRE_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        return 0
+    end
+end
+for _, key in ipairs(KEYS) do
+    redis.call('SET', key, ARGV[1], 'PX', ARGV[2])
+end
+return 1
+"""
+
+# Only release locks this owner still holds; expired ones may be someone else's
+# KEYS: lock keys   ARGV: owner token
+RELEASE_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[1] then
+        redis.call('DEL', key)
+    end
+end
+return 1
+"""
+
+
+class ChunkLocks:
+    """
+    Per-point Redis locks around read-modify-write updates of chunk payloads.
+
+    A chunk's source lists are shared by every document containing it, so
+    two workers relinking the same point must not interleave their reads and
+    writes. Locks expire after chunk_lock_ttl in case a holder dies. When
+    Redis is unreachable, updates go ahead unlocked with a warning.
+    """
+
+    def __init__(self):
+        self._redis: Optional[redis.Redis] = None
+
+    def _get_redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(settings.redis_url)
+            self._acquire = self._redis.register_script(ACQUIRE_SCRIPT)
+            self._release = self._redis.register_script(RELEASE_SCRIPT)
+        return self._redis
+
+    @contextmanager
+    def hold(self, point_ids: Iterable[str]) -> Iterator[None]:
+        """Hold the locks of all given points for the duration of the block"""
+        keys = sorted({f"chunk-lock:{point_id}" for point_id in point_ids})
+        if not keys:
+            yield
+            return
+        token = uuid.uuid4().hex
+        ttl_ms = int(settings.chunk_lock_ttl * 1000)
+        deadline = time.monotonic() + settings.chunk_lock_timeout
+        try:
+            self._get_redis()
+            while not self._acquire(keys=keys, args=[token, ttl_ms]):
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Timed out waiting for {len(keys)} chunk locks")
+                time.sleep(random.uniform(0.01, 0.05))
+        except redis.RedisError as e:
+            logger.warning(f"Chunk locks unavailable, updating unlocked: {e}")
+            yield
+            return
+        try:
+            yield
+        finally:
+            try:
+                self._release(keys=keys, args=[token])
+            except redis.RedisError as e:
+                # The locks expire on their own
+                logger.warning(f"Failed to release chunk locks: {e}")
+
+
+chunk_locks = ChunkLocks()
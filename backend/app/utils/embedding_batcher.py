@@ -0,0 +1,142 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-request limits published by each provider
+PROVIDER_LIMITS = {
+    "gemini": {"max_items": 100, "max_tokens": 20000},
+    "openai": {"max_items": 2048, "max_tokens": 300000},
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Detect 429 / quota errors across provider SDKs"""
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if status == 429:
+        return True
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit.
+
+    Every fast success raises the limit by 1/limit (about +1 per round of
+    requests); a rate-limit error or a response slower than the target latency
+    halves it.
+    """
+
+    def __init__(self, initial: int, maximum: int, target_latency: float):
+        self.limit = float(initial)
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, latency: float = None, throttled: bool = False):
+        with self._cond:
+            self._in_flight -= 1
+            if throttled or (latency is not None and latency > self.target_latency):
+                self.limit = max(1.0, self.limit / 2)
+                logger.info(f"Embedding concurrency decreased to {int(self.limit)}")
+            elif latency is not None:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class EmbeddingBatcher:
+    """
+    Splits embedding work into provider-sized requests and runs them
+    concurrently under an adaptive concurrency limit.
+    """
+
+    def __init__(self, provider: str, embed_fn: Callable[[List[str]], List[List[float]]]):
+        limits = PROVIDER_LIMITS.get(provider, PROVIDER_LIMITS["gemini"])
+        self.embed_fn = embed_fn
+        self.max_items = settings.embedding_batch_max_items or limits["max_items"]
+        self.max_tokens = settings.embedding_batch_max_tokens or limits["max_tokens"]
+        self.max_retries = settings.embedding_max_retries
+        self.limiter = AdaptiveConcurrencyLimiter(
+            initial=min(2, settings.embedding_max_concurrency),
+            maximum=settings.embedding_max_concurrency,
+            target_latency=settings.embedding_target_latency_ms / 1000,
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.embedding_max_concurrency,
+            thread_name_prefix="embedding-batcher",
+        )
+
+    def _plan(self, texts: List[str]) -> List[List[int]]:
+        """Group text indexes into requests within the item and token limits"""
+        batches = []
+        current = []
+        current_tokens = 0
+        for i, text in enumerate(texts):
+            tokens = estimate_tokens(text)
+            if current and (
+                len(current) >= self.max_items
+                or current_tokens + tokens > self.max_tokens
+            ):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _run(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            start = time.monotonic()
+            try:
+                embeddings = self.embed_fn(texts)
+            except Exception as e:
+                throttled = is_rate_limited(e)
+                self.limiter.release(throttled=throttled)
+                if not throttled or attempt == self.max_retries:
+                    raise
+                backoff = 2 ** attempt
+                logger.warning(f"Embedding request rate limited, retrying in {backoff}s")
+                time.sleep(backoff)
+                continue
+            self.limiter.release(latency=time.monotonic() - start)
+            return embeddings
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, preserving input order"""
+        if not texts:
+            return []
+        batches = self._plan(texts)
+        if len(batches) == 1:
+            return self._run(texts)
+
+        logger.info(f"Embedding {len(texts)} texts in {len(batches)} requests")
+        futures = [
+            self._executor.submit(self._run, [texts[i] for i in batch])
+            for batch in batches
+        ]
+        embeddings: List[List[float]] = [None] * len(texts)
+        for batch, future in zip(batches, futures):
+            for i, embedding in zip(batch, future.result()):
+                embeddings[i] = embedding
+        return embeddings
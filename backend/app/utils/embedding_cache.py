@@ -0,0 +1,216 @@
+import array
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Two-tier content-addressed embedding cache.
+
+    Keys are (provider, model, sha256(text)). The first tier is an in-process
+    LRU; the second is shared through Redis so every API replica and Celery
+    worker benefits from embeddings computed elsewhere. Both tiers are bounded
+    by entry count and evict least recently used entries first.
+    """
+
+    def __init__(self, provider: str, model: str):
+        self.namespace = f"emb:{provider}:{model}"
+        self.max_memory_entries = settings.embedding_cache_memory_size
+        self.max_redis_entries = settings.embedding_cache_redis_max_entries
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis: Optional[redis.Redis] = None
+        self._aredis: Optional[aioredis.Redis] = None
+        self.counters = {"memory_hits": 0, "redis_hits": 0, "misses": 0}
+
+    def _get_redis(self) -> Optional[redis.Redis]:
+        if self._redis is None and settings.redis_url:
+            self._redis = redis.Redis.from_url(settings.redis_url)
+        return self._redis
+
+    def _get_aredis(self) -> Optional[aioredis.Redis]:
+        if self._aredis is None and settings.redis_url:
+            self._aredis = aioredis.Redis.from_url(settings.redis_url)
+        return self._aredis
+
+    @staticmethod
+    def _digest(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _redis_key(self, digest: str) -> str:
+        return f"{self.namespace}:{digest}"
+
+    def _remember(self, digest: str, vector: List[float]):
+        with self._lock:
+            self._memory[digest] = vector
+            self._memory.move_to_end(digest)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _memory_lookup(self, digests: List[str]):
+        results: List[Optional[List[float]]] = [None] * len(digests)
+        remote = []
+        with self._lock:
+            for i, digest in enumerate(digests):
+                vector = self._memory.get(digest)
+                if vector is not None:
+                    self._memory.move_to_end(digest)
+                    results[i] = vector
+                    self.counters["memory_hits"] += 1
+                else:
+                    remote.append(i)
+        return results, remote
+
+    def _merge_remote(self, digests, results, remote, found: Dict[str, List[float]]):
+        for i in remote:
+            vector = found.get(digests[i])
+            if vector is not None:
+                results[i] = vector
+                self._remember(digests[i], vector)
+                self.counters["redis_hits"] += 1
+            else:
+                self.counters["misses"] += 1
+        return results
+
+    def _prepare_set(self, texts: List[str], vectors: List[List[float]]) -> Dict[str, List[float]]:
+        entries = {}
+        for text, vector in zip(texts, vectors):
+            digest = self._digest(text)
+            self._remember(digest, list(vector))
+            entries[digest] = vector
+        return entries
+
+    def _queue_touch(self, pipe, digests: List[str], raw) -> Dict[str, List[float]]:
+        found = {}
+        now = time.time()
+        for digest, value in zip(digests, raw):
+            if value is not None:
+                found[digest] = array.array("f", value).tolist()
+                # Refresh recency for LRU eviction
+                pipe.zadd(f"{self.namespace}:lru", {digest: now})
+        return found
+
+    def _queue_set(self, pipe, entries: Dict[str, List[float]]):
+        now = time.time()
+        lru_key = f"{self.namespace}:lru"
+        for digest, vector in entries.items():
+            pipe.set(
+                self._redis_key(digest),
+                array.array("f", vector).tobytes(),
+                ex=settings.embedding_cache_ttl_seconds,
+            )
+            pipe.zadd(lru_key, {digest: now})
+        pipe.zcard(lru_key)
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Look up embeddings for texts; misses are returned as None"""
+        digests = [self._digest(text) for text in texts]
+        results, remote = self._memory_lookup(digests)
+        if remote:
+            found = self._redis_get([digests[i] for i in remote])
+            self._merge_remote(digests, results, remote, found)
+        return results
+
+    def set_many(self, texts: List[str], vectors: List[List[float]]):
+        """Store embeddings in both tiers"""
+        self._redis_set(self._prepare_set(texts, vectors))
+
+    async def aget_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Async variant of get_many"""
+        digests = [self._digest(text) for text in texts]
+        results, remote = self._memory_lookup(digests)
+        if remote:
+            found = await self._aredis_get([digests[i] for i in remote])
+            self._merge_remote(digests, results, remote, found)
+        return results
+
+    async def aset_many(self, texts: List[str], vectors: List[List[float]]):
+        """Async variant of set_many"""
+        await self._aredis_set(self._prepare_set(texts, vectors))
+
+    def _redis_get(self, digests: List[str]) -> Dict[str, List[float]]:
+        client = self._get_redis()
+        if client is None:
+            return {}
+        try:
+            raw = client.mget([self._redis_key(digest) for digest in digests])
+            pipe = client.pipeline(transaction=False)
+            found = self._queue_touch(pipe, digests, raw)
+            pipe.execute()
+            return found
+        except redis.RedisError as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+            return {}
+
+    async def _aredis_get(self, digests: List[str]) -> Dict[str, List[float]]:
+        client = self._get_aredis()
+        if client is None:
+            return {}
+        try:
+            raw = await client.mget([self._redis_key(digest) for digest in digests])
+            pipe = client.pipeline(transaction=False)
+            found = self._queue_touch(pipe, digests, raw)
+            await pipe.execute()
+            return found
+        except redis.RedisError as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+            return {}
+
+    def _redis_set(self, entries: Dict[str, List[float]]):
+        client = self._get_redis()
+        if client is None or not entries:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            self._queue_set(pipe, entries)
+            size = pipe.execute()[-1]
+
+            overflow = size - self.max_redis_entries
+            if overflow > 0:
+                evicted = client.zpopmin(f"{self.namespace}:lru", overflow)
+                if evicted:
+                    client.delete(
+                        *(self._redis_key(digest.decode()) for digest, _ in evicted)
+                    )
+        except redis.RedisError as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    async def _aredis_set(self, entries: Dict[str, List[float]]):
+        client = self._get_aredis()
+        if client is None or not entries:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            self._queue_set(pipe, entries)
+            size = (await pipe.execute())[-1]
+
+            overflow = size - self.max_redis_entries
+            if overflow > 0:
+                evicted = await client.zpopmin(f"{self.namespace}:lru", overflow)
+                if evicted:
+                    await client.delete(
+                        *(self._redis_key(digest.decode()) for digest, _ in evicted)
+                    )
+        except redis.RedisError as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process"""
+        lookups = sum(self.counters.values())
+        hits = self.counters["memory_hits"] + self.counters["redis_hits"]
+        return {
+            **self.counters,
+            "memory_entries": len(self._memory),
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
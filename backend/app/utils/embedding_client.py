@@ -1,33 +1,107 @@
 import logging
 from app.config import settings
-from google import genai
-from openai import OpenAI
+from app.utils.embedding_cache import EmbeddingCache
+from app.utils.embedding_batcher import EmbeddingBatcher
 from typing import List
 from dotenv import load_dotenv
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Known output dimensions, so startup does not need a probe embedding
+EMBEDDING_DIMENSIONS = {
+    ("gemini", "text-embedding-004"): 768,
+    ("gemini", "gemini-embedding-001"): 3072,
+    ("openai", "text-embedding-3-small"): 1536,
+    ("openai", "text-embedding-3-large"): 3072,
+    ("openai", "text-embedding-ada-002"): 1536,
+}
+
 
 class EmbeddingClient:
-    def __init__(self, provider: str = None):
+    def __init__(self, provider: str = None, model: str = None):
         self.provider = provider or settings.embedding_provider
-        self._initialize_client()
+        self._initialize_client(model)
+        self.cache = (
+            EmbeddingCache(self.provider, self.model_name)
+            if settings.embedding_cache_enabled
+            else None
+        )
+        self.batcher = EmbeddingBatcher(self.provider, self._embed_batch)
 
-    def _initialize_client(self):
+    def _initialize_client(self, model: str = None):
+        # Provider SDKs are imported lazily; they dominate import time
         if self.provider == "gemini":
+            from google import genai
+
             if not settings.gemini_api_key:
                 raise ValueError("Gemini API key not available")
             self.client = genai.Client(api_key=settings.gemini_api_key)
+            self.model_name = model or settings.gemini_embedding_model
         elif self.provider == "openai":
+            from openai import OpenAI, AsyncOpenAI
+
             if not settings.openai_api_key:
                 raise ValueError("OpenAI API key not available")
             self.client = OpenAI(api_key=settings.openai_api_key)
+            self.async_client = AsyncOpenAI(api_key=settings.openai_api_key)
+            self.model_name = model or settings.openai_embedding_model
         else:
             raise ValueError(f"Unknown embedding provider: {self.provider}")
         logger.info(f"Initialized embedding client: {self.provider}")
 
+    @property
+    def dimension(self) -> int:
+        """Embedding size from settings or the registry, probing only as a fallback"""
+        # The override describes the configured model, not one being migrated from
+        configured = settings.get_embedding_model(self.provider)
+        if settings.embedding_dimension and self.model_name == configured:
+            return settings.embedding_dimension
+        known = EMBEDDING_DIMENSIONS.get((self.provider, self.model_name))
+        if known:
+            return known
+        logger.info(f"Unknown dimension for {self.provider}/{self.model_name}, probing")
+        return len(self.embed_text("test"))
+
     def embed_text(self, text: str) -> List[float]:
+        if self.cache is not None:
+            cached = self.cache.get_many([text])[0]
+            if cached is not None:
+                return cached
+            embedding = self._embed_text(text)
+            self.cache.set_many([text], [embedding])
+            return embedding
+        return self._embed_text(text)
+
+    async def aembed_text(self, text: str) -> List[float]:
+        """Embed a single text without blocking the event loop"""
+        if self.cache is not None:
+            cached = (await self.cache.aget_many([text]))[0]
+            if cached is not None:
+                return cached
+        embedding = await self._aembed_text(text)
+        if self.cache is not None:
+            await self.cache.aset_many([text], [embedding])
+        return embedding
+
+    async def _aembed_text(self, text: str) -> List[float]:
+        try:
+            if self.provider == "gemini":
+                result = await self.client.aio.models.embed_content(
+                    model=self.model_name,
+                    contents=text,
+                )
+                return result.embeddings[0].values
+            elif self.provider == "openai":
+                response = await self.async_client.embeddings.create(
+                    input=text, model=self.model_name
+                )
+                return response.data[0].embedding
+        except Exception as e:
+            logger.error(f"Error generating {self.provider} Embedding: {e}")
+            raise
+
+    def _embed_text(self, text: str) -> List[float]:
         if self.provider == "gemini":
             return self._gemini_embed(text)
         elif self.provider == "openai":
@@ -36,9 +110,9 @@ class EmbeddingClient:
     def _openai_embed(self, text: str) -> List[float]:
         try:
             response = self.client.embeddings.create(
-                input=text, model=settings.openai_embedding_model
+                input=text, model=self.model_name
             )
-            return response.data[0]["embedding"]
+            return response.data[0].embedding
         except Exception as e:
             logger.error(f"Error generating OpenAI Embedding: {e}")
             raise
@@ -47,7 +121,7 @@ class EmbeddingClient:
     def _gemini_embed(self, text: str) -> List[float]:
         try:
             result = self.client.models.embed_content(
-                model=settings.gemini_embedding_model,
+                model=self.model_name,
                 contents=text,
             )
             # FIX: extract values correctly
@@ -58,12 +132,49 @@ class EmbeddingClient:
 
 
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        if self.cache is None:
+            return self.batcher.embed(texts)
+
+        embeddings = self.cache.get_many(texts)
+        # Only unique cache misses go over the network
+        missing = list(dict.fromkeys(
+            text for text, emb in zip(texts, embeddings) if emb is None
+        ))
+        if missing:
+            fetched = dict(zip(missing, self.batcher.embed(missing)))
+            self.cache.set_many(missing, [fetched[text] for text in missing])
+            embeddings = [
+                emb if emb is not None else fetched[text]
+                for text, emb in zip(texts, embeddings)
+            ]
+        return embeddings
+
+    def embed_documents(self, documents: List[List[str]]) -> List[List[List[float]]]:
+        """
+        Embed the chunks of several documents together
+
+        Chunks from short documents are coalesced into shared provider
+        requests; the result is split back per document.
+        """
+        flat = [text for chunks in documents for text in chunks]
+        embeddings = self.embed_batch(flat)
+        results = []
+        offset = 0
+        for chunks in documents:
+            results.append(embeddings[offset:offset + len(chunks)])
+            offset += len(chunks)
+        return results
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
         if self.provider == "gemini":
             result = self.client.models.embed_content(
-                model=settings.gemini_embedding_model,
+                model=self.model_name,
                 contents=texts,
             )
             # FIX: extract values from each embedding
             return [emb.values for emb in result.embeddings]
         elif self.provider == "openai":
-            return self._openai_embed(texts)
+            response = self.client.embeddings.create(
+                input=texts, model=self.model_name
+            )
+            return [item.embedding for item in response.data]
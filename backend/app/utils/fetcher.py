@@ -0,0 +1,297 @@
+import asyncio
+import codecs
+import logging
+import os
+import re
+import threading
+from typing import Collection, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from app.config import settings
+from app.utils.politeness import HostPolicy
+
+logger = logging.getLogger(__name__)
+
+# Browsers look for <meta charset> in the first 1024 bytes only
+ENCODING_PRESCAN_BYTES = 1024
+META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_.:-]+)""", re.IGNORECASE)
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+# RFC 9309 asks crawlers to parse at least the first 500 KiB of robots.txt
+ROBOTS_MAX_BYTES = 500 * 1024
+ROBOTS_CONTENT_TYPES = frozenset(("text/plain", "text/html"))
+
+
+class FetchAborted(Exception):
+    """A download stopped on purpose (size cap, content type); retrying will not help"""
+
+
+def _content_type(headers: httpx.Headers) -> str:
+    return headers.get("content-type", "").split(";")[0].strip().lower()
+
+
+def _encoding(declared: Optional[str], head: bytes) -> str:
+    """Body encoding from the BOM, the Content-Type charset or a <meta charset>"""
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    match = META_CHARSET.search(head[:ENCODING_PRESCAN_BYTES])
+    sniffed = match.group(1).decode("ascii") if match else None
+    for candidate in (declared, sniffed):
+        if candidate:
+            try:
+                return codecs.lookup(candidate).name
+            except LookupError:
+                continue
+    return "utf-8"
+
+
+class AsyncFetcher:
+    """
+    Shared keep-alive HTTP client with per-host concurrency limits.
+
+    All requests run on a private event loop owned by a daemon thread, so the
+    same connection pool is reused across Celery tasks in a worker process and
+    synchronous callers can still keep many fetches in flight at once.
+    Request rates, robots.txt and circuit breaking are enforced across
+    workers by a HostPolicy (see app.utils.politeness).
+    """
+
+    def __init__(self):
+        self.headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        }
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._policy = HostPolicy(self._fetch_robots)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the fetch loop lazily (and again after a fork)"""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Celery prefork children inherit a dead loop thread
+                self._reset()
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="async-fetcher", daemon=True
+                )
+                self._thread.start()
+                logger.info("Started async fetch loop")
+            return self._loop
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                follow_redirects=True,
+                timeout=httpx.Timeout(
+                    connect=settings.fetch_connect_timeout,
+                    read=settings.fetch_read_timeout,
+                    write=settings.fetch_read_timeout,
+                    pool=None,
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.fetch_max_connections,
+                    max_keepalive_connections=settings.fetch_max_connections,
+                    keepalive_expiry=settings.fetch_keepalive_expiry,
+                ),
+            )
+        return self._client
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc.lower()
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(settings.fetch_max_connections_per_host)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    @staticmethod
+    def _check_headers(
+        response: httpx.Response,
+        content_types: Optional[Collection[str]],
+        max_bytes: int
+    ):
+        """Reject a response before its body is read"""
+        content_type = _content_type(response.headers)
+        if content_types is None:
+            content_types = {
+                allowed.strip() for allowed in settings.fetch_allowed_content_types.split(",")
+            }
+        # A missing Content-Type is left to extraction to judge
+        if content_type and content_type not in content_types:
+            raise FetchAborted(f"Aborted: unsupported content type {content_type}")
+        length = response.headers.get("content-length")
+        if length and length.isdigit() and int(length) > max_bytes:
+            raise FetchAborted(f"Aborted: Content-Length {length} exceeds {max_bytes} bytes")
+
+    @staticmethod
+    async def _read_text(response: httpx.Response, max_bytes: int) -> str:
+        """
+        Stream and decode the body, aborting once it passes max_bytes
+
+        The limit applies to decompressed bytes, so compressed bombs are
+        caught too. Decoding starts once the encoding prescan window has
+        arrived; only decoded text is kept.
+        """
+        parts = []
+        head = b""
+        decoder = None
+        size = 0
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if size > max_bytes:
+                raise FetchAborted(f"Aborted: body exceeds {max_bytes} bytes")
+            if decoder is None:
+                head += chunk
+                if len(head) < ENCODING_PRESCAN_BYTES:
+                    continue
+                chunk, head = head, b""
+                encoding = _encoding(response.charset_encoding, chunk)
+                decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            parts.append(decoder.decode(chunk))
+        if decoder is None:
+            encoding = _encoding(response.charset_encoding, head)
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        parts.append(decoder.decode(head, final=True))
+        return "".join(parts)
+
+    async def _fetch(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        content_types: Optional[Collection[str]] = None,
+        max_bytes: Optional[int] = None,
+        polite: bool = True
+    ) -> Dict:
+        max_bytes = max_bytes or settings.fetch_max_bytes
+        polite = polite and settings.politeness_enabled
+        if polite:
+            await self._policy.admit(url)
+        async with self._host_semaphore(url):
+            try:
+                async with self._get_client().stream("GET", url, headers=headers) as response:
+                    # 304 answers a conditional request; there is no body to read
+                    if response.status_code != 304:
+                        response.raise_for_status()
+                        self._check_headers(response, content_types, max_bytes)
+                        content = await self._read_text(response, max_bytes)
+                    else:
+                        content = ""
+            except Exception as e:
+                if polite:
+                    await self._policy.record(url, e)
+                raise
+            if polite:
+                await self._policy.record(url, None)
+            return {
+                "url": url,
+                "final_url": str(response.url),
+                "status_code": response.status_code,
+                "headers": dict(response.headers),
+                "content": content,
+                "elapsed_ms": int(response.elapsed.total_seconds() * 1000),
+            }
+
+    async def _fetch_robots(self, url: str) -> Tuple[int, str]:
+        """
+        Status and body of a robots.txt, for the HostPolicy
+
+        Only transport errors raise. The policy reserves the request in the
+        host's rate limit itself, so this fetch bypasses it.
+        """
+        try:
+            response = await self._fetch(
+                url, content_types=ROBOTS_CONTENT_TYPES, max_bytes=ROBOTS_MAX_BYTES, polite=False
+            )
+        except httpx.HTTPStatusError as e:
+            return e.response.status_code, ""
+        except FetchAborted as e:
+            logger.warning(f"Ignoring {url}: {e}")
+            return 200, ""
+        return response["status_code"], response["content"]
+
+    async def _fetch_many(self, urls: List[str]) -> List[Dict]:
+        results = await asyncio.gather(
+            *(self._fetch(url) for url in urls), return_exceptions=True
+        )
+        formatted = []
+        for url, result in zip(urls, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Failed to fetch {url}: {result}")
+                formatted.append({"url": url, "error": result})
+            else:
+                formatted.append(result)
+        return formatted
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def fetch(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        content_types: Optional[Collection[str]] = None,
+        max_bytes: Optional[int] = None
+    ) -> Dict:
+        """
+        Fetch a single URL, blocking the caller
+
+        content_types and max_bytes override FETCH_ALLOWED_CONTENT_TYPES and
+        FETCH_MAX_BYTES, e.g. for sitemaps.
+
+        Raises:
+            httpx.HTTPError: On connection, timeout or HTTP status errors
+            FetchAborted: When the body is too large or not text
+            HostThrottled, HostUnavailable, RobotsDisallowed: When the
+                host's politeness policy holds the request back
+        """
+        return self._submit(self._fetch(url, headers, content_types, max_bytes)).result()
+
+    def fetch_many(self, urls: List[str]) -> List[Dict]:
+        """
+        Fetch many URLs concurrently, blocking until all have finished
+
+        Returns:
+            One result per URL, in input order. Failed fetches carry the
+            exception under "error" instead of a response body.
+        """
+        return self._submit(self._fetch_many(urls)).result()
+
+    async def afetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> Dict:
+        """Async variant of fetch for callers running on another event loop"""
+        return await asyncio.wrap_future(self._submit(self._fetch(url, headers)))
+
+    async def afetch_many(self, urls: List[str]) -> List[Dict]:
+        """Async variant of fetch_many for callers running on another event loop"""
+        return await asyncio.wrap_future(self._submit(self._fetch_many(urls)))
+
+    def close(self):
+        """Close pooled connections and stop the fetch loop"""
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                return
+            loop = self._loop
+            if self._client is not None:
+                asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result()
+            asyncio.run_coroutine_threadsafe(self._policy.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join(timeout=5)
+            loop.close()
+            self._reset()
+
+
+fetcher = AsyncFetcher()
@@ -1,7 +1,5 @@
-from typing import AsyncIterator, Optional, List
-from google import genai
-from openai import AsyncOpenAI
-from anthropic import AsyncAnthropic
+from typing import AsyncIterator, Dict, Optional, List
+import httpx
 from app.config import settings
 import logging
 
@@ -17,28 +15,60 @@ class LLMClient:
 
     def _initialize_client(self):
         """Initialize the appropriate LLM client"""
+        # Provider SDKs are imported lazily; they dominate import time
         if self.provider == "gemini":
+            from google import genai
+
             if not settings.gemini_api_key:
                 raise ValueError("Gemini API key not configured")
             self.model_name = settings.gemini_model
             self.client = genai.Client(api_key=settings.gemini_api_key)
 
         elif self.provider == "openai":
+            from openai import AsyncOpenAI
+
             if not settings.openai_api_key:
                 raise ValueError("OpenAI API key not configured")
             self.model_name = settings.openai_model
-            self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+            self.client = AsyncOpenAI(
+                api_key=settings.openai_api_key, http_client=self._http_client()
+            )
 
         elif self.provider == "anthropic":
+            from anthropic import AsyncAnthropic
+
             if not settings.anthropic_api_key:
                 raise ValueError("Anthropic API key not configured")
             self.model_name = settings.anthropic_model
-            self.client = AsyncAnthropic(api_key=settings.anthropic_api_key)
+            self.client = AsyncAnthropic(
+                api_key=settings.anthropic_api_key, http_client=self._http_client()
+            )
         else:
             raise ValueError(f"Unknown provider: {self.provider}")
 
         logger.info(f"Initialized LLM client: {self.provider} - {self.model_name}")
 
+    def _http_client(self) -> httpx.AsyncClient:
+        """Long-lived keep-alive (HTTP/2 where supported) connection pool"""
+        return httpx.AsyncClient(
+            http2=settings.llm_http2,
+            timeout=httpx.Timeout(settings.llm_timeout, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_connections,
+                keepalive_expiry=settings.llm_keepalive_expiry,
+            ),
+        )
+
+    async def aclose(self):
+        """Close the provider's connection pool"""
+        if self.provider == "gemini":
+            aclose = getattr(self.client.aio, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        else:
+            await self.client.close()
+
     async def generate_streaming(
         self,
         prompt: str,
@@ -89,7 +119,9 @@ Answer (Markdown or Plain Text only):
 
         try:
             if self.provider == "gemini":
-                async for chunk in self._gemini_stream(full_prompt):
+                async for chunk in self._gemini_stream(
+                    full_prompt, max_tokens, temperature
+                ):
                     yield chunk
 
             elif self.provider == "openai":
@@ -108,17 +140,18 @@ Answer (Markdown or Plain Text only):
             logger.error(f"Error in streaming generation: {e}")
             yield f"Error generating response: {str(e)}"
 
-    async def _gemini_stream(self, prompt: str) -> AsyncIterator[str]:
+    async def _gemini_stream(
+        self, prompt: str, max_tokens: int, temperature: float
+    ) -> AsyncIterator[str]:
         """Stream from Gemini"""
-        # Use the synchronous method without await
-        stream = self.client.models.generate_content_stream(
+        # The aio surface keeps token waits off the event loop
+        stream = await self.client.aio.models.generate_content_stream(
             model=self.model_name,
             contents=prompt,
-            config={"max_output_tokens": settings.max_tokens},
+            config={"max_output_tokens": max_tokens, "temperature": temperature},
         )
 
-        # Iterate synchronously over the stream
-        for event in stream:
+        async for event in stream:
             if hasattr(event, "text") and event.text:
                 yield event.text
 
@@ -150,3 +183,44 @@ Answer (Markdown or Plain Text only):
         ) as stream:
             async for text in stream.text_stream:
                 yield text
+
+
+class LLMClientRegistry:
+    """
+    Process-wide LLM clients, one per provider.
+
+    Clients are created once (at API startup for every configured provider)
+    and shared by all requests, so answers reuse warm connections instead of
+    paying TCP+TLS setup before the first token.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, LLMClient] = {}
+
+    def startup(self):
+        for provider, api_key in (
+            ("gemini", settings.gemini_api_key),
+            ("openai", settings.openai_api_key),
+            ("anthropic", settings.anthropic_api_key),
+        ):
+            if api_key:
+                self.get(provider)
+
+    def get(self, provider: Optional[str] = None) -> LLMClient:
+        provider = provider or settings.get_available_llm_provider()
+        client = self._clients.get(provider)
+        if client is None:
+            client = LLMClient(provider)
+            self._clients[provider] = client
+        return client
+
+    async def aclose(self):
+        for client in self._clients.values():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing {client.provider} client: {e}")
+        self._clients.clear()
+
+
+llm_clients = LLMClientRegistry()
@@ -0,0 +1,62 @@
+import queue
+import threading
+from itertools import islice
+from typing import Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Consecutive lists of up to size items"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def prefetch(items: Iterable[T], depth: int) -> Iterator[T]:
+    """
+    Produce items in a background thread, at most depth ahead of the consumer
+
+    The bounded queue is the only buffer between the two, so memory does not
+    grow with the number of items. A producer exception is re-raised in the
+    consumer; closing the consumer early stops the producer.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+
+    def put(entry) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put((item, None)):
+                    return
+            put((_DONE, None))
+        except BaseException as e:
+            put((_DONE, e))
+
+    thread = threading.Thread(target=produce, name="prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
@@ -0,0 +1,290 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+import redis
+import redis.asyncio as aioredis
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# GCRA token bucket and circuit breaker check in one round trip.
+# KEYS: bucket (theoretical arrival time, ms), circuit (exists while open)
+# ARGV: emission interval ms, burst, longest wait ms worth reserving
+# Returns {0, wait_ms} after reserving a slot, {1, wait_ms} when the wait is
+# too long to reserve, {2, ms} while the circuit is open
+ADMIT_SCRIPT = """
+local open = redis.call('PTTL', KEYS[2])
+if open > 0 then
+    return {2, open}
+end
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local wait = tat - (tonumber(ARGV[2]) - 1) * interval - now
+if wait < 0 then
+    wait = 0
+end
+if wait > tonumber(ARGV[3]) then
+    return {1, wait}
+end
+redis.call('SET', KEYS[1], tat + interval, 'PX', tat + interval - now + 60000)
+return {0, wait}
+"""
+
+# Consecutive failures open the circuit; after the cooldown one trial request
+# goes through, and a single further failure opens it again
+# KEYS: failures, circuit   ARGV: threshold, window ms, cooldown ms
+FAILURE_SCRIPT = """
+local failures = redis.call('INCR', KEYS[1])
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+if failures >= tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[2], 1, 'PX', ARGV[3])
+    redis.call('SET', KEYS[1], tonumber(ARGV[1]) - 1, 'PX', tonumber(ARGV[2]) + tonumber(ARGV[3]))
+    return 1
+end
+return 0
+"""
+
+# Parsed robots.txt files kept per process
+ROBOTS_MEMORY_ENTRIES = 10000
+
+
+# How a failed fetch should be handled by the ingestion pipeline
+PERMANENT = "permanent"  # fail now, another attempt would fail the same way
+DEFERRED = "deferred"  # requeue after retry_after without using an attempt
+TRANSIENT = "transient"  # retry with backoff
+
+
+class HostThrottled(Exception):
+    """The host's request budget is spent for now; try again after retry_after seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class HostUnavailable(Exception):
+    """The host keeps failing (open circuit, unreachable robots.txt); try again after retry_after seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RobotsDisallowed(Exception):
+    """robots.txt forbids fetching the URL; retrying will not help"""
+
+
+class HostPolicy:
+    """
+    Per-host politeness shared by every worker through Redis
+
+    Before each request: the host's circuit breaker is checked, robots.txt
+    is consulted (cached in Redis for robots_cache_ttl_seconds and parsed
+    once per process), and a slot is reserved in the host's token bucket.
+    The bucket refills at politeness_requests_per_second, slowed to the
+    robots.txt Crawl-delay when there is one. Waits up to
+    politeness_max_wait are slept through; longer ones raise HostThrottled
+    so the caller can defer the page instead of holding a worker. An open
+    circuit raises HostUnavailable. If Redis is unreachable requests go
+    ahead unthrottled.
+
+    Lives on the fetcher's event loop; fetch_robots downloads a robots.txt
+    and returns (status_code, text).
+    """
+
+    def __init__(self, fetch_robots: Callable[[str], Awaitable[Tuple[int, str]]]):
+        self._fetch_robots = fetch_robots
+        self._redis: Optional[aioredis.Redis] = None
+        self._admit = None
+        self._record_failure = None
+        self._robots: "OrderedDict[str, Tuple[float, RobotFileParser]]" = OrderedDict()
+        self._robots_loading: Dict[str, asyncio.Task] = {}
+
+    def _get_redis(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.Redis.from_url(settings.redis_url)
+            self._admit = self._redis.register_script(ADMIT_SCRIPT)
+            self._record_failure = self._redis.register_script(FAILURE_SCRIPT)
+        return self._redis
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlsplit(url).netloc.lower()
+
+    async def admit(self, url: str):
+        """
+        Wait until url may be fetched
+
+        Raises:
+            HostThrottled: The wait for a slot would be too long
+            HostUnavailable: The circuit is open or robots.txt is unreachable
+            RobotsDisallowed: robots.txt forbids the URL
+        """
+        try:
+            self._get_redis()
+            delay = None
+            if settings.robots_enabled:
+                robots = await self._robots_for(url)
+                if not robots.can_fetch(settings.robots_user_agent, url):
+                    raise RobotsDisallowed(f"Blocked by robots.txt: {url}")
+                delay = robots.crawl_delay(settings.robots_user_agent)
+            await self._reserve(self._host(url), delay)
+        except redis.RedisError as e:
+            logger.warning(f"Politeness checks skipped for {url}: {e}")
+
+    async def _reserve(self, host: str, crawl_delay: Optional[float] = None):
+        interval = 1.0 / settings.politeness_requests_per_second
+        burst = settings.politeness_burst
+        if crawl_delay:
+            interval = max(interval, min(float(crawl_delay), settings.robots_max_crawl_delay))
+            burst = 1
+        status, wait_ms = await self._admit(
+            keys=[f"host:{host}:bucket", f"host:{host}:circuit"],
+            args=[int(interval * 1000), burst, int(settings.politeness_max_wait * 1000)],
+        )
+        if status == 2:
+            raise HostUnavailable(f"Circuit open for {host}", wait_ms / 1000)
+        if status == 1:
+            raise HostThrottled(f"Deferred: rate limit for {host}", wait_ms / 1000)
+        if wait_ms:
+            await asyncio.sleep(wait_ms / 1000)
+
+    async def _robots_for(self, url: str) -> RobotFileParser:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc.lower()}"
+        cached = self._robots.get(origin)
+        if cached and cached[0] > time.monotonic():
+            self._robots.move_to_end(origin)
+            return cached[1]
+        # Concurrent fetches of a new host share one robots.txt download
+        task = self._robots_loading.get(origin)
+        if task is None:
+            task = asyncio.ensure_future(self._load_robots(origin))
+            self._robots_loading[origin] = task
+            task.add_done_callback(lambda _: self._robots_loading.pop(origin, None))
+        return await task
+
+    async def _load_robots(self, origin: str) -> RobotFileParser:
+        key = f"robots:{origin}"
+        text = await self._redis.get(key)
+        if text is not None:
+            text = text.decode("utf-8", errors="replace")
+        else:
+            await self._reserve(self._host(origin))
+            try:
+                status, text = await self._fetch_robots(f"{origin}/robots.txt")
+            except httpx.TransportError as e:
+                status, text = None, str(e)
+            # RFC 9309: while robots.txt is unreachable nothing may be crawled
+            if status is None or status == 429 or status >= 500:
+                await self.record(origin, None, failed=True)
+                reason = text if status is None else f"status {status}"
+                raise HostUnavailable(
+                    f"robots.txt unreachable for {origin}: {reason}",
+                    settings.circuit_failure_window_seconds
+                )
+            await self.record(origin, None, failed=False)
+            # Any other error status means there are no rules
+            text = text if status < 400 else ""
+            await self._redis.set(key, text, ex=settings.robots_cache_ttl_seconds)
+
+        robots = RobotFileParser()
+        robots.parse(text.splitlines())
+        self._robots[origin] = (time.monotonic() + settings.robots_cache_ttl_seconds, robots)
+        while len(self._robots) > ROBOTS_MEMORY_ENTRIES:
+            self._robots.popitem(last=False)
+        return robots
+
+    async def record(self, url: str, error: Optional[BaseException], failed: Optional[bool] = None):
+        """
+        Feed a request outcome to the host's circuit breaker
+
+        Only failures of the host itself count: connection errors,
+        timeouts, 429 and 5xx responses. Any other response closes the
+        failure streak.
+        """
+        if failed is None:
+            failed = error is not None and host_failure(error)
+        host = self._host(url)
+        try:
+            if failed:
+                opened = await self._record_failure(
+                    keys=[f"host:{host}:failures", f"host:{host}:circuit"],
+                    args=[
+                        settings.circuit_failure_threshold,
+                        settings.circuit_failure_window_seconds * 1000,
+                        settings.circuit_cooldown_seconds * 1000,
+                    ],
+                )
+                if opened:
+                    logger.warning(f"Circuit opened for {host}")
+            else:
+                await self._get_redis().delete(f"host:{host}:failures")
+        except redis.RedisError as e:
+            logger.warning(f"Could not record outcome for {host}: {e}")
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+def host_failure(error: BaseException) -> bool:
+    """Whether an error says the host is struggling, rather than the page being bad"""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+def retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds asked for by a Retry-After header, given as seconds or an HTTP date"""
+    value = response.headers.get("retry-after", "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(error: BaseException) -> Tuple[str, Optional[float]]:
+    """
+    How the pipeline should treat a failed fetch
+
+    Returns:
+        (PERMANENT, DEFERRED or TRANSIENT, seconds to wait before trying
+        again or None). Client errors other than timeouts and rate limits
+        are permanent, as are aborted downloads and robots.txt refusals.
+    """
+    # Imported here: the fetcher imports this module
+    from app.utils.fetcher import FetchAborted
+
+    if isinstance(error, HostThrottled):
+        return DEFERRED, error.retry_after
+    if isinstance(error, HostUnavailable):
+        return TRANSIENT, error.retry_after
+    if isinstance(error, (FetchAborted, RobotsDisallowed, httpx.InvalidURL, httpx.UnsupportedProtocol)):
+        return PERMANENT, None
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        if status in (429, 503):
+            return TRANSIENT, retry_after(error.response)
+        if 400 <= status < 500 and status not in (408, 425):
+            return PERMANENT, None
+    return TRANSIENT, None
@@ -0,0 +1,64 @@
+import re
+import zlib
+from collections import Counter
+from typing import List, Tuple
+
+from app.config import settings
+
+# Identifiers such as ERR-4012, SKU_88-B, v2.1.3 or snake_case names are kept
+# whole; their alphanumeric parts are indexed as well
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[._\-/][a-z0-9]+)*")
+PART_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that "
+    "the this to was were what when where which who why will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        parts = PART_PATTERN.findall(token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part not in STOPWORDS)
+    return tokens
+
+
+def _index(token: str) -> int:
+    # crc32 is stable across processes, unlike hash()
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def _sparse(weights: Counter) -> Tuple[List[int], List[float]]:
+    merged = Counter()
+    for token, weight in weights.items():
+        merged[_index(token)] += weight
+    indices = sorted(merged)
+    return indices, [float(merged[i]) for i in indices]
+
+
+def encode_document(text: str) -> Tuple[List[int], List[float]]:
+    """
+    BM25 term-frequency weights for a chunk
+
+    Qdrant applies the IDF part at query time (Modifier.IDF on the sparse
+    vector), so only the saturated, length-normalized TF is stored here.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return [], []
+    k1, b = settings.bm25_k1, settings.bm25_b
+    norm = k1 * (1 - b + b * len(tokens) / settings.bm25_avg_doc_tokens)
+    counts = Counter(tokens)
+    return _sparse(Counter({
+        token: tf * (k1 + 1) / (tf + norm) for token, tf in counts.items()
+    }))
+
+
+def encode_query(text: str) -> Tuple[List[int], List[float]]:
+    """Binary weights for the unique query terms"""
+    return _sparse(Counter(dict.fromkeys(tokenize(text), 1.0)))
@@ -0,0 +1,191 @@
+import re
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+from app.config import settings
+
+DEFAULT_SEPARATORS = ("\n\n", "\n", ". ", " ", "")
+
+# Words and individual punctuation marks, a close proxy for subword tokens
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+class Chunk(NamedTuple):
+    text: str
+    start: int  # text == source[start:end]
+    end: int
+
+
+def count_tokens(text: str) -> int:
+    return sum(1 for _ in TOKEN_PATTERN.finditer(text))
+
+
+class TextChunker:
+    """
+    Recursive separator splitter
+
+    Same semantics as LangChain's RecursiveCharacterTextSplitter with its
+    defaults (separator kept at the start of the following piece, chunks
+    stripped): text is cut on the first separator that occurs in it, pieces
+    are packed greedily up to chunk_size with chunk_overlap carried over, and
+    only pieces that are still too large are cut again on the next separator.
+    Pieces are kept as boundary offsets into the source with prefix-summed
+    lengths, so packing is a binary search, no intermediate strings are
+    built and every chunk knows where it came from.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int,
+        chunk_overlap: int,
+        separators: Sequence[str] = DEFAULT_SEPARATORS,
+        length_function: Optional[Callable[[str], int]] = None
+    ):
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"chunk_overlap ({chunk_overlap}) is larger than chunk_size ({chunk_size})"
+            )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(separators)
+        self._patterns = {
+            separator: re.compile(re.escape(separator)) for separator in separators if separator
+        }
+        # None measures in characters, straight from the offsets
+        self.length_function = length_function
+
+    @classmethod
+    def from_settings(cls) -> "TextChunker":
+        if settings.chunk_size_unit not in ("characters", "tokens"):
+            raise ValueError(f"Unsupported CHUNK_SIZE_UNIT: {settings.chunk_size_unit}")
+        return cls(
+            chunk_size=settings.chunk_size,
+            chunk_overlap=settings.chunk_overlap,
+            length_function=count_tokens if settings.chunk_size_unit == "tokens" else None
+        )
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk.text for chunk in self.split(text)]
+
+    def split(self, text: str) -> List[Chunk]:
+        chunks = []
+        self._split(text, 0, len(text), self.separators, chunks)
+        return chunks
+
+    def _bounds(self, text: str, start: int, end: int, separator: str) -> List[int]:
+        """
+        Boundaries of the contiguous non-empty pieces of text[start:end]
+
+        Piece k is text[bounds[k]:bounds[k + 1]] and starts with its separator.
+        """
+        matches = self._patterns[separator].finditer(text, start, end)
+        bounds = [start]
+        bounds.extend(match.start() for match in matches)
+        if len(bounds) > 1 and bounds[1] == start:
+            # The text starts with the separator: no empty first piece
+            del bounds[0]
+        bounds.append(end)
+        return bounds
+
+    def _windows(self, text: str, start: int, end: int, chunks: List[Chunk]):
+        """
+        Character-level fallback when sizes are measured in characters
+
+        Packing single characters always yields fixed windows of chunk_size
+        that advance by chunk_size - chunk_overlap, so they are cut directly.
+        """
+        step = self.chunk_size - min(self.chunk_overlap, self.chunk_size - 1)
+        window_start = start
+        while True:
+            window_end = min(window_start + self.chunk_size, end)
+            self._chunk(text, window_start, window_end, chunks)
+            if window_end == end:
+                return
+            window_start += step
+
+    def _split(self, text: str, start: int, end: int, separators: List[str], chunks: List[Chunk]):
+        separator, remaining = separators[-1], []
+        for i, candidate in enumerate(separators):
+            if not candidate:
+                separator = candidate
+                break
+            if text.find(candidate, start, end) != -1:
+                separator, remaining = candidate, separators[i + 1:]
+                break
+
+        if not separator:
+            if self.length_function is None and self.chunk_size > 1:
+                self._windows(text, start, end, chunks)
+                return
+            bounds = range(start, end + 1)
+        else:
+            bounds = self._bounds(text, start, end, separator)
+
+        # cum[k] is the total length of the pieces before piece k
+        if self.length_function is None:
+            cum = bounds
+        else:
+            cum = list(accumulate(
+                (self.length_function(text[a:b]) for a, b in zip(bounds, bounds[1:])),
+                initial=0
+            ))
+
+        # Runs of pieces below chunk_size are packed; larger pieces are split
+        # again with the remaining separators
+        run = 0
+        pieces = len(bounds) - 1
+        for k in range(pieces):
+            if cum[k + 1] - cum[k] < self.chunk_size:
+                continue
+            if run < k:
+                self._merge(text, bounds, cum, run, k, chunks)
+            if remaining:
+                self._split(text, bounds[k], bounds[k + 1], remaining, chunks)
+            else:
+                self._chunk(text, bounds[k], bounds[k + 1], chunks)
+            run = k + 1
+        if run < pieces:
+            self._merge(text, bounds, cum, run, pieces, chunks)
+
+    def _merge(
+        self,
+        text: str,
+        bounds: Sequence[int],
+        cum: Sequence[int],
+        first: int,
+        last: int,
+        chunks: List[Chunk]
+    ):
+        """
+        Pack pieces first..last-1 into chunks, keeping up to chunk_overlap of the tail
+
+        Equivalent to adding pieces one by one and dropping them from the
+        front after each chunk, but both ends of every window are found by
+        binary search over the cumulative lengths.
+        """
+        window, lo = first, first + 1
+        while True:
+            # The first piece that no longer fits behind the window start
+            overflow = bisect_right(cum, cum[window] + self.chunk_size, lo, last + 1) - 1
+            if overflow >= last:
+                break
+            self._chunk(text, bounds[window], bounds[overflow], chunks)
+            # Keep the longest tail that is within chunk_overlap and leaves
+            # room for the overflowing piece
+            room = self.chunk_size - (cum[overflow + 1] - cum[overflow])
+            window = bisect_left(
+                cum, cum[overflow] - min(self.chunk_overlap, room), window, overflow
+            )
+            lo = overflow + 1
+        self._chunk(text, bounds[window], bounds[last], chunks)
+
+    @staticmethod
+    def _chunk(text: str, start: int, end: int, chunks: List[Chunk]):
+        """Append the stripped chunk of text[start:end], if any"""
+        raw = text[start:end]
+        chunk = raw.strip()
+        if chunk:
+            # Only whitespace precedes the first occurrence of chunk[0]
+            start += raw.find(chunk[0])
+            chunks.append(Chunk(chunk, start, start + len(chunk)))
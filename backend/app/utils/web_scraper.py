@@ -1,85 +1,253 @@
-import trafilatura
-from typing import Dict
+from typing import Dict, List, Optional
 import logging
-import requests
-from urllib.parse import urlparse
-from bs4 import BeautifulSoup
+import httpx
+from urllib.parse import urljoin, urlparse
+from app.config import settings
+from app.utils.fetcher import fetcher
+from app.utils.politeness import PERMANENT, classify_error
 
 logger = logging.getLogger(__name__)
 
+# Page metadata returned alongside the content, when present
+METADATA_FIELDS = ("author", "date", "sitename", "description", "language")
 
-class WebScraper:
-    def __init__(self):
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
 
-    def scrape_url(self, url: str) -> Dict[str, str]:
-        try:
-            parsed = urlparse(url)
-            if not parsed.scheme or not parsed.netloc:
-                raise ValueError("Invalid URL")
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            content = trafilatura.extract(
-                response.content,
-                include_links=False,
-                include_images=False,
-                include_tables=True,
-            )
-            if not content:
-                content = self._fallback_extraction(response.content)
+class InsufficientContent(ValueError):
+    """
+    The page parsed but has too little text to index; refetching will not help
 
-            title = self._extract_title(response.content)
+    Carries the page's links when they were requested, since hub pages made
+    of little more than links still matter to a crawl.
+    """
 
-            if not content or len(content.strip()) < 100:
-                raise ValueError("Insufficient content extracted from URL")
+    def __init__(self, message: str, links: Optional[List[str]] = None):
+        super().__init__(message)
+        self.links = links or []
 
-            logger.info(f"Successfully scraped URL: {url} (length: {len(content)})")
-            return {"content": content, "title": title, "url": url}
 
-        except requests.RequestException as e:
+class WebScraper:
+    def scrape_url(
+        self,
+        url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> Dict:
+        """
+        Fetch and extract a page
+
+        When etag/last_modified from a previous fetch are given the request is
+        conditional; an unchanged page returns {"url", "not_modified": True}
+        without a body being downloaded or parsed. Otherwise the extracted
+        page also carries the fetched "html", for archiving.
+
+        Fetch errors propagate unchanged so callers can classify_error them.
+        """
+        try:
+            self._validate_url(url)
+            headers = {}
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+            response = fetcher.fetch(url, headers=headers or None)
+            if response["status_code"] == 304:
+                logger.info(f"Not modified: {url}")
+                return {"url": url, "not_modified": True}
+            return {**self._scraped(url, response), "html": response["content"]}
+
+        except httpx.HTTPError as e:
             logger.error(f"Failed to fetch URL: {str(e)}")
-            raise ValueError(f"Request error: {e}")
+            raise
         except Exception as e:
             logger.error(f"Error scraping url: {e}")
             raise
 
-    def _extract_title(self, html_content):
-        try:
-            soup = BeautifulSoup(html_content, "html.parser")
-            title_tag = soup.find("title")
-            if title_tag:
-                return title_tag.get_text().strip()
-
-            og_title = soup.find("meta", {"property": "og:title"})
-            if og_title and og_title.get("content"):
-                return og_title["content"].strip()
-
-            h1 = soup.find("h1")
-
-            if h1:
-                return h1.get_text().strip()
-
-            return "Untitled Document"
-
-        except Exception as e:
-            logger.error(f"Error extracting title: {e}")
-            return "Untitled Document"
+    def scrape_urls(self, urls: List[str]) -> List[Dict]:
+        """
+        Fetch many URLs concurrently over the shared connection pool
+
+        Returns:
+            One result per URL, in input order. Failed URLs carry an "error"
+            message instead of content.
+        """
+        results = []
+        for response in self.fetch_urls(urls):
+            if "error" in response:
+                results.append(response)
+                continue
+            try:
+                results.append(self.extract_page(response))
+            except Exception as e:
+                logger.error(f"Error scraping url: {e}")
+                results.append({"url": response["url"], "error": str(e)})
+        return results
+
+    def fetch_urls(self, urls: List[str]) -> List[Dict]:
+        """
+        Download many URLs concurrently without parsing them
+
+        Returns:
+            One fetcher response per URL, in input order. Invalid or failed
+            URLs carry an "error" message instead of a body, with its
+            classify_error kind and retry_after.
+        """
+        valid = []
+        results = {}
+        for url in urls:
+            try:
+                self._validate_url(url)
+                valid.append(url)
+            except ValueError as e:
+                results[url] = {"url": url, "error": str(e), "kind": PERMANENT, "retry_after": None}
+
+        for response in fetcher.fetch_many(valid):
+            url = response["url"]
+            error = response.get("error")
+            if error is not None:
+                kind, retry_after = classify_error(error)
+                message = f"Request error: {error}" if isinstance(error, httpx.HTTPError) else str(error)
+                results[url] = {"url": url, "error": message, "kind": kind, "retry_after": retry_after}
+            else:
+                results[url] = response
+
+        return [results[url] for url in urls]
+
+    def extract_page(self, response: Dict, links: bool = False) -> Dict:
+        """
+        Extract a response returned by fetch_urls
+
+        With links, the result also lists the absolute URLs the page links
+        to, resolved against the final URL after redirects.
+        """
+        return self._scraped(response["url"], response, links)
+
+    def extract_html(self, url: str, html: str) -> Dict:
+        """Extract a page that was downloaded earlier, e.g. from the archive"""
+        return self._extract(url, html)
+
+    def extract_links(self, url: str, html: str) -> List[str]:
+        """Links of a page that was downloaded earlier, without extracting its text"""
+        import trafilatura
+
+        tree = trafilatura.load_html(html)
+        return self._extract_links(tree, url) if tree is not None else []
+
+    def _validate_url(self, url: str):
+        parsed = urlparse(url)
+        if not parsed.scheme or not parsed.netloc:
+            raise ValueError("Invalid URL")
+
+    def _scraped(self, url: str, response: Dict, links: bool = False) -> Dict:
+        """Extracted page plus the validators needed for conditional refetches"""
+        link_base = response.get("final_url", url) if links else None
+        result = self._extract(url, response["content"], link_base)
+        headers = {key.lower(): value for key, value in response["headers"].items()}
+        result["etag"] = headers.get("etag")
+        result["last_modified"] = headers.get("last-modified")
+        return result
+
+    def _extract(self, url: str, html_content, link_base: Optional[str] = None) -> Dict:
+        """
+        Content, title and metadata from a single parse of the page
+
+        One lxml tree is shared by trafilatura's metadata and text extraction
+        and by the fallback, instead of each of them parsing the HTML again.
+        With a link_base, links are collected from the same tree as well.
+        """
+        # Extraction libraries are only needed by workers, not the API
+        import trafilatura
+
+        tree = trafilatura.load_html(html_content)
+        if tree is None:
+            raise ValueError("Could not parse HTML")
+
+        # Collected before extraction, which may prune the tree
+        links = self._extract_links(tree, link_base) if link_base else None
+
+        # The extensive date search costs several times the text extraction
+        title = self._extract_title(tree)
+        metadata = trafilatura.extract_metadata(tree, default_url=url, extensive=False)
+        content = trafilatura.extract(
+            tree,
+            url=url,
+            fast=settings.extraction_fast,
+            include_links=False,
+            include_images=False,
+            include_tables=True,
+        )
+        if not content:
+            content = self._fallback_extraction(tree)
+
+        if not content or len(content.strip()) < 100:
+            raise InsufficientContent("Insufficient content extracted from URL", links)
+
+        logger.info(f"Successfully scraped URL: {url} (length: {len(content)})")
+        result = {
+            "content": content,
+            "title": title,
+            "url": url,
+            "metadata": {
+                field: getattr(metadata, field)
+                for field in METADATA_FIELDS
+                if getattr(metadata, field)
+            },
+        }
+        if links is not None:
+            result["links"] = links
+        return result
+
+    def _extract_links(self, tree, base_url: str) -> List[str]:
+        """Absolute targets of the page's links, unless it asks robots not to follow them"""
+        directives = set(
+            " ".join(tree.xpath('//meta[@name="robots"]/@content')).lower().replace(",", " ").split()
+        )
+        if directives & {"nofollow", "none"}:
+            return []
+        base = tree.xpath("//base/@href")
+        if base and base[0].strip():
+            base_url = urljoin(base_url, base[0].strip())
+        links = []
+        for href in tree.xpath('//a[not(contains(@rel, "nofollow"))]/@href'):
+            href = href.strip()
+            if href and not href.startswith("#"):
+                links.append(urljoin(base_url, href))
+        return links
+
+    def _extract_title(self, tree) -> str:
+        title_tag = tree.find(".//title")
+        if title_tag is not None and title_tag.text_content().strip():
+            return title_tag.text_content().strip()
+
+        og_title = tree.xpath('//meta[@property="og:title"]/@content')
+        if og_title and og_title[0].strip():
+            return og_title[0].strip()
+
+        h1 = tree.find(".//h1")
+        if h1 is not None and h1.text_content().strip():
+            return h1.text_content().strip()
+
+        return "Untitled Document"
+
+    def _fallback_extraction(self, tree) -> str:
+        """Text of the main element when trafilatura finds no content"""
+        from lxml import etree
 
-    def _fallback_extraction(self, html_content):
         try:
-            soup = BeautifulSoup(html_content, "html.parser")
-            for element in soup(["script", "style", "nav", "header", "footer"]):
-                element.decompose()
-            main_content = soup.find("main") or soup.find("article") or soup.find("body")
-
-            if main_content:
-                text = main_content.get_text(seperator="\n", strip=True)
-                lines = [line.strip() for line in text.split("\n") if line.strip()]
-                return "\n".join(lines)
-
-            return ""
+            # The tree is not used after this, so it is pruned in place
+            etree.strip_elements(
+                tree, etree.Comment, "script", "style", "nav", "header", "footer",
+                with_tail=False
+            )
+            for tag in ("main", "article", "body"):
+                found = tree.xpath(f"//{tag}")
+                if found:
+                    break
+            else:
+                return ""
+            main_content = found[0]
+            text = "\n".join(main_content.itertext())
+            lines = [line.strip() for line in text.split("\n") if line.strip()]
+            return "\n".join(lines)
         except Exception as e:
             logger.error(f"Fallback extraction failed: {e}")
             return ""
@@ -0,0 +1,131 @@
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import redis
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+FREEZE_KEY = "vector-writes:frozen"
+LEASES_KEY = "vector-writes:leases"
+
+# Take a write lease unless writes are frozen
+# KEYS: freeze flag, leases (sorted set of token -> expiry ms)
+# ARGV: token, lease ttl ms
+ENTER_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+redis.call('ZADD', KEYS[2], now + tonumber(ARGV[2]), ARGV[1])
+return 1
+"""
+
+# Number of leases that have not expired
+# KEYS: leases
+HELD_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+return redis.call('ZCARD', KEYS[1])
+"""
+
+# Lift a freeze only if it is still this migration's
+# KEYS: freeze flag   ARGV: token
+THAW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+end
+return 1
+"""
+
+
+class WriteGate:
+    """
+    Lets a collection migration freeze vector store writes for its final pass.
+
+    Writers hold a lease while they write a batch; leases last
+    chunk_lock_ttl, like the chunk locks taken for the same writes. The
+    migration sets the freeze flag, waits for held leases to drain and then
+    has the live collection to itself until it thaws. The flag expires after
+    migration_freeze_timeout, so a crashed migration cannot stop ingestion
+    for good. When Redis is unreachable, writers go ahead with a warning.
+    """
+
+    def __init__(self):
+        self._redis: Optional[redis.Redis] = None
+
+    def _get_redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(settings.redis_url)
+            self._enter = self._redis.register_script(ENTER_SCRIPT)
+            self._held = self._redis.register_script(HELD_SCRIPT)
+            self._thaw = self._redis.register_script(THAW_SCRIPT)
+        return self._redis
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        """Hold a write lease for the block, first waiting out any freeze"""
+        token = uuid.uuid4().hex
+        ttl_ms = int(settings.chunk_lock_ttl * 1000)
+        deadline = time.monotonic() + settings.migration_freeze_timeout
+        try:
+            self._get_redis()
+            while not self._enter(keys=[FREEZE_KEY, LEASES_KEY], args=[token, ttl_ms]):
+                if time.monotonic() > deadline:
+                    raise TimeoutError("Vector store writes are frozen by a collection migration")
+                time.sleep(0.5)
+        except redis.RedisError as e:
+            logger.warning(f"Write gate unavailable, writing without a lease: {e}")
+            yield
+            return
+        try:
+            yield
+        finally:
+            try:
+                self._redis.zrem(LEASES_KEY, token)
+            except redis.RedisError as e:
+                # The lease expires on its own
+                logger.warning(f"Failed to release write lease: {e}")
+
+    def freeze(self) -> Optional[str]:
+        """
+        Stop new writes and wait for the ones in progress
+
+        Returns:
+            Token for holds() and thaw(), or None when writes could not be
+            frozen or did not drain within chunk_lock_ttl (the freeze is
+            then lifted again)
+        """
+        token = uuid.uuid4().hex
+        ttl_ms = int(settings.migration_freeze_timeout * 1000)
+        try:
+            if not self._get_redis().set(FREEZE_KEY, token, px=ttl_ms, nx=True):
+                return None
+            deadline = time.monotonic() + settings.chunk_lock_ttl
+            while self._held(keys=[LEASES_KEY]):
+                if time.monotonic() > deadline:
+                    self.thaw(token)
+                    return None
+                time.sleep(0.1)
+        except redis.RedisError as e:
+            logger.warning(f"Could not freeze vector store writes: {e}")
+            return None
+        return token
+
+    def holds(self, token: str) -> bool:
+        """Whether the freeze taken with token is still in place"""
+        value = self._get_redis().get(FREEZE_KEY)
+        return value is not None and value.decode() == token
+
+    def thaw(self, token: str):
+        self._get_redis()
+        self._thaw(keys=[FREEZE_KEY], args=[token])
+
+
+write_gate = WriteGate()
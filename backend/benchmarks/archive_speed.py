@@ -0,0 +1,83 @@
+"""
+Write and read throughput and compression ratio of the page archive per zstd level.
+
+Reads every *.html file in a corpus directory of saved pages (see
+benchmarks.extraction_speed --save to build one) and stores each page and
+its extracted text in a throwaway PageArchive, as the extract stage does.
+Reads go through get_text, the path reprocessing takes: "text" is what a
+plain re-chunk reads, "raw + extract" is a reprocess with reextract.
+
+    python -m benchmarks.archive_speed --corpus /tmp/pages --levels 3 6 10 19
+"""
+import argparse
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.config import settings  # noqa: E402
+from app.utils.archive import PageArchive  # noqa: E402
+from app.utils.web_scraper import scraper  # noqa: E402
+
+
+def archive_size(root: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(directory, name))
+        for directory, _, names in os.walk(root)
+        for name in names
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", required=True, help="directory of saved *.html pages")
+    parser.add_argument("--levels", type=int, nargs="+", default=[3, 6, 10, 19])
+    args = parser.parse_args()
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(args.corpus, "*.html"))):
+        with open(path, "rb") as f:
+            html = f.read().decode("utf-8", errors="replace")
+        try:
+            pages.append((html, scraper.extract_html("https://corpus.local/", html)["content"]))
+        except ValueError:
+            continue
+    if not pages:
+        sys.exit(f"No extractable *.html files in {args.corpus}")
+    raw_bytes = sum(len(html.encode()) + len(text.encode()) for html, text in pages)
+    print(f"{len(pages)} pages, {raw_bytes / 1024 ** 2:.1f} MB of HTML and text")
+
+    for level in args.levels:
+        settings.archive_zstd_level = level
+        root = tempfile.mkdtemp()
+        try:
+            archive = PageArchive(root)
+            start = time.perf_counter()
+            keys = [(archive.put(html), archive.put(text)) for html, text in pages]
+            write_s = time.perf_counter() - start
+            ratio = raw_bytes / archive_size(root)
+
+            start = time.perf_counter()
+            for _, text_key in keys:
+                archive.get_text(text_key)
+            text_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for raw_key, _ in keys:
+                scraper.extract_html("https://corpus.local/", archive.get_text(raw_key))
+            reextract_s = time.perf_counter() - start
+        finally:
+            shutil.rmtree(root)
+        print(
+            f"level {level:>2}  ratio {ratio:4.2f}  write {raw_bytes / write_s / 1024 ** 2:6.1f} MB/s  "
+            f"text {len(pages) / text_s:8.0f} pages/s  raw + extract {len(pages) / reextract_s:6.1f} pages/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
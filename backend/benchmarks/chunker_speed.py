@@ -0,0 +1,117 @@
+"""
+Split time of the native TextChunker versus LangChain's RecursiveCharacterTextSplitter.
+
+Pages are generated locally at several sizes from paragraphs of random
+sentences, plus one page with a long unbroken run that forces the
+character-level fallback. Both splitters use the repo's separators and
+CHUNK_SIZE / CHUNK_OVERLAP; the script checks that they return the same
+chunks. Import time of each module is measured in a fresh interpreter.
+LangChain is no longer a dependency, so install it only for this
+comparison (pip install langchain-text-splitters).
+
+    python -m benchmarks.chunker_speed --sizes 100000 1000000 5000000
+"""
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.config import settings  # noqa: E402
+from app.utils.text_chunker import DEFAULT_SEPARATORS, TextChunker  # noqa: E402
+
+WORDS = (
+    "the index stores every chunk with its source and offsets so that "
+    "retrieval can merge neighbouring passages before they reach the model "
+    "while crawlers fetch pages in parallel and respect robots rules"
+).split()
+
+
+def build_page(chars: int, rng: random.Random, unbroken: bool = False) -> str:
+    paragraphs, size = [], 0
+    while size < chars:
+        sentences = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 24))).capitalize()
+            for _ in range(rng.randint(2, 8))
+        ]
+        paragraph = ". ".join(sentences) + "."
+        if rng.random() < 0.3:
+            paragraph = paragraph.replace(". ", ".\n", 1)
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+    if unbroken:
+        paragraphs.insert(len(paragraphs) // 2, "x" * (chars // 10))
+    return "\n\n".join(paragraphs)[:chars]
+
+
+def import_ms(module: str) -> float:
+    output = subprocess.run(
+        [
+            sys.executable, "-c",
+            f"import time; start = time.perf_counter(); import {module}; "
+            "print(time.perf_counter() - start)"
+        ],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1]) * 1000
+
+
+def timed(split, text: str, runs: int):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        chunks = split(text)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    except ImportError:
+        sys.exit("langchain-text-splitters is not installed: pip install langchain-text-splitters")
+
+    for module in ("app.utils.text_chunker", "langchain.text_splitter", "langchain_text_splitters"):
+        try:
+            print(f"import {module}: {import_ms(module):.0f} ms")
+        except subprocess.CalledProcessError:
+            print(f"import {module}: not installed")
+
+    native = TextChunker(settings.chunk_size, settings.chunk_overlap)
+    langchain = RecursiveCharacterTextSplitter(
+        chunk_size=settings.chunk_size,
+        chunk_overlap=settings.chunk_overlap,
+        length_function=len,
+        separators=list(DEFAULT_SEPARATORS)
+    )
+    rng = random.Random(args.seed)
+    print(f"chunk_size {settings.chunk_size}, overlap {settings.chunk_overlap}, median of {args.runs}")
+    for chars in args.sizes:
+        for label, unbroken in (("prose", False), ("unbroken run", True)):
+            text = build_page(chars, rng, unbroken)
+            native_s, native_chunks = timed(native.split_text, text, args.runs)
+            langchain_s, langchain_chunks = timed(langchain.split_text, text, args.runs)
+            same = "same chunks" if native_chunks == langchain_chunks else "CHUNKS DIFFER"
+            print(
+                f"{chars:>9} chars {label:<12}  native {native_s * 1000:8.1f} ms  "
+                f"langchain {langchain_s * 1000:8.1f} ms  "
+                f"{langchain_s / native_s:5.1f}x  {len(native_chunks)} chunks, {same}"
+            )
+
+
+if __name__ == "__main__":
+    main()
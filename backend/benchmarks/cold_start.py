@@ -0,0 +1,69 @@
+"""
+Import time and cold start for the API and the Celery worker modules.
+
+Each target is imported in a fresh interpreter several times. The script
+reports the median wall time, plus the slowest top-level imports from
+`python -X importtime`. Compare the output before and after a change by
+running it on both revisions.
+
+    python -m benchmarks.cold_start --runs 5
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = ("app.main", "app.services.celery_worker")
+
+TIMER = (
+    "import time; start = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def import_seconds(module: str) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", TIMER.format(module=module)],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def slowest_imports(module: str, limit: int):
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)", line)
+        # Only packages imported directly by application code
+        if match and len(match.group(2)) <= 2:
+            rows.append((int(match.group(1)), match.group(3)))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    for module in TARGETS:
+        samples = [import_seconds(module) for _ in range(args.runs)]
+        print(f"{module}: median import {statistics.median(samples) * 1000:.0f} ms")
+        for cumulative_us, name in slowest_imports(module, args.top):
+            print(f"    {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
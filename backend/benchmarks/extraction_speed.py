@@ -0,0 +1,128 @@
+"""
+Pages per second per core for HTML extraction, single-parse versus the previous three-parse path.
+
+Reads every *.html file in a corpus directory of saved pages. Build one
+from real pages first with --save, which downloads a list of URLs (one per
+line) through the shared fetcher:
+
+    python -m benchmarks.extraction_speed --corpus /tmp/pages --save urls.txt
+    python -m benchmarks.extraction_speed --corpus /tmp/pages --processes 4
+
+"legacy" is trafilatura.extract on the raw bytes plus a BeautifulSoup
+html.parser tree for the title, as WebScraper did before; it needs
+beautifulsoup4, which is no longer a dependency, and is skipped without
+it. "single parse" is WebScraper._extract, with and without
+trafilatura's fallback pass. Each configuration runs the corpus in
+--processes worker processes, so per-core throughput is
+pages / wall time / processes.
+"""
+import argparse
+import glob
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.config import settings  # noqa: E402
+from app.utils.web_scraper import scraper  # noqa: E402
+
+
+def legacy_extract(html: bytes):
+    import trafilatura
+    from bs4 import BeautifulSoup
+
+    content = trafilatura.extract(
+        html, include_links=False, include_images=False, include_tables=True
+    )
+    soup = BeautifulSoup(html, "html.parser")
+    title_tag = soup.find("title")
+    return content, title_tag.get_text().strip() if title_tag else None
+
+
+def single_parse_extract(html: bytes):
+    try:
+        result = scraper._extract("https://corpus.local/", html)
+    except ValueError:
+        return None, None
+    return result["content"], result["title"]
+
+
+METHODS = {"legacy": legacy_extract, "single parse": single_parse_extract}
+
+
+def run_shard(method: str, fast: bool, paths):
+    settings.extraction_fast = fast
+    extract = METHODS[method]
+    extracted = 0
+    for path in paths:
+        with open(path, "rb") as f:
+            content, _ = extract(f.read())
+        extracted += bool(content)
+    return extracted
+
+
+def save_corpus(urls_file: str, corpus: str):
+    from app.utils.fetcher import fetcher
+
+    os.makedirs(corpus, exist_ok=True)
+    with open(urls_file) as f:
+        urls = [line.strip() for line in f if line.strip()]
+    saved = 0
+    for response in fetcher.fetch_many(urls):
+        if "error" in response:
+            print(f"skipped {response['url']}: {response['error']}")
+            continue
+        name = hashlib.sha256(response["url"].encode()).hexdigest()[:16]
+        with open(os.path.join(corpus, f"{name}.html"), "w", encoding="utf-8") as f:
+            f.write(response["content"])
+        saved += 1
+    fetcher.close()
+    print(f"Saved {saved} of {len(urls)} pages to {corpus}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", required=True, help="directory of saved *.html pages")
+    parser.add_argument("--save", metavar="URLS_FILE", help="download these URLs into --corpus first")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the corpus")
+    args = parser.parse_args()
+
+    if args.save:
+        save_corpus(args.save, args.corpus)
+    paths = sorted(glob.glob(os.path.join(args.corpus, "*.html"))) * args.repeat
+    if not paths:
+        sys.exit(f"No *.html files in {args.corpus}")
+    megabytes = sum(os.path.getsize(path) for path in paths) / 1024 ** 2
+    print(f"{len(paths)} pages ({megabytes:.1f} MB), {args.processes} processes")
+
+    shards = [paths[i::args.processes] for i in range(args.processes)]
+    configs = [("single parse", False), ("single parse", True)]
+    try:
+        import bs4  # noqa: F401
+        configs.insert(0, ("legacy", False))
+    except ImportError:
+        print("beautifulsoup4 is not installed, skipping the legacy path")
+    with ProcessPoolExecutor(args.processes) as pool:
+        # Import the extraction libraries in every worker before timing
+        list(pool.map(run_shard, ["single parse"] * args.processes, [False] * args.processes,
+                      [shard[:1] for shard in shards]))
+        for method, fast in configs:
+            start = time.perf_counter()
+            extracted = sum(pool.map(
+                run_shard, [method] * len(shards), [fast] * len(shards), shards
+            ))
+            elapsed = time.perf_counter() - start
+            label = f"{method}{', fast' if fast else ''}"
+            print(
+                f"{label:<19} {len(paths) / elapsed / args.processes:7.1f} pages/s/core  "
+                f"{elapsed:6.2f} s  {extracted}/{len(paths)} with content"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Recall@k and search latency of dense-only versus hybrid (dense + BM25, RRF) retrieval.
+
+The fixture corpus is generated locally: short troubleshooting notes that
+share templates but differ in exact tokens (error codes, part numbers,
+function names), plus one natural-language query type. Every query has one
+relevant document. Documents are ingested through VectorStoreManager into a
+throwaway collection, in-memory by default or on --qdrant-url, with the
+collection manifest in a temporary SQLite file. Dense vectors come from the
+configured embedding provider, so this needs its API key; repeat runs are
+served from the embedding cache.
+
+    python -m benchmarks.hybrid_recall --docs 120 --k 1 3 5
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.update({"DATABASE_URL": f"sqlite:///{_db_path}", "DEBUG": "false"})
+
+from qdrant_client import QdrantClient  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.database import init_db  # noqa: E402
+from app.services.vector_store import VectorStoreManager  # noqa: E402
+
+COMPONENTS = [
+    "payment gateway", "session cache", "upload service", "search indexer",
+    "billing scheduler", "email dispatcher", "auth proxy", "report exporter",
+    "image resizer", "webhook relay", "inventory sync", "audit logger",
+]
+CAUSES = [
+    "the upstream certificate has expired",
+    "the connection pool is exhausted",
+    "a request exceeds the configured size limit",
+    "the schema version does not match",
+    "the disk quota is reached",
+    "a lock is held longer than the timeout",
+    "the API token lacks the required scope",
+    "clock skew exceeds five minutes",
+    "the message queue is full",
+    "a dependency returns malformed JSON",
+]
+FIXES = [
+    "Restart the service after rotating the credentials.",
+    "Increase the limit in the deployment settings and redeploy.",
+    "Clear the stale entries and retry the operation.",
+    "Roll back to the previous release and open an incident.",
+]
+VERBS = ["sync", "flush", "resolve", "load", "render", "validate"]
+
+
+def build_fixture(docs: int, seed: int):
+    rng = random.Random(seed)
+    combos = [(c, cause) for c in COMPONENTS for cause in CAUSES]
+    rng.shuffle(combos)
+    codes = rng.sample(range(1000, 10000), docs)
+    parts = rng.sample(range(10000, 100000), docs)
+
+    documents, queries = [], []
+    for i, (component, cause) in enumerate(combos[:docs]):
+        code = f"ERR-{codes[i]}"
+        part = f"SKU-{parts[i]}-{rng.choice('ABCDEF')}"
+        function = f"{rng.choice(VERBS)}_{component.split()[0]}_{i}"
+        job_id = str(uuid.uuid4())
+        documents.append({
+            "content": (
+                f"Error {code} is raised by the {component} when {cause}. "
+                f"It was first reported on hardware part {part}. The handler "
+                f"{function}() logs the failure and retries three times. "
+                f"{rng.choice(FIXES)}"
+            ),
+            "job_id": job_id,
+            "url": f"https://fixture.local/notes/{i}",
+            "title": f"{component} note {i}",
+        })
+        queries += [
+            ("error code", f"What does {code} mean?", job_id),
+            ("part number", f"Which error was reported on {part}?", job_id),
+            ("function", f"Why does {function} retry?", job_id),
+            ("natural language", f"The {component} fails because {cause}", job_id),
+        ]
+    return documents, queries
+
+
+def evaluate(manager: VectorStoreManager, queries, ks):
+    hits = defaultdict(lambda: defaultdict(int))
+    totals = defaultdict(int)
+    latencies = []
+    for kind, query, job_id in queries:
+        start = time.perf_counter()
+        results = manager.search(query, k=max(ks))
+        latencies.append((time.perf_counter() - start) * 1000)
+        ranked = [doc["metadata"]["job_id"] for doc, _ in results]
+        totals[kind] += 1
+        for k in ks:
+            hits[kind][k] += job_id in ranked[:k]
+    return hits, totals, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=120)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--qdrant-url", default=None)
+    args = parser.parse_args()
+    if args.docs > len(COMPONENTS) * len(CAUSES):
+        parser.error(f"--docs must be at most {len(COMPONENTS) * len(CAUSES)}")
+    logging.basicConfig(level=logging.ERROR)
+
+    documents, queries = build_fixture(args.docs, args.seed)
+
+    init_db()
+    settings.hybrid_search_enabled = True
+    manager = VectorStoreManager()
+    manager.collection_name = f"hybrid_recall_{uuid.uuid4().hex[:8]}"
+    manager._client = (
+        QdrantClient(url=args.qdrant_url) if args.qdrant_url else QdrantClient(location=":memory:")
+    )
+    try:
+        manager.add_documents(documents)
+        # Warm the query embedding cache so latency covers retrieval only
+        for _, query, _ in queries:
+            manager.embedding_client.embed_text(query)
+
+        for mode, hybrid in (("dense", False), ("hybrid", True)):
+            settings.hybrid_search_enabled = manager._hybrid = hybrid
+            hits, totals, latencies = evaluate(manager, queries, args.k)
+            print(
+                f"{mode}: median {statistics.median(latencies):.1f} ms  "
+                f"p95 {statistics.quantiles(latencies, n=20)[-1]:.1f} ms"
+            )
+            for kind in totals:
+                recall = "  ".join(
+                    f"R@{k} {hits[kind][k] / totals[kind]:.2f}" for k in args.k
+                )
+                print(f"    {kind:<17} {recall}")
+    finally:
+        if manager._live_collection:
+            manager.client.delete_collection(manager._live_collection)
+
+
+if __name__ == "__main__":
+    main()
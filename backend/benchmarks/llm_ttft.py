@@ -0,0 +1,68 @@
+"""
+Time to first token with a new LLMClient per request versus the shared,
+long-lived client from the registry.
+
+Unlike the other benchmarks this talks to the real provider, because the
+difference being measured is TCP+TLS setup. It needs the provider's API key
+in the environment or .env.
+
+    python -m benchmarks.llm_ttft --provider gemini --runs 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.llm_client import LLMClient, LLMClientRegistry  # noqa: E402
+
+PROMPT = "Reply with one word."
+CONTEXT = ["The word is ready."]
+
+
+async def time_to_first_token(client: LLMClient) -> float:
+    start = time.perf_counter()
+    stream = client.generate_streaming(PROMPT, CONTEXT, max_tokens=16)
+    try:
+        async for _ in stream:
+            return time.perf_counter() - start
+    finally:
+        await stream.aclose()
+    return time.perf_counter() - start
+
+
+async def run(provider: str, runs: int):
+    per_request = []
+    for _ in range(runs):
+        client = LLMClient(provider)
+        per_request.append(await time_to_first_token(client))
+        await client.aclose()
+
+    registry = LLMClientRegistry()
+    shared = registry.get(provider)
+    # First call opens the pool, as it would right after startup
+    await time_to_first_token(shared)
+    pooled = [await time_to_first_token(shared) for _ in range(runs)]
+    await registry.aclose()
+
+    for label, samples in (("per-request client", per_request), ("shared client", pooled)):
+        ms = [sample * 1000 for sample in samples]
+        print(
+            f"{label:<20} median {statistics.median(ms):7.1f} ms  "
+            f"min {min(ms):7.1f} ms  max {max(ms):7.1f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--provider", default=None)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.provider, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Estimated memory versus recall@k and latency for Qdrant storage/quantization settings.
+
+Clustered random vectors are uploaded to a throwaway collection per
+configuration, built with VectorStoreManager._collection_config, and
+searched with VectorStoreManager._search_params. Recall is measured against
+brute-force NumPy ground truth. RAM is estimated from the configuration
+(original vectors, quantized vectors and the HNSW graph), not read from the
+server. Needs a running Qdrant (docker compose up qdrant), no API keys.
+
+    python -m benchmarks.quantization_recall --points 20000 --dim 768
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qdrant_client import QdrantClient  # noqa: E402
+from qdrant_client.models import CollectionStatus  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.services.vector_store import VectorStoreManager  # noqa: E402
+
+CONFIGS = [
+    ("float32", {}),
+    ("float32, on disk", {"qdrant_on_disk_vectors": True}),
+    ("scalar int8", {"qdrant_quantization": "scalar"}),
+    ("scalar int8, on disk", {"qdrant_quantization": "scalar", "qdrant_on_disk_vectors": True}),
+    ("binary", {"qdrant_quantization": "binary"}),
+    ("binary, no rescore", {"qdrant_quantization": "binary", "qdrant_search_rescore": False}),
+    ("binary, on disk", {"qdrant_quantization": "binary", "qdrant_on_disk_vectors": True}),
+]
+
+DEFAULTS = {
+    "qdrant_quantization": None,
+    "qdrant_on_disk_vectors": False,
+    "qdrant_search_rescore": True,
+}
+
+
+def clustered(rng, centers, count: int, spread: float) -> np.ndarray:
+    vectors = centers[rng.integers(len(centers), size=count)]
+    vectors = vectors + spread * rng.standard_normal(vectors.shape)
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def estimated_ram_mb(points: int, dim: int) -> float:
+    total = 0 if settings.qdrant_on_disk_vectors else points * dim * 4
+    if settings.qdrant_quantization and settings.qdrant_quantization_always_ram:
+        bits = 8 if settings.qdrant_quantization == "scalar" else 1
+        total += points * dim * bits / 8
+    # Level-0 HNSW links dominate the graph: 2 * m neighbours of 4 bytes
+    total += points * settings.qdrant_hnsw_m * 2 * 4
+    return total / 1024 ** 2
+
+
+def wait_indexed(client: QdrantClient, name: str, points: int, timeout: float = 600):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = client.get_collection(name)
+        if info.status == CollectionStatus.GREEN and (info.indexed_vectors_count or 0) >= points:
+            return
+        time.sleep(1)
+    raise TimeoutError(f"Collection {name} not indexed after {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--qdrant-url", default=settings.qdrant_url)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    centers = rng.standard_normal((100, args.dim))
+    vectors = clustered(rng, centers, args.points, spread=0.6)
+    queries = clustered(rng, centers, args.queries, spread=0.6)
+    truth = np.argsort(-(queries @ vectors.T), axis=1)[:, :args.k]
+
+    client = QdrantClient(url=args.qdrant_url, api_key=settings.qdrant_api_key, timeout=120)
+    print(f"{args.points} x {args.dim} vectors, recall@{args.k} against brute force")
+    for label, overrides in CONFIGS:
+        for key, value in {**DEFAULTS, **overrides}.items():
+            setattr(settings, key, value)
+        name = f"quantization_bench_{uuid.uuid4().hex[:8]}"
+        client.create_collection(
+            collection_name=name, **VectorStoreManager._collection_config(args.dim)
+        )
+        try:
+            client.upload_collection(
+                collection_name=name,
+                vectors=vectors,
+                ids=range(args.points),
+                batch_size=512,
+                wait=True
+            )
+            wait_indexed(client, name, args.points)
+
+            latencies, recalls = [], []
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                hits = client.search(
+                    collection_name=name,
+                    query_vector=query.tolist(),
+                    search_params=VectorStoreManager._search_params(),
+                    limit=args.k
+                )
+                latencies.append((time.perf_counter() - start) * 1000)
+                recalls.append(len({hit.id for hit in hits} & set(expected.tolist())) / args.k)
+            print(
+                f"{label:<22} ~{estimated_ram_mb(args.points, args.dim):7.1f} MB RAM  "
+                f"recall {statistics.mean(recalls):.3f}  "
+                f"median {statistics.median(latencies):6.1f} ms"
+            )
+        finally:
+            client.delete_collection(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Queries per second for a single API worker, before and after the async
+query path.
+
+Qdrant, the embedding provider and the LLM are replaced by local stand-ins
+that only add a fixed network latency, and the database is a local SQLite
+file, so the numbers isolate how much of that latency one event loop can
+overlap.
+
+    pip install aiosqlite
+    python -m benchmarks.query_concurrency --concurrency 32 --requests 256
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_db_path}",
+    "GEMINI_API_KEY": "bench",
+    "EMBEDDING_CACHE_ENABLED": "false",
+    "QUERY_CACHE_ENABLED": "false",
+    "DEBUG": "false",
+    "LOG_LEVEL": "WARNING",
+})
+
+import qdrant_client  # noqa: E402
+import app.utils.embedding_client as embedding_client_module  # noqa: E402
+
+NETWORK_LATENCY = 0.02
+DIM = 768
+VECTOR = [0.1] * DIM
+
+
+def _collection_info():
+    params = SimpleNamespace(
+        vectors=SimpleNamespace(size=DIM, on_disk=False), sparse_vectors=None, on_disk_payload=False
+    )
+    config = SimpleNamespace(
+        params=params, hnsw_config=SimpleNamespace(m=16, ef_construct=100), quantization_config=None
+    )
+    return SimpleNamespace(points_count=1000, payload_schema={}, config=config)
+
+
+def _points(limit):
+    return [
+        SimpleNamespace(
+            id=i,
+            score=0.9,
+            vector=VECTOR,
+            payload={"content": f"chunk {i}", "source": "https://example.com", "chunk_index": i},
+        )
+        for i in range(limit)
+    ]
+
+
+class StandInQdrant:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        # Collection bootstrap calls that the benchmark does not care about
+        return lambda *args, **kwargs: None
+
+    def collection_exists(self, *args, **kwargs):
+        return True
+
+    def get_aliases(self, *args, **kwargs):
+        return SimpleNamespace(aliases=[])
+
+    def get_collection(self, *args, **kwargs):
+        time.sleep(NETWORK_LATENCY)
+        return _collection_info()
+
+    def search(self, *args, limit=5, **kwargs):
+        time.sleep(NETWORK_LATENCY)
+        return _points(limit)
+
+
+class StandInAsyncQdrant:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        async def noop(*args, **kwargs):
+            return None
+        return noop
+
+    async def get_collection(self, *args, **kwargs):
+        await asyncio.sleep(NETWORK_LATENCY)
+        return _collection_info()
+
+    async def get_aliases(self, *args, **kwargs):
+        await asyncio.sleep(NETWORK_LATENCY)
+        return SimpleNamespace(aliases=[])
+
+    async def count(self, *args, **kwargs):
+        await asyncio.sleep(NETWORK_LATENCY)
+        return SimpleNamespace(count=1000)
+
+    async def search(self, *args, limit=5, **kwargs):
+        await asyncio.sleep(NETWORK_LATENCY)
+        return _points(limit)
+
+
+class StandInEmbeddingClient:
+    provider = "gemini"
+    model_name = "text-embedding-004"
+    dimension = DIM
+    cache = None
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def embed_text(self, text):
+        time.sleep(NETWORK_LATENCY)
+        return VECTOR
+
+    async def aembed_text(self, text):
+        await asyncio.sleep(NETWORK_LATENCY)
+        return VECTOR
+
+
+class StandInLLMClient:
+    model_name = "stand-in"
+
+    def __init__(self, provider=None):
+        pass
+
+    async def generate_streaming(self, prompt, context_chunks, **kwargs):
+        for token in ("stand-in ", "answer"):
+            await asyncio.sleep(0)
+            yield token
+
+
+qdrant_client.QdrantClient = StandInQdrant
+qdrant_client.AsyncQdrantClient = StandInAsyncQdrant
+embedding_client_module.EmbeddingClient = StandInEmbeddingClient
+
+import httpx  # noqa: E402
+from fastapi import Depends  # noqa: E402
+from fastapi.responses import StreamingResponse  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.api import routes  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.database import async_engine, get_db, init_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.url_document import QueryLog  # noqa: E402
+
+routes.llm_clients.get = lambda provider=None: StandInLLMClient()
+
+
+@app.post("/bench/legacy-query")
+async def legacy_query(request: routes.QueryRequest, db: Session = Depends(get_db)):
+    """The query path before it was made async: sync stats, search and commits"""
+    manager = routes.vector_store_manager
+    stats = manager.get_stats()
+    assert stats["total_documents"]
+    results = manager.search(request.query, k=settings.top_k_results)
+    query_log = QueryLog(query_id=os.urandom(16).hex(), query_text=request.query)
+    db.add(query_log)
+    db.commit()
+    llm_client = StandInLLMClient()
+
+    async def generate_stream():
+        async for chunk in llm_client.generate_streaming(request.query, results):
+            yield chunk
+        db.commit()
+
+    return StreamingResponse(generate_stream(), media_type="text/plain")
+
+
+async def run(path: str, concurrency: int, total: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        queue = asyncio.Queue()
+        for i in range(total):
+            queue.put_nowait(i)
+
+        async def worker():
+            while not queue.empty():
+                i = queue.get_nowait()
+                response = await client.post(path, json={"query": f"question {i}"})
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    # Pooled connections belong to this event loop
+    await async_engine.dispose()
+    return total / elapsed
+
+
+def main():
+    global NETWORK_LATENCY
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    args = parser.parse_args()
+    NETWORK_LATENCY = args.latency_ms / 1000
+
+    init_db()
+    for label, path in (("before (sync calls)", "/bench/legacy-query"), ("after (async)", "/api/v1/query")):
+        qps = asyncio.run(run(path, args.concurrency, args.requests))
+        print(f"{label:<22} {qps:8.1f} queries/s  (concurrency={args.concurrency})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import hashlib
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings are read on import: tests get a throwaway SQLite database, and an
+# unreachable Redis so locks, leases and corpus events take their fallback
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ["REDIS_URL"] = "redis://localhost:1/0"
+
+import pytest  # noqa: E402
+
+
+class FakeEmbeddingClient:
+    """Deterministic 4-dimensional embeddings, no API calls"""
+
+    dimension = 4
+
+    def __init__(self, provider=None, model=None):
+        from app.config import settings
+
+        self.provider = provider or settings.embedding_provider
+        self.model_name = model or settings.get_embedding_model(self.provider)
+        self.cache = None
+
+    def embed_text(self, text):
+        digest = hashlib.sha256(text.encode()).digest()
+        return [byte / 255 + 0.01 for byte in digest[:self.dimension]]
+
+    async def aembed_text(self, text):
+        return self.embed_text(text)
+
+    def embed_batch(self, texts):
+        return [self.embed_text(text) for text in texts]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """VectorStoreManager over an in-memory Qdrant and a fresh manifest"""
+    from qdrant_client import QdrantClient
+
+    from app.database import engine, init_db
+    from app.models.url_document import Base
+    from app.services import vector_store
+
+    Base.metadata.drop_all(bind=engine)
+    init_db()
+    monkeypatch.setattr(vector_store, "EmbeddingClient", FakeEmbeddingClient)
+    manager = vector_store.VectorStoreManager()
+    manager._client = QdrantClient(location=":memory:")
+    return manager
@@ -0,0 +1,37 @@
+"""
+merge_adjacent must only join neighbouring chunks of one version of a page
+"""
+from app.services.context_builder import merge_adjacent
+
+TEXT = "".join(f"word{i:03d} " for i in range(300))
+
+
+def _hit(start, end, chunk_index, content_hash, source="https://example.com/a"):
+    metadata = {
+        "source": source,
+        "chunk_index": chunk_index,
+        "char_start": start,
+        "char_end": end,
+        "content_hash": content_hash,
+    }
+    return {"page_content": TEXT[start:end], "metadata": metadata}, 1.0
+
+
+def test_neighbours_of_one_version_are_merged():
+    passages = merge_adjacent([_hit(0, 600, 0, "v1"), _hit(400, 1000, 1, "v1")])
+
+    assert len(passages) == 1
+    assert passages[0][0]["page_content"] == TEXT[:1000]
+    assert passages[0][0]["metadata"]["chunk_indexes"] == [0, 1]
+
+
+def test_neighbours_of_different_versions_are_kept_apart():
+    passages = merge_adjacent([_hit(0, 600, 0, "v1"), _hit(500, 1100, 1, "v2")])
+
+    assert [doc["page_content"] for doc, _ in passages] == [TEXT[:600], TEXT[500:1100]]
+
+
+def test_hits_without_content_hash_are_kept_apart():
+    passages = merge_adjacent([_hit(0, 600, 0, None), _hit(400, 1000, 1, None)])
+
+    assert len(passages) == 2
@@ -0,0 +1,181 @@
+"""
+LLMClient.generate_streaming must never block the event loop.
+
+The real provider SDK clients stream from a local server that waits between
+tokens, so a provider path that makes a sync SDK call shows up as loop lag.
+A control case drives the Gemini SDK's sync surface from a coroutine to
+prove the probe catches exactly that.
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.config import settings
+from app.utils.llm_client import LLMClient
+
+TOKENS = 10
+TOKEN_DELAY = 0.05
+STREAMS = 4
+# Loop lag allowed while streaming; a sync call stalls for about
+# TOKENS * TOKEN_DELAY
+MAX_LAG = 0.1
+
+
+def _openai_events():
+    for i in range(TOKENS):
+        yield None, {
+            "id": "chatcmpl-1",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "stub",
+            "choices": [{"index": 0, "delta": {"content": f"token{i} "}, "finish_reason": None}],
+        }
+
+
+def _anthropic_events():
+    yield "message_start", {
+        "type": "message_start",
+        "message": {
+            "id": "msg_1", "type": "message", "role": "assistant", "model": "stub",
+            "content": [], "stop_reason": None, "stop_sequence": None,
+            "usage": {"input_tokens": 1, "output_tokens": 0},
+        },
+    }
+    yield "content_block_start", {
+        "type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""},
+    }
+    for i in range(TOKENS):
+        yield "content_block_delta", {
+            "type": "content_block_delta", "index": 0,
+            "delta": {"type": "text_delta", "text": f"token{i} "},
+        }
+    yield "content_block_stop", {"type": "content_block_stop", "index": 0}
+    yield "message_delta", {
+        "type": "message_delta",
+        "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+        "usage": {"output_tokens": TOKENS},
+    }
+    yield "message_stop", {"type": "message_stop"}
+
+
+def _gemini_events():
+    for i in range(TOKENS):
+        yield None, {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": f"token{i} "}]}}],
+        }
+
+
+class SlowStreamHandler(BaseHTTPRequestHandler):
+    """Server-sent events in each provider's wire format, one token per TOKEN_DELAY"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("content-length", 0)))
+        if "streamGenerateContent" in self.path:
+            events = _gemini_events()
+        elif self.path.endswith("/messages"):
+            events = _anthropic_events()
+        else:
+            events = _openai_events()
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("connection", "close")
+        self.end_headers()
+        for event, data in events:
+            time.sleep(TOKEN_DELAY)
+            if event:
+                self.wfile.write(f"event: {event}\n".encode())
+            self.wfile.write(f"data: {json.dumps(data)}\n\n".encode())
+            self.wfile.flush()
+        if "streamGenerateContent" not in self.path and not self.path.endswith("/messages"):
+            self.wfile.write(b"data: [DONE]\n\n")
+
+
+@pytest.fixture(scope="module")
+def provider_server(monkeypatch_module):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowStreamHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch_module.setenv("OPENAI_BASE_URL", f"{base}/v1")
+    monkeypatch_module.setenv("ANTHROPIC_BASE_URL", base)
+    monkeypatch_module.setenv("GOOGLE_GEMINI_BASE_URL", base)
+    for key in ("gemini_api_key", "openai_api_key", "anthropic_api_key"):
+        monkeypatch_module.setattr(settings, key, "test-key")
+    yield base
+    server.shutdown()
+
+
+@pytest.fixture(scope="module")
+def monkeypatch_module():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        yield monkeypatch
+
+
+async def _max_loop_lag(*streams) -> float:
+    """Largest delay of a 1 ms timer while the given coroutines run"""
+    done = asyncio.Event()
+    worst = 0.0
+
+    async def monitor():
+        nonlocal worst
+        interval = 0.001
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            worst = max(worst, time.perf_counter() - start - interval)
+
+    monitor_task = asyncio.create_task(monitor())
+    # Let the monitor take its first reading before any stream starts
+    await asyncio.sleep(0.01)
+    try:
+        await asyncio.gather(*streams)
+    finally:
+        done.set()
+        await monitor_task
+    return worst
+
+
+async def _consume(client: LLMClient):
+    tokens = [token async for token in client.generate_streaming("question", ["context"])]
+    assert "".join(tokens) == "".join(f"token{i} " for i in range(TOKENS)), tokens
+
+
+@pytest.mark.parametrize("provider", ["gemini", "openai", "anthropic"])
+def test_streaming_does_not_block_event_loop(provider_server, provider):
+    async def run():
+        client = LLMClient(provider)
+        try:
+            # The SDKs import and build their response types on first use;
+            # that one-off cost is not what this test is about
+            await _consume(client)
+            return await _max_loop_lag(*(_consume(client) for _ in range(STREAMS)))
+        finally:
+            await client.aclose()
+
+    lag = asyncio.run(run())
+    assert lag < MAX_LAG, f"{provider} stalled the event loop for {lag * 1000:.0f} ms"
+
+
+def test_sync_sdk_call_is_detected(provider_server):
+    async def sync_stream(client: LLMClient):
+        # What _gemini_stream did before it moved to the aio surface
+        for _ in client.client.models.generate_content_stream(
+            model=client.model_name, contents="question"
+        ):
+            pass
+
+    async def run():
+        client = LLMClient("gemini")
+        try:
+            await _consume(client)
+            return await _max_loop_lag(sync_stream(client))
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) >= MAX_LAG
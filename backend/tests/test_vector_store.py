@@ -0,0 +1,102 @@
+"""
+Chunk dedup and source links in VectorStoreManager, against an in-memory Qdrant
+"""
+import hashlib
+
+from app.config import settings
+from app.services.vector_store import chunk_point_id
+
+# About 3,300 characters that split into 4 chunks at both 1000 and 1100
+TEXT = " ".join(
+    f"Sentence number {i} talks about topic {i % 7} in some detail." for i in range(60)
+)
+
+
+def _document(job_id, content=TEXT):
+    return {"content": content, "job_id": job_id, "url": f"https://example.com/{job_id}", "title": job_id}
+
+
+def _job_points(store, job_id):
+    return store._existing_payloads(list(store._job_points(job_id)))
+
+
+def _split_ids(store, content=TEXT):
+    return {
+        chunk_point_id(chunk_hash)
+        for _, chunk_hash, _ in store._unique_chunks(store.text_splitter.split(content))
+    }
+
+
+def _use_chunk_size(store, monkeypatch, size):
+    monkeypatch.setattr(settings, "chunk_size", size)
+    store._text_splitter = None
+
+
+def test_same_content_under_another_job_is_linked(store):
+    store.add_documents([_document("a")])
+    store.add_documents([_document("b")])
+
+    points = _job_points(store, "b")
+    assert set(points) == _split_ids(store)
+    assert all(payload["job_ids"] == ["a", "b"] for payload in points.values())
+
+
+def test_new_split_with_equal_chunk_count_is_indexed(store, monkeypatch):
+    store.add_documents([_document("a")])
+    old_ids = _split_ids(store)
+
+    _use_chunk_size(store, monkeypatch, 1100)
+    new_ids = _split_ids(store)
+    assert len(new_ids) == len(old_ids) and new_ids != old_ids
+
+    store.add_documents([_document("a")])
+    assert set(_job_points(store, "a")) == old_ids | new_ids
+
+
+def test_reindex_with_equal_chunk_count_keeps_vectors(store, monkeypatch):
+    store.add_documents([_document("a")])
+
+    _use_chunk_size(store, monkeypatch, 1100)
+    assert store.reindex_documents([_document("a")]) == [len(_split_ids(store))]
+
+    points = _job_points(store, "a")
+    assert set(points) == _split_ids(store)
+    assert all("a" in payload["job_ids"] for payload in points.values())
+
+
+def test_shared_chunk_cites_a_remaining_document(store):
+    store.add_documents([_document("a")])
+    store.add_documents([_document("b")])
+    store.delete_document("a")
+
+    results = store.search("topic 3", k=10)
+    assert len(results) == len(_split_ids(store))
+    for doc, _ in results:
+        metadata = doc["metadata"]
+        assert (metadata["source"], metadata["job_id"], metadata["title"]) == (
+            "https://example.com/b", "b", "b"
+        )
+        assert metadata["sources"] == ["https://example.com/b"]
+
+
+def test_refresh_renumbers_kept_chunks(store):
+    store.add_documents([_document("a")])
+    # Dropping the opening sentences keeps the last two chunks, which move
+    # to new indexes and offsets
+    content = TEXT[TEXT.index("Sentence number 15"):]
+    kept = _split_ids(store) & _split_ids(store, content)
+    assert kept and kept != _split_ids(store, content)
+
+    store.refresh_document(content, "a", "https://example.com/a", "a")
+
+    content_hash = hashlib.sha256(content.encode()).hexdigest()
+    points = _job_points(store, "a")
+    assert set(points) == _split_ids(store, content)
+    for chunk_index, chunk in enumerate(store.text_splitter.split(content)):
+        payload = points[chunk_point_id(hashlib.sha256(chunk.text.encode()).hexdigest())]
+        assert (payload["chunk_index"], payload["char_start"], payload["char_end"]) == (
+            chunk_index, chunk.start, chunk.end
+        )
+        assert payload["content_hash"] == content_hash
+        assert payload["chunk_indexes"] == [chunk_index]
+        assert content[payload["char_start"]:payload["char_end"]] == chunk.text